@@ -0,0 +1,71 @@
+"""
+Microbenchmark del parseo de respuestas de búsqueda estructurada de ScraperAPI.
+
+Uso (desde la raíz del repositorio):
+    python -m benchmarks.bench_scraper_api_parse [directorio_con_respuestas_json]
+
+Si se indica un directorio, se usan los archivos *.json grabados que contenga;
+si no, se genera una respuesta sintética con la forma de Google structured search.
+"""
+import json
+import sys
+import timeit
+from pathlib import Path
+
+from utils.json_backend import available_backends, decode_search_response
+
+
+def synthetic_payload(results: int = 100) -> str:
+    return json.dumps({
+        'search_information': {'total_results': 123000, 'time_taken_displayed': 0.41},
+        'ads': [],
+        'related_questions': [{'question': f'Pregunta {i}', 'snippet': 'x' * 200} for i in range(4)],
+        'organic_results': [
+            {
+                'position': i,
+                'title': f'Resultado "{i}" de la búsqueda sobre la entidad',
+                'snippet': 'Lorem ipsum dolor sit amet, consectetur adipiscing elit. ' * 4,
+                'highlighs': ['entidad', 'denuncia'],
+                'link': f'https://www.example.pe/noticias/{i}-nota-sobre-la-entidad',
+                'displayed_link': 'https://www.example.pe › noticias',
+                'sitelinks': {'inline': [{'title': 'Más', 'link': 'https://www.example.pe/mas'}]},
+            } for i in range(results)
+        ],
+        'related_searches': [{'query': f'busqueda relacionada {i}', 'link': 'https://www.google.com/search?q=x'} for i in range(8)],
+        'pagination': {'pages_count': 10, 'current_page': 1, 'next_page_url': 'https://www.google.com/search?q=x&start=10'},
+    })
+
+
+def legacy_parse(body: str) -> list:
+    # Camino anterior: búsqueda de subcadenas, json.loads completo y copias con str().replace.
+    json_response = json.loads(body)
+    if 'organic_results' not in body:
+        return []
+    return [(str(res['title']).replace('"', "'"), str(res['snippet']).replace('"', "'"), res['link']) for res in json_response['organic_results']]
+
+
+def fast_parse(body: str, backend: str) -> list:
+    organic_results, _ = decode_search_response(body, backend)
+    return [((title or '').replace('"', "'"), (snippet or '').replace('"', "'"), link) for title, snippet, link in organic_results or []]
+
+
+def main():
+    if len(sys.argv) > 1:
+        payloads = [path.read_text(encoding='utf-8') for path in sorted(Path(sys.argv[1]).glob('*.json'))]
+    else:
+        payloads = [synthetic_payload()]
+    if not payloads:
+        print('No payloads found')
+        return
+
+    number = 200
+    print(f'{len(payloads)} payload(s), {sum(len(p) for p in payloads) / 1024:.1f} KiB total, {number} iterations')
+    timing = timeit.timeit(lambda: [legacy_parse(p) for p in payloads], number=number)
+    print(f'{"legacy (json)":>16}: {timing / number * 1e3:.3f} ms/iter')
+    for backend in available_backends():
+        timing = timeit.timeit(lambda: [fast_parse(p, backend) for p in payloads], number=number)
+        print(f'{backend:>16}: {timing / number * 1e3:.3f} ms/iter')
+
+
+if __name__ == '__main__':
+    main()
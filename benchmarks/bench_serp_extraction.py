@@ -0,0 +1,84 @@
+"""
+Microbenchmark de la extracción de resultados de páginas de Bing (formatting_results).
+
+Uso (desde la raíz del repositorio):
+    python -m benchmarks.bench_serp_extraction [directorio_con_paginas_html]
+
+Si se indica un directorio, se usan los archivos *.html grabados que contenga;
+si no, se genera una página sintética de 100 resultados con la forma de Bing.
+"""
+import sys
+import timeit
+from pathlib import Path
+
+from lxml import etree
+
+from services.searchEngineDD.serpExtractor import extract_results, get_engine_profile
+from services.searchEngineDD.responseClassifier import BING_ENGINE
+
+
+def synthetic_page(results: int = 100) -> str:
+    items = ''.join(
+        f'''<li class="b_algo"><div class="b_tpcn"><div class="b_attribution"><cite>https://peru21.pe › politica › nota-{i}</cite></div></div>
+        <h2><a href="https://peru21.pe/politica/nota-{i}-sobre-la-entidad" h="ID=SERP,{i}">Resultado {i} sobre la entidad - Perú 21</a></h2>
+        <div class="b_caption"><p class="b_lineclamp2 b_algoSlug"><span class="news_dt">Mar 3, 2023</span> · Lorem ipsum dolor sit amet, consectetur adipiscing elit {i}.</p></div></li>'''
+        for i in range(results)
+    )
+    return f'<html><head><title>entidad - Search</title></head><body><div id="b_content"><ol id="b_results">{items}</ol></div></body></html>'
+
+
+def legacy_extract(html: str) -> list:
+    # Camino anterior: XPaths como cadenas, evaluados varias veces por campo y por nodo.
+    _xpath_empty, _xpath_base = '//div[@class="no_results"]', '//li[@class="b_algo"]'
+    _xpath_titulo, _xpath_enlace = './/h2/a', './/h2/a/@href'
+    _xpath_fecha, _xpath_fuente = './/p[contains(@class, "b_lineclamp")]', './/div[@class="b_attribution"]/cite'
+    content = etree.HTML(html)
+    if content.xpath(_xpath_empty):
+        return []
+    return [
+        (
+            item.xpath(_xpath_titulo)[0].xpath('string(.)') if item.xpath(_xpath_titulo) else '',
+            item.xpath(_xpath_fecha)[0].xpath('string(.)') if item.xpath(_xpath_fecha) else '',
+            item.xpath(_xpath_enlace)[0] if item.xpath(_xpath_enlace) else '',
+            item.xpath(_xpath_fuente)[0].xpath('string(.)') if item.xpath(_xpath_fuente) else '',
+        ) for item in content.xpath(_xpath_base)
+        if (item.xpath(_xpath_enlace)[0] if item.xpath(_xpath_enlace) else '')
+    ]
+
+
+def compiled_extract(html: str, profile) -> list:
+    return [item for item in extract_results(html, profile) or [] if item[2]]
+
+
+def main():
+    if len(sys.argv) > 1:
+        pages = [path.read_text(encoding='utf-8') for path in sorted(Path(sys.argv[1]).glob('*.html'))]
+    else:
+        pages = [synthetic_page()]
+    if not pages:
+        print('No pages found')
+        return
+
+    profile = get_engine_profile(BING_ENGINE)
+    for page in pages:
+        assert legacy_extract(page) == compiled_extract(page, profile), 'Extraction mismatch'
+        assert compiled_extract(page, profile) == compiled_extract(page.encode('utf-8'), profile), 'Bytes extraction mismatch'
+
+    number = 50
+    print(f'{len(pages)} page(s), {sum(len(p) for p in pages) / 1024:.1f} KiB total, {number} iterations')
+    timing = timeit.timeit(lambda: [legacy_extract(p) for p in pages], number=number)
+    print(f'{"legacy xpath":>16}: {timing / number * 1e3:.3f} ms/iter')
+    timing = timeit.timeit(lambda: [compiled_extract(p, profile) for p in pages], number=number)
+    print(f'{"compiled xpath":>16}: {timing / number * 1e3:.3f} ms/iter')
+
+    # Cuerpo tal como llega por la red: decodificarlo a str antes de parsear frente a
+    # entregar los bytes UTF-8 directamente a lxml.
+    bodies = [page.encode('utf-8') for page in pages]
+    timing = timeit.timeit(lambda: [compiled_extract(b.decode('utf-8'), profile) for b in bodies], number=number)
+    print(f'{"decoded str":>16}: {timing / number * 1e3:.3f} ms/iter')
+    timing = timeit.timeit(lambda: [compiled_extract(b, profile) for b in bodies], number=number)
+    print(f'{"raw bytes":>16}: {timing / number * 1e3:.3f} ms/iter')
+
+
+if __name__ == '__main__':
+    main()
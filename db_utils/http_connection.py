@@ -0,0 +1,73 @@
+import asyncio
+import logging
+import threading
+import aiohttp
+from utils.constants import HTTP_CONNECTOR_LIMIT, HTTP_CONNECTOR_LIMIT_PER_HOST, HTTP_KEEPALIVE_TIMEOUT, HTTP_DNS_CACHE_TTL
+
+# Static global variables
+http_sessions = {}
+sync_loop = None
+sync_loop_lock = threading.Lock()
+
+def get_http_session() -> aiohttp.ClientSession:
+    """
+    Devuelve la sesión HTTP compartida del worker, creándola si no existe.
+
+    La sesión mantiene un pool de conexiones con keep-alive y caché de DNS, de modo
+    que todas las entidades de un lote reutilizan las mismas conexiones TCP/TLS.
+    Una sesión de aiohttp queda ligada al event loop que la creó, por lo que hay una
+    por loop: la del loop de las Functions asíncronas y la del loop persistente que
+    usa el código síncrono (ver `run_sync`).
+    """
+    loop = asyncio.get_running_loop()
+    http_session = http_sessions.get(loop)
+    if http_session is None or http_session.closed:
+        logging.info('Establishing a pooled HTTP session.')
+        # Las sesiones de loops ya cerrados no se pueden usar ni cerrar: se descartan.
+        for closed_loop in [other for other in http_sessions if other.is_closed()]:
+            del http_sessions[closed_loop]
+        connector = aiohttp.TCPConnector(
+            limit=HTTP_CONNECTOR_LIMIT,
+            limit_per_host=HTTP_CONNECTOR_LIMIT_PER_HOST,
+            keepalive_timeout=HTTP_KEEPALIVE_TIMEOUT,
+            use_dns_cache=True,
+            ttl_dns_cache=HTTP_DNS_CACHE_TTL,
+        )
+        http_session = aiohttp.ClientSession(connector=connector)
+        http_sessions[loop] = http_session
+    return http_session
+
+async def close_http_session() -> None:
+    http_session = http_sessions.pop(asyncio.get_running_loop(), None)
+    if http_session is not None and not http_session.closed:
+        await http_session.close()
+
+def get_sync_loop() -> asyncio.AbstractEventLoop:
+    """
+    Devuelve el event loop persistente (en un hilo propio) donde el código síncrono
+    ejecuta sus corrutinas, para que reutilice la misma sesión con pool entre llamadas
+    en lugar de abrir una sesión y un loop nuevos en cada una.
+    """
+    global sync_loop
+
+    with sync_loop_lock:
+        if sync_loop is None or sync_loop.is_closed():
+            sync_loop = asyncio.new_event_loop()
+            threading.Thread(target=sync_loop.run_forever, name='http-sync-loop', daemon=True).start()
+    return sync_loop
+
+def run_sync(coroutine):
+    """
+    Ejecuta la corrutina en el loop persistente y espera su resultado. Se puede llamar
+    desde cualquier hilo, también desde uno con un event loop corriendo, excepto desde
+    el propio loop persistente.
+    """
+    loop = get_sync_loop()
+    try:
+        running_loop = asyncio.get_running_loop()
+    except RuntimeError:
+        running_loop = None
+    if running_loop is loop:
+        coroutine.close()
+        raise RuntimeError('run_sync cannot be called from the persistent HTTP loop')
+    return asyncio.run_coroutine_threadsafe(coroutine, loop).result()
@@ -7,7 +7,8 @@ from datetime import datetime, timedelta, timezone
 from db_models.entityModel import Entity
 from utils.match_closest_string import match_closest_string
 from utils.normalize_string import normalize_string
-from utils.constants import JURIDICAL_PERSON, NATURAL_PERSON, ENTITY_TYPE_ORG
+from utils.constants import JURIDICAL_PERSON, NATURAL_PERSON, ENTITY_TYPE_ORG, STAGE_PERSIST
+from utils.instrumentation import timed
 class EntityRepository:
 
     __DATABASE_NAME = os.environ.get('DB_DATABASE')
@@ -90,6 +91,7 @@ class EntityRepository:
         
         return results
     
+    @timed(STAGE_PERSIST)
     def generate_new_entity(self, entity: dict):
         most_similar_type = ""
         if(entity.get('entityType')):
@@ -121,6 +123,7 @@ class EntityRepository:
             logging.error(f"An error occurred during Data Insertion: {e}")
             return None
     
+    @timed(STAGE_PERSIST)
     def update_entity(self, body: dict):
         try:
             response = self.container.upsert_item(body)
@@ -129,6 +132,7 @@ class EntityRepository:
             logging.error(f"An error occurred during Data Update: {e}")
             return None
     
+    @timed(STAGE_PERSIST)
     def insert_entity(self, body: dict):
         try:
             response = self.container.create_item(body)
@@ -5,7 +5,8 @@ from typing import List
 from azure.cosmos import exceptions
 from db_models.resultModel import Result
 from db_utils.db_connection import get_cosmos_client, cosmos_container_connection
-from utils.constants import SOURCECODE_ADVERSE_MEDIA,SOURCECODE_AD_MEDIA,SOURCE_CODE_GAFI
+from utils.constants import SOURCECODE_ADVERSE_MEDIA,SOURCECODE_AD_MEDIA,SOURCE_CODE_GAFI, STAGE_PERSIST
+from utils.instrumentation import timed
 
 class ResultRepository:
 
@@ -125,6 +126,7 @@ class ResultRepository:
             logging.error("New Result was not inserted in the Database.")
         return response
     
+    @timed(STAGE_PERSIST)
     def update_result(self, body: dict):
         try:
             response = self.container.upsert_item(body)
@@ -133,6 +135,7 @@ class ResultRepository:
             logging.error(f"An error occurred during Data Update: {e}")
             return None
     
+    @timed(STAGE_PERSIST)
     def insert_result(self, body: dict):
         try:
             response = self.container.create_item(body)
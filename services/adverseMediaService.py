@@ -19,9 +19,10 @@ from services.searchEngineDD.adverseMediaNewsOrchestrator import AdverseMediaNew
 from services.searchEngineDD.adverseMedia import scraping_adverse_media_batch, scraping_adverse_media
 
 # --- Utilidades y Constantes ---
-from utils.constants import KEYWORDS_LIST, NEWS_WEBSITES, SOURCECODE_ADVERSE_MEDIA
-from utils.decorators import log_execution_time
+from utils.constants import KEYWORDS_LIST, NEWS_WEBSITES, SOURCECODE_ADVERSE_MEDIA, STAGE_KEYWORDS, STAGE_MERGE
+from utils.instrumentation import timed, timed_request
 from utils.normalize_string import normalize_string_special_chars
+from utils.deadline import Deadline, SEARCH_COMPLETE, SEARCH_TIMED_OUT, SEARCH_FAILED
 
 # --- Repositorios (Capa de Acceso a Datos) ---
 # Clases que manejan la lógica para comunicarse con la base de datos.
@@ -32,6 +33,7 @@ from repositories.sourceRepository import SourceRepository
 # --- Servicios Adicionales ---
 # Servicio centralizado para realizar peticiones de scraping.
 from services.scraperApiService import ScraperApiService
+from db_utils.http_connection import get_http_session
 
 
 async def countdown_timer(timeout):
@@ -65,7 +67,7 @@ async def process_adverse_media(sourceApiService, entity, entityDocs):
               Formato de retorno exitoso:
               {
                   "entityIdNumber": str, "name": str, "commercialName": str,
-                  'requestStatus': int, 'results': list,
+                  'requestStatus': int, 'searchStatus': str, 'results': list,
                   'createdOn': str_iso_date, 'updatedOn': str_iso_date
               }
     """
@@ -103,6 +105,7 @@ async def process_adverse_media(sourceApiService, entity, entityDocs):
                 "name": entity.get('name', ''),
                 "commercialName": entity.get('commercialName', ''),
                 'requestStatus': result_media[0], # El primer elemento es el código de estado.
+                'searchStatus': SEARCH_COMPLETE,
                 'results': result_media[1],       # El segundo elemento es la lista de resultados.
                 'createdOn': datetime.now(timezone.utc).isoformat(),
                 'updatedOn': datetime.now(timezone.utc).isoformat(),
@@ -113,7 +116,7 @@ async def process_adverse_media(sourceApiService, entity, entityDocs):
             return {
                 "entityIdNumber": found_entity.entityIdNumber, "name": entity.get('name', ''),
                 "commercialName": entity.get('commercialName', ''), 'requestStatus': 504,
-                'results': [], 'createdOn': datetime.now(timezone.utc).isoformat(),
+                'searchStatus': SEARCH_TIMED_OUT, 'results': [], 'createdOn': datetime.now(timezone.utc).isoformat(),
                 'updatedOn': datetime.now(timezone.utc).isoformat(),
             }
         except Exception as e:
@@ -121,14 +124,15 @@ async def process_adverse_media(sourceApiService, entity, entityDocs):
             return {
                 "entityIdNumber": found_entity.entityIdNumber, "name": found_entity.name,
                 "commercialName": found_entity.commercialName, 'requestStatus': 500,
-                'results': [], 'createdOn': datetime.now(timezone.utc).isoformat(),
+                'searchStatus': SEARCH_FAILED, 'results': [], 'createdOn': datetime.now(timezone.utc).isoformat(),
                 'updatedOn': datetime.now(timezone.utc).isoformat(),
             }
     else:
         return None
 
 
-async def fill_adverse_media_http(sourceApiService, entity_list, entityDocs, hasAdverseMedia):
+@timed_request
+async def fill_adverse_media_http(sourceApiService, entity_list, entityDocs, hasAdverseMedia, deadline: Deadline = None):
     """
     Orquesta la búsqueda de medios adversos para una lista de entidades, creando
     una tarea asíncrona para cada una.
@@ -138,37 +142,60 @@ async def fill_adverse_media_http(sourceApiService, entity_list, entityDocs, has
         entity_list (list[dict]): Lista de entidades a procesar.
         entityDocs: Colección de documentos para búsqueda local.
         hasAdverseMedia (bool): Una bandera para activar o desactivar esta función.
+        deadline (Deadline, optional): Plazo de la solicitud. Al vencer se cancelan las
+            entidades pendientes, que se devuelven con 'requestStatus' 504.
 
     Returns:
-        list[dict]: Una lista con los resultados de todas las entidades procesadas exitosamente.
+        list[dict]: Una lista con los resultados de todas las entidades procesadas.
     """
     # Si la bandera está desactivada, retorna una lista vacía inmediatamente.
     if not hasAdverseMedia:
         return []
     logging.info("Started Adverse Media Finding")
     
+    deadline = deadline or Deadline()
     # Crea una lista de tareas, una por cada entidad.
-    tasks = [
-        asyncio.create_task(process_adverse_media(sourceApiService, entity, entityDocs))
+    tasks = {
+        asyncio.create_task(process_adverse_media(sourceApiService, entity, entityDocs)): entity
         for entity in entity_list
-    ]
+    }
     
     adverse_result = []
     try:
         # `asyncio.as_completed` procesa las tareas a medida que se completan,
         # lo cual es eficiente en memoria para grandes volúmenes de tareas.
-        for task in asyncio.as_completed(tasks):
+        for task in asyncio.as_completed(tasks, timeout=deadline.remaining()):
             result_media = await task
             # Solo agrega el resultado si no es None.
             if result_media is not None:
                 adverse_result.append(result_media)
+    except asyncio.TimeoutError:
+        # Venció el plazo. `as_completed` pudo no haber entregado aún tareas que ya
+        # terminaron, así que se rearma la lista desde las tareas: las terminadas aportan
+        # su resultado y las pendientes se cancelan y se marcan como vencidas.
+        logging.warning("Deadline reached in <Adverse Media>: cancelling pending entities")
+        adverse_result = []
+        for task, entity in tasks.items():
+            if task.done():
+                if not task.cancelled() and task.exception() is None and task.result() is not None:
+                    adverse_result.append(task.result())
+                continue
+            task.cancel()
+            adverse_result.append({
+                "entityIdNumber": entity.get('entityIdNumber', ''), "name": entity.get('name', ''),
+                "commercialName": entity.get('commercialName', ''), 'requestStatus': 504,
+                'searchStatus': SEARCH_TIMED_OUT, 'results': [],
+                'createdOn': datetime.now(timezone.utc).isoformat(),
+                'updatedOn': datetime.now(timezone.utc).isoformat(),
+            })
     except asyncio.CancelledError:
         logging.warning("Adverse media processing was cancelled")
 
     return adverse_result
 
 
-async def fill_adverse_media_news(sourceApiService, entity_list, entityDocs, hasAdMedia):
+@timed_request
+async def fill_adverse_media_news(sourceApiService, entity_list, entityDocs, hasAdMedia, deadline: Deadline = None):
     """
     Prepara y ejecuta una búsqueda de noticias adversas en sitios web específicos para
     una lista de entidades.
@@ -178,6 +205,8 @@ async def fill_adverse_media_news(sourceApiService, entity_list, entityDocs, has
         entity_list (list[dict]): Lista de entidades a procesar.
         entityDocs: Colección de documentos para búsqueda local.
         hasAdMedia (bool): Bandera para activar o desactivar la función.
+        deadline (Deadline, optional): Plazo de la solicitud; al vencer se devuelven
+            solo las consultas que ya respondieron.
 
     Returns:
         list: Una lista con los resultados crudos devueltos por el `ScraperApiService`.
@@ -216,9 +245,10 @@ async def fill_adverse_media_news(sourceApiService, entity_list, entityDocs, has
                 entities_to_search.extend([(key, keyword, website) for key in KEYWORDS_LIST for website in NEWS_WEBSITES])
     
     try:
-        _scraperService = ScraperApiService()
+        # Usa la sesión HTTP compartida del worker para reutilizar las conexiones.
+        _scraperService = ScraperApiService(get_http_session())
         # Ejecuta todas las solicitudes de noticias a través del servicio.
-        tasks_data = await _scraperService.news_execute_requests(entities_to_search)
+        tasks_data = await _scraperService.news_execute_requests(entities_to_search, deadline=deadline)
     except Exception as e:
         logging.error(f"Error during adverse media news search process: {e}")
         tasks_data = []
@@ -226,7 +256,8 @@ async def fill_adverse_media_news(sourceApiService, entity_list, entityDocs, has
     return tasks_data
 
 
-async def fill_adverse_media(sourceApiService, entity_list, entityDocs, hasAdverseMedia):
+@timed_request
+async def fill_adverse_media(sourceApiService, entity_list, entityDocs, hasAdverseMedia, deadline: Deadline = None):
     """
     Prepara y ejecuta una búsqueda de medios adversos en un motor de búsqueda general
     (como Bing) para una lista de entidades.
@@ -236,6 +267,7 @@ async def fill_adverse_media(sourceApiService, entity_list, entityDocs, hasAdver
         entity_list (list[dict]): Lista de entidades a procesar.
         entityDocs: Colección de documentos para búsqueda local.
         hasAdverseMedia (bool): Bandera para activar o desactivar la función.
+        deadline (Deadline, optional): Plazo de la solicitud, ver `scraping_adverse_media_batch`.
 
     Returns:
         list: Una lista de resultados devuelta por `scraping_adverse_media_batch`.
@@ -264,9 +296,15 @@ async def fill_adverse_media(sourceApiService, entity_list, entityDocs, hasAdver
         for kw in keywords:
             entities_to_search.append((kw, '', entity_id))
             
+    # Colapsa las consultas idénticas de todo el request para ejecutarlas una sola vez.
+    unique_queries, query_owners = dedupe_search_queries(entities_to_search)
+    logging.info(f"<Adverse Media> unique queries: {len(unique_queries)} of {len(entities_to_search)}")
+
     try:
         # Llama a la función que procesa el lote de entidades en un motor de búsqueda.
-        tasks_data = await scraping_adverse_media_batch(entities_to_search)
+        tasks_data = await scraping_adverse_media_batch(unique_queries, deadline)
+        # Reparte cada resultado a todas las entidades que comparten la consulta.
+        tasks_data = fan_out_search_results(tasks_data, query_owners)
     except Exception as e:
         logging.error(f"Error during <Adverse Media> for <All Entities> search process: {e}")
         tasks_data = []
@@ -274,6 +312,78 @@ async def fill_adverse_media(sourceApiService, entity_list, entityDocs, hasAdver
     return tasks_data
 
 
+def normalize_search_query(keyword: str) -> str:
+    """
+    Normaliza una palabra clave de búsqueda para comparar consultas entre entidades
+    (sin distinguir mayúsculas ni espacios repetidos).
+    """
+    return ' '.join((keyword or '').casefold().split())
+
+
+@timed(STAGE_MERGE)
+def dedupe_search_queries(entities_to_search: list[tuple[str, str, str]]):
+    """
+    Agrupa las consultas de todo el request por su palabra clave normalizada, para
+    que una misma persona o empresa presente en varias entidades se busque una vez.
+
+    Args:
+        entities_to_search (list[tuple[str, str, str]]): Tuplas (keyword, '', entityIdNumber).
+
+    Returns:
+        tuple: (consultas_unicas, propietarios)
+               - consultas_unicas: lista de tuplas (keyword, '', entityIdNumber) sin repetidos.
+               - propietarios: lista alineada con consultas_unicas; cada elemento es la
+                 lista [(keyword, entityIdNumber), ...] de entidades que comparten la consulta.
+    """
+    unique_queries = []
+    query_owners = []
+    query_index = {}
+    for keyword, secondary_keyword, entity_id in entities_to_search:
+        key = normalize_search_query(keyword)
+        if key not in query_index:
+            query_index[key] = len(unique_queries)
+            unique_queries.append((keyword, secondary_keyword, entity_id))
+            query_owners.append([])
+        owners = query_owners[query_index[key]]
+        if (keyword, entity_id) not in owners:
+            owners.append((keyword, entity_id))
+    return unique_queries, query_owners
+
+
+@timed(STAGE_MERGE)
+def fan_out_search_results(tasks_data: list, query_owners: dict) -> list:
+    """
+    Replica el resultado de cada consulta única para cada entidad propietaria. Los
+    resultados se asocian por posición (no por el nombre que devuelve el scraper), y
+    cada copia lleva sus propios artículos con el nombre de su entidad.
+
+    Args:
+        tasks_data (list[dict]): Resultados de `scraping_adverse_media_batch`, alineados
+            con las consultas únicas (None si la consulta falló).
+        query_owners (list): Propietarios devueltos por `dedupe_search_queries`.
+
+    Returns:
+        list[dict]: Un resultado por cada par (keyword, entityIdNumber) original.
+    """
+    fanned_out = []
+    for entity_response, owners in zip(tasks_data, query_owners):
+        if entity_response is None:
+            continue
+        for keyword, entity_id in owners:
+            fanned_out.append({
+                **entity_response,
+                'entityIdNumber': entity_id,
+                'commercialName': keyword,
+                'results': [
+                    {**result, 'Nombre o Razón Social': keyword.replace("-", "")}
+                    if 'Nombre o Razón Social' in result else dict(result)
+                    for result in entity_response['results']
+                ]
+            })
+    return fanned_out
+
+
+@timed(STAGE_KEYWORDS)
 def generate_entity_keywords(entity_dict, found_entity=None):
     """
     Función auxiliar para generar una lista de palabras clave únicas para una entidad,
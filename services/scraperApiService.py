@@ -1,13 +1,34 @@
 import json
 import os
+import time
+import random
 import logging
-import requests
 import asyncio
 import aiohttp
-from utils.constants import NEWS_SEARCH
+from db_utils.http_connection import get_http_session, run_sync
+from utils.constants import NEWS_SEARCH, MAX_RETRIES, RETRY_DELAY, EXPONENTIAL_BACKOFF, SCRAPER_API_REQUEST_TIMEOUT, SCRAPER_API_MODE, SCRAPER_API_BATCH_MODE, SCRAPER_API_BATCH_SIZE, SCRAPER_API_POLL_INTERVAL, SCRAPER_API_POLL_MAX_INTERVAL, SCRAPER_API_JOB_TIMEOUT, SCRAPER_API_MAX_CONCURRENCY, SCRAPER_API_REQUESTS_PER_SECOND, SCRAPER_API_BURST, SCRAPER_API_EXHAUSTED_COOLDOWN, SCRAPER_API_THROTTLED_COOLDOWN, SCRAPER_API_CREDITS_REFRESH_INTERVAL, SCRAPER_API_SEARCH_CREDIT_COST, STAGE_FETCH
+from utils.token_bucket import TokenBucket
+from utils.api_key_pool import ApiKeyPool
+from utils.search_cache import get_search_cache
+from utils.json_backend import decode_search_response
+from utils.deadline import Deadline
+from utils.url_index import ResultIndex
+from utils.instrumentation import timed
 
 class ScraperApiService:
     __API_KEY = os.environ.get("SCRAPER_API_KEY")
+    # Límites compartidos por todas las instancias del worker: {api_key: (loop, semáforo, token bucket)}
+    __key_limiters = {}
+    # Pool de keys compartido por todas las instancias del worker.
+    __key_pool = None
+
+    def __init__(self, session: aiohttp.ClientSession = None):
+        # Si no se inyecta una sesión, se usa la sesión compartida del worker.
+        self._session = session
+        self._setNewApiKey()
+
+    def _get_session(self) -> aiohttp.ClientSession:
+        return self._session or get_http_session()
 
     # private methods
     def _getKeys(self):
@@ -17,17 +38,41 @@ class ScraperApiService:
             
         return keys.split(',')
     
+    def _get_key_pool(self) -> ApiKeyPool:
+        if ScraperApiService.__key_pool is None:
+            ScraperApiService.__key_pool = ApiKeyPool(self._getKeys(), SCRAPER_API_EXHAUSTED_COOLDOWN, SCRAPER_API_THROTTLED_COOLDOWN)
+        return ScraperApiService.__key_pool
+
     def _setNewApiKey(self):
-        keys: list = self._getKeys()
-        for key in keys:
-            # TODO: validar si el current key está agotado
+        # Toma la siguiente key sana del pool; las agotadas quedan fuera temporalmente.
+        key = self._get_key_pool().acquire()
+        if key is not None:
             self.__API_KEY = key
-            return key
+        return key
 
-    def _get_structured_data_request(self, keyword: str, search:str):
-        url = f'https://api.scraperapi.com/structured/google/search?api_key={self.__API_KEY}&country_code=PE&query={search}'
+    async def _refresh_key_credits(self, session: aiohttp.ClientSession):
+        '''
+        Consulta el endpoint /account de ScraperAPI para actualizar los créditos
+        restantes de cada key. Se ejecuta como máximo una vez por intervalo.
+        '''
+        pool = self._get_key_pool()
+        if pool.credits_updated_on and time.monotonic() - pool.credits_updated_on < SCRAPER_API_CREDITS_REFRESH_INTERVAL:
+            return
+        pool.credits_updated_on = time.monotonic()
+        for key in pool.keys:
+            try:
+                async with session.get('https://api.scraperapi.com/account', params={'api_key': key}) as response:
+                    account = json.loads(await response.text())
+                pool.update_credits(key, int(account['requestLimit']) - int(account['requestCount']))
+            except Exception as e:
+                logging.warning(f'Could not refresh credits for ScraperAPI key ...{key[-4:]}: {e}')
+        logging.info(f'ScraperAPI remaining credits: { {key[-4:]: credits for key, credits in pool.remaining_credits().items()} }')
+
+    def _get_structured_data_request(self, keyword: str, search:str, api_key: str = None):
+        api_key = api_key or self.__API_KEY
+        url = f'https://api.scraperapi.com/structured/google/search?api_key={api_key}&country_code=PE&query={search}'
         payload = {
-            'api_key': self.__API_KEY,
+            'api_key': api_key,
             'query': keyword,
             'output_format': 'json',
             'autoparse': 'true',
@@ -45,12 +90,25 @@ class ScraperApiService:
         }
         return url, payload
     
-    def _send_scraper_api_request(self, url: str, payload: dict[str, object]):
+    def _run_sync(self, coroutine_function, *args):
+        '''
+        Ejecuta un helper asíncrono desde código síncrono en el loop persistente del
+        worker, con la sesión compartida de ese loop: las llamadas síncronas reutilizan
+        las conexiones en lugar de abrir una sesión nueva cada vez.
+        '''
+        async def runner():
+            return await coroutine_function(get_http_session(), *args)
+
+        return run_sync(runner())
+
+    async def _send_scraper_api_request_async(self, session: aiohttp.ClientSession, url: str, payload: dict[str, object]):
+        timeout = aiohttp.ClientTimeout(total=SCRAPER_API_REQUEST_TIMEOUT)
         try:
             logging.info(f'REQUEST AL SCRAPER API: {payload}')
-            r = requests.get(url, params = payload, verify=False)
-            res = self._parseNewsResponse(r.text)
-            logging.info(r.text)
+            async with session.get(url, params=payload, timeout=timeout) as response:
+                text = await response.text()
+            res = self._parseNewsResponse(text)
+            logging.info(text)
         except Exception as e:
             logging.error(f"An error has ocurred in <Adverse Media> using ScraperAPI: {e}")
             return {
@@ -62,6 +120,18 @@ class ScraperApiService:
         
         return res, url
 
+    def _send_scraper_api_request(self, url: str, payload: dict[str, object]):
+        try:
+            return self._run_sync(self._send_scraper_api_request_async, url, payload)
+        except Exception as e:
+            logging.error(f"An error has ocurred in <Adverse Media> using ScraperAPI: {e}")
+            return {
+                'status': 'Error',
+                'description': str(e),
+                'url': url,
+                'content': None
+            }, url
+
     def _parseNewsResponse(self, response: str):
         result = json.loads(response)
         return result
@@ -72,82 +142,97 @@ class ScraperApiService:
             return text[:position].replace("+", " ")
         return text.replace("+", " ")
     
-    def _parse_result(self, result, keywords: tuple):
-        json_response = json.loads(result)
-
-        if 'organic_results' not in result:
-            msg = 'No Organic results from Scraper'
+    def _decode_result(self, result, description: str):
+        '''
+        Decodifica la respuesta una sola vez con el backend JSON más rápido disponible.
+        Devuelve la lista de (title, snippet, link) o None si no hay resultados orgánicos.
+        '''
+        try:
+            organic_results, msg = decode_search_response(result)
+        except (TypeError, ValueError):
+            logging.error(f'Invalid response from ScraperApi for {description} - {result}')
+            return None
 
-            if('query_result_mismatch_message' in result):
-                msg = json_response['search_information']['query_result_mismatch_message']
-            
-            elif('error' in json_response):
-                msg = json_response['error']
-            
-            logging.error(f'No results from ScraperApi for {keywords[1]} "{keywords[0]}" - {msg}')
-            return []        
+        if organic_results is None:
+            logging.error(f'No results from ScraperApi for {description} - {msg}')
+        return organic_results
 
-        results = [
+    def _format_results(self, organic_results: list, keywords: tuple):
+        # Sin URLs repetidas dentro de la consulta (variantes AMP, parámetros de seguimiento).
+        results = ResultIndex('KeyWord')
+        results.extend(
             {
-                'Titulo': str(res['title']).replace("\"","'"),
-                'Resumen': str(res['snippet']).replace("\"","'"),
-                'URL': res['link'],
+                'Titulo': (title or '').replace("\"","'"),
+                'Resumen': (snippet or '').replace("\"","'"),
+                'URL': link,
                 'KeyWord': keywords[0],
                 'Nombre o Razón Social': keywords[1],
                 'RequestStatus': 200,
                 'DescriptionStatus': 'Ok'
-            } for res in json_response['organic_results']
-        ]
-        return results
-    
-    def _parse_news_result(self, result, query):
-        json_response = json.loads(result)
-
-        if 'organic_results' not in result:
-            msg = 'No Organic results from Scraper'
-
-            if('query_result_mismatch_message' in result):
-                msg = json_response['search_information']['query_result_mismatch_message']
+            } for title, snippet, link in organic_results
+        )
+        return results.results
 
-            elif('error' in json_response):
-                msg = json_response['error']
-            
-            site = query[2]['name']
-            logging.error(f'No results from ScraperApi for "{query[1]}" "{query[0]}" site:{site} - {msg}')
-            return []
+    def _cached_results(self, cached: list, query, keyword_field: str):
+        # La clave de la caché no distingue mayúsculas ni espacios repetidos: los campos
+        # que repiten la consulta se rehacen con la escritura de quien la pide ahora.
+        results = []
+        for result in cached:
+            result = {**result, keyword_field: query[0], 'Nombre o Razón Social': query[1]}
+            if 'MatchedKeywords' in result:
+                result['MatchedKeywords'] = [query[0]]
+            results.append(result)
+        return results
 
-        results = [
+    def _format_news_results(self, organic_results: list, query):
+        results = ResultIndex('Keyword')
+        results.extend(
             {
                 'Fuente': query[2]['name'],
                 'Sitio': f"https://{query[2]['site']}",
                 'Nombre o Razón Social': query[1],
-                'Titulo': str(res['title']).replace("\"","'"),
-                'Fecha': str(res['snippet']).replace("\"","'"),
-                'URL': res['link'],
+                'Titulo': (title or '').replace("\"","'"),
+                'Fecha': (snippet or '').replace("\"","'"),
+                'URL': link,
                 'Keyword': query[0],
                 'RequestStatus': 200,
                 'DescriptionStatus': "Ok"
-            } for res in json_response['organic_results']
-        ]
-        return results
+            } for title, snippet, link in organic_results
+        )
+        return results.results
+
+    def _parse_result(self, result, keywords: tuple):
+        organic_results = self._decode_result(result, f'{keywords[1]} "{keywords[0]}"')
+        if organic_results is None:
+            return []
+        return self._format_results(organic_results, keywords)
+    
+    def _parse_news_result(self, result, query):
+        organic_results = self._decode_result(result, f'"{query[1]}" "{query[0]}" site:{query[2]["name"]}')
+        if organic_results is None:
+            return []
+        return self._format_news_results(organic_results, query)
 
     # Async methods
-    def _get_structured_data_request_post(self, queries: list):
+    def _get_structured_data_request_post(self, queries: list, api_key: str = None):
         url = 'https://async.scraperapi.com/structured/google/search'
         payload = {
-            'api_key': self.__API_KEY,
-            'queries': queries
+            'apiKey': api_key or self.__API_KEY,
+            'queries': queries,
+            'country_code': 'PE'
         }
         return url, payload
 
-    def _send_async_scraper_api_request(self, url: str, payload: dict[str, object]):
+    async def _send_async_scraper_api_request_async(self, session: aiohttp.ClientSession, url: str, payload: dict[str, object]):
         headers = {
             "Content-Type": "application/json"
         }
+        timeout = aiohttp.ClientTimeout(total=SCRAPER_API_REQUEST_TIMEOUT)
         try:
             logging.info(f'REQUEST AL SCRAPER API: {payload}')
-            r = requests.post(url, json=payload, headers=headers, verify=False)
-            res = self._parseNewsResponse(r.text)
+            async with session.post(url, json=payload, headers=headers, timeout=timeout) as response:
+                text = await response.text()
+            res = self._parseNewsResponse(text)
             logging.info(res)
         except Exception as e:
             logging.error(f"An error has ocurred in <Adverse Media> using ScraperAPI: {e}")
@@ -159,58 +244,319 @@ class ScraperApiService:
             }, url
         
         return res, url
+
+    def _send_async_scraper_api_request(self, url: str, payload: dict[str, object]):
+        try:
+            return self._run_sync(self._send_async_scraper_api_request_async, url, payload)
+        except Exception as e:
+            logging.error(f"An error has ocurred in <Adverse Media> using ScraperAPI: {e}")
+            return {
+                'status': 'Error',
+                'description': str(e),
+                'url': url,
+                'content': None
+            }, url
     
     async def _fetch(self, session: aiohttp.ClientSession, url, params):
-        async with session.get(url) as response:
-            return await response.text()
+        # Cada petición tiene su propio deadline para que una respuesta lenta no retenga al resto.
+        timeout = aiohttp.ClientTimeout(total=SCRAPER_API_REQUEST_TIMEOUT)
+        async with session.get(url, timeout=timeout) as response:
+            return response.status, await response.text()
+
+    def _backoff_delay(self, retry_delay: float) -> float:
+        # Jitter sobre el retardo exponencial para que los reintentos no lleguen en ráfaga.
+        return retry_delay * random.uniform(0.5, 1.5)
+
+    def _get_key_limiter(self, api_key: str):
+        loop = asyncio.get_running_loop()
+        limiter = ScraperApiService.__key_limiters.get(api_key)
+        # Las primitivas de asyncio quedan ligadas a su loop; se recrean si el loop cambia.
+        if limiter is None or limiter[0] is not loop:
+            limiter = (
+                loop,
+                asyncio.Semaphore(SCRAPER_API_MAX_CONCURRENCY),
+                TokenBucket(SCRAPER_API_REQUESTS_PER_SECOND, SCRAPER_API_BURST)
+            )
+            ScraperApiService.__key_limiters[api_key] = limiter
+        return limiter[1], limiter[2]
+
+    @timed(STAGE_FETCH)
+    async def _scheduled_fetch(self, session: aiohttp.ClientSession, keyword: str, search: str):
+        '''
+        Envía una búsqueda con una key sana del pool. Si la key responde 403/429
+        se marca como agotada y la búsqueda se reintenta con otra key. Los 5xx y
+        timeouts se reintentan hasta MAX_RETRIES veces con backoff exponencial y jitter.
+        '''
+        pool = self._get_key_pool()
+        tried_keys = set()
+        retry_delay = RETRY_DELAY
+        last_error = 'No healthy ScraperAPI keys available'
+        attempt = 0
+        while attempt < MAX_RETRIES:
+            api_key = pool.acquire(exclude=tried_keys)
+            if api_key is None:
+                # Si solo quedan keys limitadas por 429 se espera a que se liberen.
+                if not pool.throttled_keys(exclude=tried_keys):
+                    break
+                last_error = 'All ScraperAPI keys are throttled'
+            else:
+                semaphore, bucket = self._get_key_limiter(api_key)
+                try:
+                    async with semaphore:
+                        await bucket.acquire()
+                        url, payload = self._get_structured_data_request(keyword, search, api_key)
+                        status, text = await self._fetch(session, url, payload)
+                except (asyncio.TimeoutError, aiohttp.ClientError) as e:
+                    last_error = f'{type(e).__name__}: {e}'
+                else:
+                    pool.report(api_key, status, SCRAPER_API_SEARCH_CREDIT_COST)
+                    if status == 403:
+                        # Key agotada: se prueba otra sin consumir un reintento.
+                        tried_keys.add(api_key)
+                        last_error = 'ScraperAPI key exhausted'
+                        continue
+                    if status != 429 and status < 500:
+                        return text
+                    last_error = f'ScraperAPI responded with status {status}'
+
+            attempt += 1
+            if attempt < MAX_RETRIES:
+                logging.warning(f'ScraperAPI request for {search} failed ({last_error}). Retrying in {retry_delay} seconds...')
+                await asyncio.sleep(self._backoff_delay(retry_delay))
+                retry_delay *= EXPONENTIAL_BACKOFF
+
+        logging.error(f'ScraperAPI request for {search} failed: {last_error}')
+        return json.dumps({'error': last_error})
+
+    async def _iter_scheduled(self, session: aiohttp.ClientSession, requests_to_send: list):
+        '''
+        Ejecuta las peticiones a través de una cola que se drena a medida que se
+        liberan cupos, respetando el límite de concurrencia y de peticiones por
+        segundo de la API key. Produce (index, resultado) en orden de llegada;
+        las excepciones se devuelven como valor, igual que `gather(return_exceptions=True)`.
+        '''
+        queue = asyncio.Queue()
+        for index, (keyword, search) in enumerate(requests_to_send):
+            queue.put_nowait((index, keyword, search))
+        completed = asyncio.Queue()
+
+        async def worker():
+            while True:
+                try:
+                    index, keyword, search = queue.get_nowait()
+                except asyncio.QueueEmpty:
+                    return
+                try:
+                    result = await self._scheduled_fetch(session, keyword, search)
+                except Exception as e:
+                    result = e
+                completed.put_nowait((index, result))
+
+        workers = [asyncio.create_task(worker()) for _ in range(min(SCRAPER_API_MAX_CONCURRENCY, len(requests_to_send)))]
+        try:
+            for _ in range(len(requests_to_send)):
+                yield await completed.get()
+        finally:
+            for task in workers:
+                task.cancel()
     
-    async def execute_requests(self, search_queries: list):
+    async def _submit_batch_job(self, session: aiohttp.ClientSession, searches: list) -> list:
+        '''
+        Envía un lote de búsquedas al endpoint asíncrono de ScraperAPI y devuelve
+        la lista de jobs creados (uno por búsqueda, en el mismo orden).
+        '''
+        pool = self._get_key_pool()
+        tried_keys = set()
+        timeout = aiohttp.ClientTimeout(total=SCRAPER_API_REQUEST_TIMEOUT)
+        while True:
+            api_key = pool.acquire(exclude=tried_keys)
+            if api_key is None:
+                raise Exception('No healthy ScraperAPI keys available')
+
+            url, payload = self._get_structured_data_request_post(searches, api_key)
+            async with session.post(url, json=payload, timeout=timeout) as response:
+                status, text = response.status, await response.text()
+
+            pool.report(api_key, status, SCRAPER_API_SEARCH_CREDIT_COST * len(searches))
+            if status in (403, 429):
+                tried_keys.add(api_key)
+                continue
+            if status >= 400:
+                raise Exception(f'ScraperAPI async submission responded with status {status}: {text}')
+            jobs = json.loads(text)
+            return jobs if isinstance(jobs, list) else [jobs]
+
+    @timed(STAGE_FETCH)
+    async def _poll_job(self, session: aiohttp.ClientSession, index: int, job: dict) -> tuple:
+        '''
+        Consulta el estado de un job asíncrono con backoff exponencial hasta que
+        termina, falla o vence SCRAPER_API_JOB_TIMEOUT. Devuelve (index, body).
+        '''
+        deadline = time.monotonic() + SCRAPER_API_JOB_TIMEOUT
+        timeout = aiohttp.ClientTimeout(total=SCRAPER_API_REQUEST_TIMEOUT)
+        delay = SCRAPER_API_POLL_INTERVAL
+        while time.monotonic() < deadline:
+            await asyncio.sleep(self._backoff_delay(delay))
+            try:
+                async with session.get(job['statusUrl'], timeout=timeout) as response:
+                    job_status = json.loads(await response.text())
+            except (asyncio.TimeoutError, aiohttp.ClientError, ValueError) as e:
+                logging.warning(f"Could not poll ScraperAPI job {job.get('id')}: {e}")
+            else:
+                if job_status.get('status') == 'finished':
+                    body = job_status.get('response', {}).get('body', '')
+                    return index, body if isinstance(body, str) else json.dumps(body)
+                if job_status.get('status') == 'failed':
+                    return index, json.dumps({'error': f"ScraperAPI async job {job.get('id')} failed"})
+            delay = min(delay * EXPONENTIAL_BACKOFF, SCRAPER_API_POLL_MAX_INTERVAL)
+
+        return index, json.dumps({'error': f"ScraperAPI async job {job.get('id')} timed out"})
+
+    async def _iter_batch_results(self, session: aiohttp.ClientSession, requests_to_send: list):
+        '''
+        Modo batch: envía todas las búsquedas como jobs asíncronos (en lotes de
+        SCRAPER_API_BATCH_SIZE) y produce (index, body) a medida que cada job termina.
+        '''
+        tasks = []
+        try:
+            for start in range(0, len(requests_to_send), SCRAPER_API_BATCH_SIZE):
+                chunk = [search for _, search in requests_to_send[start:start + SCRAPER_API_BATCH_SIZE]]
+                try:
+                    jobs = await self._submit_batch_job(session, chunk)
+                except Exception as e:
+                    logging.error(f'ScraperAPI async submission failed: {e}')
+                    for offset in range(len(chunk)):
+                        yield start + offset, json.dumps({'error': str(e)})
+                    continue
+                tasks.extend(asyncio.create_task(self._poll_job(session, start + offset, job)) for offset, job in enumerate(jobs))
+
+            for task in asyncio.as_completed(tasks):
+                yield await task
+        finally:
+            for task in tasks:
+                task.cancel()
+
+    async def _iter_raw_results(self, session: aiohttp.ClientSession, requests_to_send: list, mode: str, deadline: Deadline = None):
+        if mode == SCRAPER_API_BATCH_MODE:
+            raw_results = self._iter_batch_results(session, requests_to_send)
+        else:
+            raw_results = self._iter_scheduled(session, requests_to_send)
+        if deadline is None:
+            deadline = Deadline()
+        answered = 0
+        try:
+            # Al vencer el plazo se cierra el iterador (cancelando las consultas en vuelo)
+            # y se devuelve lo que ya llegó.
+            async for index, result in deadline.iterate(raw_results):
+                answered += 1
+                yield index, result
+        except asyncio.TimeoutError:
+            logging.warning(f'Deadline reached in <ScraperAPI>: {len(requests_to_send) - answered} of {len(requests_to_send)} queries without response')
+
+    async def iter_requests(self, search_queries: list, mode: str = SCRAPER_API_MODE, deadline: Deadline = None):
+        '''
+        Versión en streaming de `execute_requests`: produce (query, resultados)
+        por cada consulta a medida que llega su respuesta, sin esperar al resto.
+        Las consultas en caché se producen primero. Si vence `deadline`, termina
+        sin producir las consultas que no respondieron a tiempo.
+        '''
+        session = self._get_session()
+        cache = get_search_cache()
+        pending_queries = []
+        requests_to_send = []
+        for query in search_queries:
+            search = f'"{query[1]}" "{query[0]}"'
+            cache_key = cache.make_key(search)
+            cached = await cache.aget(cache_key)
+            if cached is not None:
+                yield query, self._cached_results(cached, query, 'KeyWord')
+                continue
+            pending_queries.append((query, cache_key))
+            requests_to_send.append((query[0], search))
+
+        if requests_to_send:
+            await self._refresh_key_credits(session)
+        async for index, result in self._iter_raw_results(session, requests_to_send, mode, deadline):
+            query, cache_key = pending_queries[index]
+            organic_results = self._decode_result(result, f'{query[1]} "{query[0]}"')
+            new_res = [] if organic_results is None else self._format_results(organic_results, query)
+            # Solo se guardan respuestas válidas; los errores y rechazos deben reintentarse.
+            if organic_results is not None:
+                await cache.aset(cache_key, new_res)
+            logging.info(f"Results for '{query}': {len(new_res)}")
+            yield query, new_res
+        logging.info(f'Search cache stats: {cache.stats()}')
+
+    async def iter_news_requests(self, search_queries: list, mode: str = SCRAPER_API_MODE, deadline: Deadline = None):
+        '''
+        Versión en streaming de `news_execute_requests`: produce (query, resultados)
+        por cada consulta a medida que llega su respuesta, hasta que vence `deadline`.
+        '''
+        session = self._get_session()
+        cache = get_search_cache()
+        pending_queries = []
+        requests_to_send = []
+        for query in search_queries:
+            site = query[2]['site'] 
+            search = f'"{query[1]}" "{query[0]}" site:{site}'
+            cache_key = cache.make_key(f'"{query[1]}" "{query[0]}"', site)
+            cached = await cache.aget(cache_key)
+            if cached is not None:
+                yield query, self._cached_results(cached, query, 'Keyword')
+                continue
+            pending_queries.append((query, cache_key))
+            requests_to_send.append((query[0], search))
+
+        if requests_to_send:
+            await self._refresh_key_credits(session)
+        async for index, result in self._iter_raw_results(session, requests_to_send, mode, deadline):
+            query, cache_key = pending_queries[index]
+            name = query[2]['name'] 
+            logging.info(f"Results for <Adverse Media News - '{name}'>:")
+            organic_results = self._decode_result(result, f'"{query[1]}" "{query[0]}" site:{name}')
+            new_res = [] if organic_results is None else self._format_news_results(organic_results, query)
+            if organic_results is not None:
+                await cache.aset(cache_key, new_res)
+            yield query, new_res
+        logging.info(f'Search cache stats: {cache.stats()}')
+
+    async def execute_requests(self, search_queries: list, mode: str = SCRAPER_API_MODE, deadline: Deadline = None):
         #print("Entró al _build_async_requests")
         try:
-            async with aiohttp.ClientSession() as session:
-                tasks = []
-                for query in search_queries:
-                    search = f'"{query[1]}" "{query[0]}"'
-                    url, payload = self._get_structured_data_request(query[0], search)
-                    tasks.append(self._fetch(session, url, payload))
-                results = await asyncio.gather(*tasks, return_exceptions=True)
-                response = []
-                for query, result in zip(search_queries, results):
-                    new_res = self._parse_result(result, query)
-                    logging.info(f"Results for '{query}': {len(new_res)}")
-                    response.extend(new_res)
-                return response
+            # Un artículo encontrado con varias keywords se devuelve una vez, con todas en 'MatchedKeywords'.
+            response = ResultIndex('KeyWord')
+            async for _, new_res in self.iter_requests(search_queries, mode, deadline):
+                response.extend(new_res)
+            return response.results
 
         except Exception as e:
             logging.error(f"Unexpected error in <Adverse Media>: {e}")
             return []
 
-    async def news_execute_requests(self, search_queries: list):
+    async def news_execute_requests(self, search_queries: list, mode: str = SCRAPER_API_MODE, deadline: Deadline = None):
         try:        
-            async with aiohttp.ClientSession() as session:
-                tasks = []
-                for query in search_queries:
-                    site = query[2]['site'] 
-                    search = f'"{query[1]}" "{query[0]}" site:{site}'
-                    url, payload = self._get_structured_data_request(query[0], search)
-                    tasks.append(self._fetch(session, url, payload))
-                results = await asyncio.gather(*tasks, return_exceptions=True)
-                response = []
-                for query, result in zip(search_queries, results):
-                    name = query[2]['name'] 
-                    logging.info(f"Results for <Adverse Media News - '{name}'>:")
-                    #print(result)
-                    new_res = self._parse_news_result(result, query)
-                    response.extend(new_res)
-                return response
+            response = ResultIndex('Keyword')
+            async for _, new_res in self.iter_news_requests(search_queries, mode, deadline):
+                response.extend(new_res)
+            return response.results
         
         except Exception as e:
             logging.error(f"Unexpected error in <Adverse Media News>: {e}")
             return []
 
     # public methods
+    async def aget_from_google(self, keywords: tuple[str, str]):
+        '''
+        Versión asíncrona de `get_from_google` sobre la sesión HTTP compartida;
+        no bloquea el event loop.
+        '''
+        url, payload = self._get_structured_data_request(keywords[1], keywords[1])
+        logging.info(f'Request (aget_from_google): {url} - {payload} - {keywords[0]}')
+        response = await self._send_scraper_api_request_async(self._get_session(), url, payload)
+        return response, keywords[0]
+
     def get_from_google(self, keywords: tuple[str, str]):
-        url, payload = self._get_structured_data_request(keywords[1])
+        url, payload = self._get_structured_data_request(keywords[1], keywords[1])
         logging.info(f'Request (get_from_google): {url} - {payload} - {keywords[0]}')
         response = self._send_scraper_api_request(url, payload)
         return response, keywords[0]
@@ -218,6 +564,17 @@ class ScraperApiService:
     def get_from_news(self, keywords: tuple[str, str]):
         return self._scraper_api_request(keywords, NEWS_SEARCH)
 
+    async def aget_from_google_async(self, keywords: list):
+        '''
+        Versión asíncrona de `get_from_google_async` sobre la sesión HTTP compartida.
+        '''
+        queries = [keyword[1] for keyword in keywords]
+
+        url, payload = self._get_structured_data_request_post(queries)
+        logging.info(f'Request (aget_from_google_async): {url} - {payload} - {queries}')
+        response = await self._send_async_scraper_api_request_async(self._get_session(), url, payload)
+        return response, keywords[0]
+
     def get_from_google_async(self, keywords: list):
         queries = [keyword[1] for keyword in keywords]
 
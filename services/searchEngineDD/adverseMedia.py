@@ -17,11 +17,20 @@ import re       # Para trabajar con expresiones regulares (ej. limpiar texto).
 import ssl      # Para gestionar la configuración de certificados SSL.
 from datetime import datetime, timezone  # Para manejar fechas y horas con zona horaria.
 from services.scraperApiService import ScraperApiService  # Un servicio personalizado para hacer scraping.
+from db_utils.http_connection import get_http_session  # Sesión HTTP compartida con pool de conexiones.
+from services.searchEngineDD.ipRotatorPool import get_ip_rotator_pool  # Pool de gateways reutilizables.
+from services.searchEngineDD.responseClassifier import get_response_classifier, BING_ENGINE, RESPONSE_BLOCKED, RESPONSE_ERROR  # Clasificador de respuestas del buscador.
+from services.searchEngineDD.serpExtractor import EngineProfile, get_engine_profile  # XPaths precompilados por motor.
+from services.searchEngineDD.parseExecutor import get_parse_executor  # Parseo de HTML fuera del event loop.
+from utils.url_index import ResultIndex  # Deduplicación de resultados por URL canónica.
+from utils.deadline import Deadline, SEARCH_COMPLETE, SEARCH_TIMED_OUT, search_status  # Plazo de la solicitud.
 from utils import request_status_counter  # Utilidad propia para contar estados de las peticiones.
 from collections import defaultdict  # Diccionario que inicializa claves inexistentes con un valor por defecto.
+from utils.http_encoding import ACCEPT_ENCODING, read_body  # Compresión br/zstd y cuerpos en bytes para lxml.
 
 # Importación de constantes desde un archivo de utilidades.
-from utils.constants import ENDPOINT_URL, ENDPOINT_TIMEOUT, GOOGLE_SEARCH, KEYWORDS_LIST, MAX_SEARCH_RESULTS, MAX_RETRIES, NEWS_SEARCH, RETRY_DELAY, EXPONENTIAL_BACKOFF, REQUEST_SLEEP_TIME
+from utils.constants import ENDPOINT_URL, ENDPOINT_TIMEOUT, GOOGLE_SEARCH, KEYWORDS_LIST, MAX_SEARCH_RESULTS, MAX_RETRIES, NEWS_SEARCH, RETRY_DELAY, EXPONENTIAL_BACKOFF, REQUEST_SLEEP_TIME, DEADLINE_GRACE, STAGE_FETCH
+from utils.instrumentation import timed  # Tiempos por etapa de la solicitud.
 
 
 # --- Configuración Inicial ---
@@ -38,7 +47,7 @@ ssl_context.check_hostname = False
 ssl_context.verify_mode = ssl.CERT_NONE
 
 
-async def scraping_adverse_media_batch(entities_set: list[tuple[str, str, str]]):
+async def scraping_adverse_media_batch(entities_set: list[tuple[str, str, str]], deadline: Deadline = None):
     """
     Orquesta el proceso de scraping para un lote de entidades de forma concurrente.
     Configura el rotador de IPs y lanza una tarea de scraping para cada entidad.
@@ -46,38 +55,42 @@ async def scraping_adverse_media_batch(entities_set: list[tuple[str, str, str]])
     Args:
         entities_set (list[tuple[str, str, str]]): Una lista de tuplas, donde cada tupla
         contiene (nombre_comercial, razon_social, entityIdNumber) de una entidad.
+        deadline (Deadline, optional): Plazo de la solicitud. Al vencer se cancelan las
+            búsquedas pendientes y se devuelve lo que ya terminó.
 
     Returns:
-        list[dict]: Una lista de diccionarios, donde cada diccionario es el resultado
-                    completo del scraping para una entidad exitosa. En caso de un
-                    error mayor, devuelve una lista vacía.
+        list[dict]: Una lista alineada con `entities_set`, donde cada diccionario es el
+                    resultado completo del scraping para la entidad (o con `searchStatus`
+                    "timed_out" si venció el plazo) y None si su tarea falló. En caso de
+                    un error mayor, devuelve una lista vacía.
     """
+    deadline = deadline or Deadline()
     try:
         _site = 'https://www.bing.com'  # Sitio web objetivo para el rotador de IPs.
 
-        aws_access_key_id = os.environ.get("AWS_ACCESS_KEY_ID")
-        aws_secret_access_key = os.environ.get("AWS_SECRET_ACCESS_KEY")
+        # Un único servicio para todo el lote: todas las entidades comparten la sesión
+        # HTTP con pool de conexiones hacia ScraperAPI.
+        _scraperService = ScraperApiService(get_http_session())
 
-        _gateway_instance = IpRotator(
-            target=_site,
-            aws_key_id=aws_access_key_id,
-            aws_key_secret=aws_secret_access_key,
-            regions=['us-east-1', 'us-east-2'],
-        )
-
-        # Inicia el rotador de IP. Esto crea los recursos necesarios en AWS.
-        async with _gateway_instance as ip_rotator:
+        # Toma un gateway ya aprovisionado del pool (o lo crea la primera vez) en lugar
+        # de crear los recursos en AWS en cada invocación.
+        async with get_ip_rotator_pool().acquire(_site) as ip_rotator:
             # Crea una lista de tareas asíncronas, una por cada entidad en el lote.
-            tasks = [scraping_adverse_media(entity[0], entity[1], entity[2], ip_rotator) for entity in entities_set]
-            # Ejecuta todas las tareas concurrentemente y espera sus resultados.
-            # `return_exceptions=True` permite que el programa continúe aunque algunas tareas fallen.
-            tasks_data = await asyncio.gather(*tasks, return_exceptions=True)
+            tasks = [scraping_adverse_media(entity[0], entity[1], entity[2], ip_rotator, _scraperService, deadline) for entity in entities_set]
+            # Ejecuta todas las tareas concurrentemente y espera sus resultados hasta el plazo.
+            # Las excepciones se devuelven como valor para que el programa continúe aunque algunas tareas fallen.
+            tasks_data = await deadline.gather(*tasks, grace=DEADLINE_GRACE)
 
         results = []
-        # Filtra los resultados para separar las tareas exitosas de las que lanzaron excepciones.
-        for task in tasks_data:
-            if isinstance(task, Exception):
+        # Separa las tareas exitosas de las que lanzaron excepciones, conservando la
+        # posición de cada entidad para que quien llama pueda asociar cada resultado.
+        for entity, task in zip(entities_set, tasks_data):
+            if isinstance(task, asyncio.TimeoutError):
+                logging.warning(f"Deadline reached in <Adverse Media> for <{entity[0]}>")
+                results.append(build_adverse_media_response(entity[0], entity[1], entity[2], 504, [], SEARCH_TIMED_OUT))
+            elif isinstance(task, Exception):
                 logging.error(f"Task resulted in an exception: {task}")
+                results.append(None)
             else:
                 results.append(task)
 
@@ -110,6 +123,7 @@ def extrae_informacion(objeto: etree._Element, xpath: str) -> list:
     return xpath_lista
 
 
+@timed(STAGE_FETCH)
 async def consulta_pagina_web(session: ClientSession, url: str, header: dict, keyword: str, dict_tracker, limit) -> tuple:
     """
     Realiza una única petición GET a una URL de forma asíncrona, con reintentos y
@@ -121,7 +135,7 @@ async def consulta_pagina_web(session: ClientSession, url: str, header: dict, ke
         header (dict): Las cabeceras HTTP para la petición.
         keyword (str): La palabra clave de búsqueda asociada a esta URL.
         dict_tracker: Un objeto para contar los códigos de estado de las respuestas.
-        limit: Un semáforo de asyncio para limitar la concurrencia.
+        limit (DomainConcurrencyController): Controlador adaptativo de concurrencia del dominio.
 
     Returns:
         tuple: Una tupla con (contenido, url, keyword).
@@ -130,34 +144,42 @@ async def consulta_pagina_web(session: ClientSession, url: str, header: dict, ke
     """
     max_retries = MAX_RETRIES
     retry_delay = RETRY_DELAY
-    sleep_time = REQUEST_SLEEP_TIME
 
     for attempt in range(max_retries):
         try:
-            # Espera a que el semáforo permita la ejecución para no sobrecargar el servidor.
+            # Espera a que el controlador del dominio libere un cupo para no sobrecargar el servidor.
             async with limit:
                 # Realiza la petición GET.
                 response = await session.get(url, headers=header, timeout=30, ssl=ssl_context)
                 
-                # Si la página no se encuentra, reintenta con un retardo exponencial.
-                if response.status == 404:
+                # Si la página no se encuentra o hay rate limiting, reintenta con un retardo exponencial.
+                if response.status in (404, 429):
+                    limit.record_block(f'status {response.status}')
                     logging.warning(f'For <Adverse Media>: {response.status}: {response.reason}')
                     await asyncio.sleep(retry_delay)
                     retry_delay *= EXPONENTIAL_BACKOFF # Aumenta el tiempo de espera para el siguiente reintento.
                     continue
 
-                resp_text = await response.text()
+                # Bytes UTF-8 sin decodificar: lxml los parsea directamente.
+                resp_text = await read_body(response)
 
-                # Detección de CAPTCHA o bloqueo por parte del buscador.
-                if any(substring in resp_text for substring in [
-                    "Our systems have detected unusual traffic", "Please click", "trouble accessing Google Search"
-                ]):
-                    logging.warning(f'For <Adverse Media>: Google CAPTCHA detected for URL: {url}')
+                # Clasifica la respuesta: una página de CAPTCHA o bloqueo no se devuelve
+                # como resultado válido, porque al parsearla parecería "sin noticias".
+                classification = get_response_classifier(BING_ENGINE).classify(response.status, resp_text)
+                if classification == RESPONSE_BLOCKED:
+                    logging.warning(f'For <Adverse Media>: Blocked response detected for URL: {url}')
+                    limit.record_block('CAPTCHA')
                     request_status_counter.agregar_o_actualizar(dict_tracker, "500")
-                else:
-                    request_status_counter.agregar_o_actualizar(dict_tracker, str(response.status))
+                    await asyncio.sleep(limit.delay)
+                    return {'status': 'Blocked', 'description': 'Search engine blocked the request', 'url': url, 'content': None}, url, keyword
+
+                request_status_counter.agregar_o_actualizar(dict_tracker, str(response.status))
+                if classification == RESPONSE_ERROR:
+                    await asyncio.sleep(limit.delay)
+                    return {'status': 'Error', 'description': f'Unexpected response status {response.status}', 'url': url, 'content': None}, url, keyword
+                limit.record_success()
                 
-                await asyncio.sleep(sleep_time) # Pequeña pausa para no ser demasiado agresivo.
+                await asyncio.sleep(limit.delay) # Pausa adaptativa: se reduce con respuestas limpias y crece ante bloqueos.
                 
                 return resp_text, url, keyword
 
@@ -200,7 +222,7 @@ async def google_search_async(lista_criterios_busqueda: list[tuple[str, str]], x
         xpath (str): XPath base para la extracción (no usado directamente aquí).
         gateway (IpRotator): La instancia del rotador de IP.
         dict_tracker: El contador de estados de petición.
-        limit: El semáforo de concurrencia.
+        limit (DomainConcurrencyController): Controlador adaptativo de concurrencia del dominio.
 
     Returns:
         list[tuple]: Una lista de tuplas, donde cada tupla es el resultado de
@@ -217,6 +239,7 @@ async def google_search_async(lista_criterios_busqueda: list[tuple[str, str]], x
     _header = {
         "User-Agent": random.choice(user_agents),
         "Accept": "text/html,application/xhtml+xml,application/xml;q=0.9,image/webp,image/apng,*/*;q=0.8",
+        "Accept-Encoding": ACCEPT_ENCODING,
         "Accept-Language": "en-US,en;q=0.9",
         "Referer": "https://www.bing.com/",
     }
@@ -228,49 +251,48 @@ async def google_search_async(lista_criterios_busqueda: list[tuple[str, str]], x
         return await asyncio.gather(*tasks)
 
 
-def formatting_results(results: list, _xpath_empty: str, _xpath_base: str, _xpath_titulo: str, _xpath_resumen: str, _xpath_enlace: str, nombre_comercial_original: str) -> list:
+async def formatting_results(results: list, profile: EngineProfile, nombre_comercial_original: str) -> list:
     """
     Procesa y formatea los resultados en HTML crudo obtenidos del scraping.
 
     Args:
         results (list): La lista de resultados crudos de `Google Search_async`.
-        _xpath_... (str): Las cadenas XPath para extraer cada parte de la información.
+        profile (EngineProfile): El perfil del motor con los XPaths precompilados.
         nombre_comercial_original (str): El nombre de la entidad buscada.
 
     Returns:
         list[dict]: Una lista de diccionarios, cada uno representando un resultado de
-                    búsqueda formateado y limpio.
+                    búsqueda formateado y limpio, sin URLs repetidas ('MatchedKeywords'
+                    tiene todas las keywords con las que se encontró).
     """
-    data_total = []
+    # Índice por URL canónica: un artículo encontrado con varias keywords se guarda una vez.
+    data_total = ResultIndex('KeyWord')
     resultados_por_keyword = dict()
     
-    for resultado, url, keyword in results:
+    # Extrae título, resumen y enlace de cada página en el executor de parseo, fuera
+    # del event loop, evaluando una sola vez cada XPath precompilado del perfil.
+    paginas = await get_parse_executor().extract_many([resultado for resultado, _, _ in results], profile.name)
+
+    for (resultado, url, keyword), informacion in zip(results, paginas):
         # Si el resultado es un diccionario, fue un error, así que lo saltamos.
         if isinstance(resultado, dict):
             continue
 
-        # Parsea el HTML crudo a un objeto lxml.
-        content_tree = etree.HTML(resultado)
-
         # Si la página no tiene resultados, continúa con el siguiente.
-        if content_tree.xpath(_xpath_empty):
+        if informacion is None:
             resultados_por_keyword[keyword] = []
             continue
-        
-        # Extrae los bloques principales de cada resultado de búsqueda.
-        informacion = extrae_informacion(content_tree, _xpath_base)
 
-        # Itera sobre cada bloque y extrae los detalles (título, resumen, enlace).
         Nueva_Data = [
             {
                 'KeyWord': keyword,
                 'Nombre o Razón Social': nombre_comercial_original,
-                'Titulo': limpiar_titulo(item.xpath(_xpath_titulo)[0].xpath('string(.)')) if item.xpath(_xpath_titulo) else '',
-                'Resumen': item.xpath(_xpath_resumen)[0].xpath('string(.)') if item.xpath(_xpath_resumen) else '',
-                'URL': item.xpath(_xpath_enlace)[0] if item.xpath(_xpath_enlace) else '',
+                'Titulo': limpiar_titulo(titulo),
+                'Resumen': resumen,
+                'URL': enlace,
                 'RequestStatus': 200,
                 'DescriptionStatus': 'Ok'
-            } for item in informacion
+            } for titulo, resumen, enlace, _fuente in informacion
         ]
         resultados_por_keyword[keyword] = Nueva_Data
     
@@ -287,10 +309,26 @@ def formatting_results(results: list, _xpath_empty: str, _xpath_base: str, _xpat
         data_total.extend(resultados_validos[:10])
     
     logging.info(f'Total amount of results in <Adverse Media>: {len(data_total)}')
-    return data_total
+    return data_total.results
 
 
-async def scraping_adverse_media(nombre_comercial: str, razon_social: str, entityIdNumber: str, gateway_instance: IpRotator):
+def build_adverse_media_response(nombre_comercial: str, razon_social: str, entityIdNumber: str, request_status: int, results: list, status: str = SEARCH_COMPLETE) -> dict:
+    """
+    Construye la respuesta de <Adverse Media> de una entidad.
+    """
+    return {
+        "entityIdNumber": entityIdNumber,
+        "name": razon_social,
+        "commercialName": nombre_comercial,
+        "requestStatus": request_status,
+        "searchStatus": status,
+        "results": results,
+        'createdOn': datetime.now(timezone.utc).isoformat(),
+        'updatedOn': datetime.now(timezone.utc).isoformat()
+    }
+
+
+async def scraping_adverse_media(nombre_comercial: str, razon_social: str, entityIdNumber: str, gateway_instance: IpRotator, scraper_service: ScraperApiService = None, deadline: Deadline = None):
     """
     Función principal para el scraping de una única entidad. Construye las consultas,
     ejecuta el scraping y empaqueta la respuesta final.
@@ -300,25 +338,25 @@ async def scraping_adverse_media(nombre_comercial: str, razon_social: str, entit
         razon_social (str): Razón social de la entidad.
         entityIdNumber (str): ID de la entidad.
         gateway_instance (IpRotator): La instancia del rotador de IP ya inicializada.
+        scraper_service (ScraperApiService, optional): Servicio compartido por el lote.
+            Si no se indica, se crea uno que usa la sesión HTTP compartida del worker.
+        deadline (Deadline, optional): Plazo de la solicitud; las consultas que no
+            responden a tiempo se descartan y la entidad queda "partial" o "timed_out".
 
     Returns:
         dict: Un diccionario con toda la información de la entidad y los resultados
               de la búsqueda. Formato:
               {
                   "entityIdNumber": str, "name": str, "commercialName": str,
-                  "requestStatus": int, "results": list[dict],
+                  "requestStatus": int, "searchStatus": str, "results": list[dict],
                   "createdOn": str_iso_date, "updatedOn": str_iso_date
               }
     """
     dict_tracker = defaultdict(request_status_counter.default_value)
     
-    # Definiciones de XPath específicas para el motor de búsqueda (Bing está activo).
-    # Las de Google y Brave están comentadas como referencia.
-    _xpath_empty = '//div[@class="no_results"]'
-    _xpath_base = '//li[@class="b_algo"]'
-    _xpath_titulo = './/h2/a'
-    _xpath_resumen = './/p[contains(@class,"b_lineclamp")]'
-    _xpath_enlace = './/h2/a/@href'
+    # XPaths precompilados del motor de búsqueda (Bing está activo; también hay
+    # perfiles de Google y Brave en `serpExtractor`).
+    _profile = get_engine_profile(BING_ENGINE)
     
     # Construye la lista de criterios de búsqueda combinando los nombres con las palabras clave.
     lista_criterios_busqueda = []
@@ -333,31 +371,29 @@ async def scraping_adverse_media(nombre_comercial: str, razon_social: str, entit
     # Elimina duplicados.
     lista_criterios_busqueda = list(set(lista_criterios_busqueda))
     
-    resultados = []
+    resultados = ResultIndex('KeyWord')
+    respondidas = 0
     try:
         # Utiliza un servicio externo para ejecutar las peticiones.
-        _scraperService = ScraperApiService()
-        resultados = await _scraperService.execute_requests(lista_criterios_busqueda)
+        _scraperService = scraper_service or ScraperApiService()
+        # Se recorren las respuestas a medida que llegan para saber cuántas consultas
+        # respondieron antes del plazo.
+        async for _, new_res in _scraperService.iter_requests(lista_criterios_busqueda, deadline=deadline):
+            resultados.extend(new_res)
+            respondidas += 1
         # Nota: El código original tenía una llamada a `Google Search_async` que ahora
         # está comentada y reemplazada por el ScraperApiService.
     except Exception as e:
         logging.error(f"An error has ocurred in <Adverse Media>: {e}")
-    
-    # Construye el objeto de respuesta final para esta entidad.
-    entityResponse = {
-        "entityIdNumber": entityIdNumber,
-        "name": razon_social,
-        "commercialName": nombre_comercial,
-        "requestStatus": 200,
-        "results": [],
-        'createdOn': datetime.now(timezone.utc).isoformat(),
-        'updatedOn': datetime.now(timezone.utc).isoformat()
-    }
+        # Un error no es un vencimiento del plazo: se responde como antes (200).
+        respondidas = len(lista_criterios_busqueda)
 
-    # Asigna los resultados obtenidos.
+    status = search_status(len(lista_criterios_busqueda), len(lista_criterios_busqueda) - respondidas)
+    # Construye el objeto de respuesta final para esta entidad.
     # Nota: La llamada a `formatting_results` está comentada, por lo que los resultados
-    # se guardan en crudo tal como los devuelve el `ScraperApiService`.
-    entityResponse['results'] = resultados
+    # se guardan tal como los devuelve el `ScraperApiService`, sin URLs repetidas.
+    entityResponse = build_adverse_media_response(nombre_comercial, razon_social, entityIdNumber,
+                                                  504 if status == SEARCH_TIMED_OUT else 200, resultados.results, status)
     
     logging.info(f'Requests status counter in <Adverse Media> from <{nombre_comercial}>: {dict_tracker}')
     logging.info(f'Successfully finishing <Adverse Media> search process for entity <{nombre_comercial}>')
@@ -7,26 +7,62 @@ from async_ip_rotator import IpRotator, ClientSession  # Librería para rotar di
 from collections.abc import Coroutine  # Para anotaciones de tipo (type hints) de corutinas.
 from types import FunctionType as function  # Para anotaciones de tipo de funciones.
 from collections import defaultdict  # Un tipo de diccionario que crea un item por defecto si una clave no existe.
+from functools import partial  # Para fijar el perfil del sitio en el método de búsqueda genérico.
+from urllib.parse import urlparse
 import os
 import requests
+from utils import request_status_counter
+from services.searchEngineDD.workScheduler import WorkScheduler  # Cola de trabajo acotada por sitio.
+from services.searchEngineDD.entityResultAccumulator import EntityResultAccumulator  # Consolidación incremental por entidad.
+from services.searchEngineDD.domainConcurrencyController import get_domain_controller
+from services.searchEngineDD.parseExecutor import get_parse_executor  # Parseo de HTML fuera del event loop.
+from services.searchEngineDD.hedgePolicy import hedge_policies  # Peticiones duplicadas entre regiones (opt-in).
+from services.searchEngineDD.newsSiteScraper import scrape_news_sites_combined, search_keyword_pages, build_search_criteria, build_site_entity_response, build_entity_response, get_news_site_profile  # Motor genérico de scraping por sitio.
+from services.searchEngineDD.serpExtractor import get_engine_profile
+from services.searchEngineDD.responseClassifier import BING_ENGINE
+from utils.constants import NEWS_SEARCH_MODE, NEWS_SEARCH_COMBINED_MODE, SCHEDULER_TIMEOUT
+from utils.deadline import Deadline, SEARCH_TIMED_OUT
+from utils.instrumentation import timed_request  # Desglose de tiempos por etapa.
 
 class AdverseMediaNewsOrchestrator:
     '''
     Esta clase orquesta la búsqueda de noticias adversas sobre entidades en múltiples sitios web de forma asíncrona.
     Utiliza un rotador de IP para realizar las peticiones HTTP y evitar bloqueos.
 
+    Las búsquedas se ejecutan con un planificador (`WorkScheduler`): una cola de items
+    por sitio atendida por un número fijo de workers, que alterna entre entidades y
+    cancela lo pendiente al vencer el plazo. Los sitios de noticias en modo por sitio
+    encolan un item por (sitio, entidad, keyword); los métodos de `add_search_method`
+    y el modo combinado, un item por (sitio, entidad).
+
+    El plazo de la solicitud (`Deadline`) llega a los scrapers; al vencer se devuelve
+    lo que ya terminó y cada entidad indica en `searchStatus` (y por sitio en
+    `siteStatuses`) si su búsqueda quedó completa, parcial o vencida.
+
+    Los resultados se consolidan por entidad a medida que termina cada sitio
+    (`EntityResultAccumulator`); `iter_search_processes` entrega cada entidad en
+    cuanto terminan todos sus sitios.
+
     Consideraciones:
     - Los métodos de búsqueda asíncronos que se añadan deben tener la misma firma (cantidad y tipo de parámetros).
-    - Se asume que se realiza una petición HTTP por cada entidad a buscar.
     '''
 
-    def __init__(self):
+    def __init__(self, mode: str = NEWS_SEARCH_MODE):
         """
         Constructor de la clase. Inicializa la lista que almacenará los métodos de búsqueda.
+
+        Args:
+            mode (str): Cómo se buscan los sitios registrados con `add_news_site`:
+                NEWS_SEARCH_PER_SITE_MODE (una consulta por sitio y keyword) o
+                NEWS_SEARCH_COMBINED_MODE (una consulta `site:a OR site:b ...` por keyword
+                cuyos resultados se reparten por sitio).
         """
-        # Esta lista contendrá tuplas, cada una con una instancia del rotador de IP,
+        # Esta lista contendrá tuplas, cada una con la URL objetivo del rotador de IP,
         # la función de búsqueda específica para un sitio, y el nombre de ese sitio.
-        self.search_methods: list[tuple[IpRotator, function, str]] = []
+        self.search_methods: list[tuple[str, function, str]] = []
+        # Sitios de noticias configurados (perfil del sitio, perfil del buscador).
+        self.news_sites: list[tuple] = []
+        self.mode = mode
 
     def add_search_method(self, site_target: str, async_search_method: function, site_name: str) -> bool:
         """
@@ -41,153 +77,201 @@ class AdverseMediaNewsOrchestrator:
             bool: True si el método se añadió correctamente, False si hubo un error.
         """
         try:
-            # Crea una instancia de IpRotator. Este objeto se encargará de crear y gestionar
-            # los endpoints en AWS API Gateway para enmascarar nuestra IP.
-            aws_access_key_id = os.environ.get("AWS_ACCESS_KEY_ID")
-            aws_secret_access_key = os.environ.get("AWS_SECRET_ACCESS_KEY")
-
-            _gateway_instance = IpRotator(
-                target=site_target,
-                aws_key_id=aws_access_key_id,
-                aws_key_secret=aws_secret_access_key,
-                regions=['us-east-1', 'us-east-2'],
-            )
-            # Añade la tupla (instancia_rotador, funcion_busqueda, nombre_sitio) a la lista.
-            self.search_methods.append((_gateway_instance, async_search_method, site_name))
+            # El gateway de IpRotator no se crea aquí: se toma del pool de gateways al
+            # ejecutar la búsqueda, reutilizando los endpoints de AWS entre invocaciones.
+            # Añade la tupla (sitio_objetivo, funcion_busqueda, nombre_sitio) a la lista.
+            self.search_methods.append((site_target, async_search_method, site_name))
         except Exception as e:
-            # Si algo falla al crear la instancia de IpRotator (ej. credenciales inválidas),
-            # se registra el error.
             logging.info(f"Requests status counter in <{site_name}> from <All Entities>: {{'500': 7}}")
             logging.error(f"An error has ocurred in <{site_name}>: {e}")
             return False
         return True
 
-    def __gather_results(self, total_results: list) -> list:
+    def add_news_site(self, site_key: str, engine: str = BING_ENGINE) -> bool:
         """
-        Método privado para consolidar los resultados de búsqueda de todas las fuentes.
-        Agrupa los resultados por entidad.
+        Registra un sitio de noticias configurado en NEWS_SITE_PROFILES usando el motor
+        genérico de scraping, sin necesidad de un módulo propio por sitio.
 
         Args:
-            total_results (list): Una lista plana con todos los resultados de todas las búsquedas.
+            site_key (str): La clave del sitio en NEWS_SITE_PROFILES (ej. "peru21").
+            engine (str): El buscador a través del cual se busca en el sitio.
 
         Returns:
-            list: Una lista de resultados consolidados, donde cada elemento corresponde a una única entidad.
-        """
-        # Se usa un defaultdict para agrupar los resultados. Si una entidad no existe en el
-        # diccionario, se crea automáticamente una entrada con la estructura definida.
-        resultados_combinados = defaultdict(lambda: {
-            'results': [],
-            'createdOn': None,
-            'updatedOn': None
-        })
-
-        # Itera sobre cada resultado individual obtenido.
-        for item in total_results:
-            # Crea una clave única para cada entidad para poder agruparlas.
-            key = (item['entityIdNumber'], item['name'], item['commercialName'])
-            # Agrega los hallazgos (noticias) a la lista de resultados de la entidad.
-            resultados_combinados[key]['results'].extend(item['results'])
-            
-            # Actualiza la fecha de creación para conservar la más antigua de todas las fuentes.
-            if resultados_combinados[key]['createdOn'] is None or item['createdOn'] < resultados_combinados[key]['createdOn']:
-                resultados_combinados[key]['createdOn'] = item['createdOn']
-            # Actualiza la fecha de actualización para conservar la más reciente.
-            if resultados_combinados[key]['updatedOn'] is None or item['updatedOn'] > resultados_combinados[key]['updatedOn']:
-                resultados_combinados[key]['updatedOn'] = item['updatedOn']
-
-        # Convierte el diccionario de resultados agrupados de nuevo a una lista con el formato final.
-        lista_fusionada = [
-            {
-                "entityIdNumber": key[0],
-                "name": key[1],
-                "commercialName": key[2],
-                "requestStatus": total_results[0]['requestStatus'],  # Asume que el estado es el mismo para todos.
-                "results": list(val['results']),  # Convierte a lista para asegurar el formato.
-                "createdOn": val['createdOn'],
-                "updatedOn": val['updatedOn']
-            }
-            for key, val in resultados_combinados.items()
+            bool: True si el sitio se añadió correctamente, False si hubo un error.
+        """
+        try:
+            site = get_news_site_profile(site_key)
+            engine_profile = get_engine_profile(engine)
+        except KeyError as e:
+            logging.error(f"Unknown news site or search engine in <Adverse Media News>: {e}")
+            return False
+        # La forma de buscarlo (sola o combinada con otros sitios) se decide al ejecutar.
+        self.news_sites.append((site, engine_profile))
+        return True
+
+    def __news_search_methods(self, deadline: Deadline) -> list:
+        """
+        En modo combinado convierte los sitios de noticias registrados en tuplas
+        (sitio_objetivo, función, nombre, nombres de los sitios), con una sola función por
+        buscador que devuelve una respuesta por sitio (en ese orden) para cada entidad. En
+        modo por sitio no hay métodos: se encolan keywords (ver `__submit_news_keywords`).
+        """
+        if self.mode != NEWS_SEARCH_COMBINED_MODE:
+            return []
+
+        sites_by_engine = defaultdict(list)
+        for site, engine in self.news_sites:
+            sites_by_engine[engine].append(site)
+        return [
+            (engine.site_target, partial(scrape_news_sites_combined, sites, engine=engine, deadline=deadline),
+             ', '.join(site.name for site in sites), [site.name for site in sites])
+            for engine, sites in sites_by_engine.items()
         ]
 
-        return lista_fusionada
+    def __collect_item(self, accumulator: EntityResultAccumulator, entities: list, response_sites: dict, keyword_groups: dict, item):
+        """
+        Agrega al acumulador el resultado de un item en cuanto termina (`on_done` del planificador).
 
-    async def __search_process(self, rotator: IpRotator, async_search_method: function, entities: list,) -> list:
+        - Items por entidad: su respuesta (o una por sitio en modo combinado) se agrega
+          directamente; si venció el plazo, la entidad figura en cada sitio como vencida.
+        - Items por keyword: cuando termina la última keyword de un (sitio, entidad) se
+          arma la respuesta del sitio con las páginas de todas sus keywords.
         """
-        Método asíncrono privado que realiza el proceso de búsqueda para un único sitio web
-        pero para una lista completa de entidades.
+        entity = entities[item.entity]
+        if item.keyword is not None:
+            group = keyword_groups[(item.site, item.entity)]
+            group['remaining'] -= 1
+            if group['remaining'] == 0:
+                paginas_por_keyword = [keyword_item.result for keyword_item in group['items']]
+                accumulator.add(entity, item.site, build_site_entity_response(group['site'], paginas_por_keyword, *entity))
+                logging.info(f"Requests status counter in <{item.site}> from <{entity[0]}>: {group['tracker']}")
+            return
 
-        Args:
-            rotator (IpRotator): La instancia del rotador de IP para este sitio.
-            async_search_method (function): La función de búsqueda específica para este sitio.
-            entities (list): La lista de entidades a buscar.
+        if isinstance(item.result, asyncio.TimeoutError):
+            logging.warning(f"Deadline reached in <{item.site}> for <{entity[0]}>")
+            for site_name in response_sites[item.site]:
+                accumulator.add(entity, site_name, build_entity_response(*entity, 504, search_status=SEARCH_TIMED_OUT))
+        elif isinstance(item.result, Exception):
+            logging.info(f"Requests status counter in <{item.site}> from <{entity[0]}>: {{'500': 7}}")
+            logging.error(f"An error has ocurred in <{item.site}>: {item.result!r}")
+            for _ in response_sites[item.site]:
+                accumulator.skip(entity)
+        elif isinstance(item.result, list):
+            # Modo combinado: una respuesta por sitio, en el orden de `response_sites`.
+            for site_name, response in zip(response_sites[item.site], item.result):
+                accumulator.add(entity, site_name, response)
+        else:
+            accumulator.add(entity, item.site, item.result)
+
+    def __submit_news_keywords(self, scheduler: WorkScheduler, entities: list) -> dict:
+        """
+        En modo por sitio encola una búsqueda por (sitio, entidad, keyword).
 
         Returns:
-            list: Una lista con los resultados de la búsqueda para este sitio.
+            dict: Por cada (sitio, entidad), su perfil, su contador de estados, sus items
+                  (en el orden de las keywords) y cuántos faltan por terminar.
+        """
+        keyword_groups = {}
+        if self.mode == NEWS_SEARCH_COMBINED_MODE:
+            return keyword_groups
+        for site, engine in self.news_sites:
+            scheduler.add_site(site.name, engine.site_target)
+            # Controlador compartido por todas las entidades y sitios que consultan el buscador.
+            limit = get_domain_controller(urlparse(engine.site_target).netloc)
+            for index, (nombre_comercial, _, _) in enumerate(entities):
+                dict_tracker = defaultdict(request_status_counter.default_value)
+                items = [
+                    scheduler.submit(site.name, index, keyword, search_keyword_pages, site, engine, keyword, criterio_busqueda, dict_tracker, limit, nombre_comercial)
+                    for keyword, criterio_busqueda in build_search_criteria(nombre_comercial)
+                ]
+                keyword_groups[(site.name, index)] = {'site': site, 'tracker': dict_tracker, 'items': items, 'remaining': len(items)}
+        return keyword_groups
+
+    def __prepare_search(self, entities: list, deadline: Deadline) -> tuple:
         """
+        Encola las búsquedas de todas las entidades y devuelve el planificador y el
+        acumulador donde se consolidan sus resultados a medida que terminan.
+        """
+        # Métodos registrados con `add_search_method` (y el modo combinado): un item por entidad.
+        search_methods = [(site_target, method, site_name, [site_name]) for site_target, method, site_name in self.search_methods]
+        search_methods += self.__news_search_methods(deadline)
+        response_sites = {site_name: site_names for _, _, site_name, site_names in search_methods}
+        keyword_groups = {}
+        site_names = [name for site_names in response_sites.values() for name in site_names]
+        if self.mode != NEWS_SEARCH_COMBINED_MODE:
+            site_names += [site.name for site, _ in self.news_sites]
+
+        accumulator = EntityResultAccumulator(entities, site_names)
+        scheduler = WorkScheduler(on_done=partial(self.__collect_item, accumulator, entities, response_sites, keyword_groups))
+        for site_target, async_search_method, site_name, _ in search_methods:
+            scheduler.add_site(site_name, site_target)
+            for index, entity in enumerate(entities):
+                scheduler.submit(site_name, index, None, async_search_method, entity[0], entity[1], entity[2])
+        keyword_groups.update(self.__submit_news_keywords(scheduler, entities))
+        # Un (sitio, entidad) sin keywords no tiene items que lo cierren: se responde ya.
+        for (site_name, index), group in keyword_groups.items():
+            if not group['items']:
+                accumulator.add(entities[index], site_name, build_site_entity_response(group['site'], [], *entities[index]))
+        return scheduler, accumulator
+
+    def __log_stats(self):
+        # Profundidad de la cola de parseo: si `max_pending` crece, faltan workers de parseo.
+        logging.info(f'Parse executor stats in <Adverse Media News>: {get_parse_executor().stats()}')
+        # Solo hay políticas si el hedging está activo (HEDGE_ENABLED).
+        for site_target, hedge_policy in hedge_policies.items():
+            logging.info(f'Hedging stats in <{site_target}>: {hedge_policy.stats()}')
+
+    async def iter_search_processes(self, entities: list, deadline: Deadline = None):
+        """
+        Versión incremental de `execute_search_processes`: produce el resultado
+        consolidado de cada entidad en cuanto terminan todos sus sitios, sin esperar a
+        las demás entidades.
+
+        Args:
+            entities (list): La lista de entidades a buscar en todas las fuentes.
+            deadline (Deadline, optional): Plazo de la solicitud; por defecto, SCHEDULER_TIMEOUT segundos.
+        """
+        deadline = deadline or Deadline(SCHEDULER_TIMEOUT)
+        scheduler, accumulator = self.__prepare_search(entities, deadline)
+
+        async def run():
+            try:
+                await scheduler.run(deadline)
+            finally:
+                # Si el planificador falla, las entidades pendientes se emiten igual.
+                accumulator.close()
+
+        task = asyncio.ensure_future(run())
         try:
-            # El contexto `async with rotator` inicia el proceso de creación de la API en AWS.
-            async with rotator as api_gateway:
-                # `ClientSession` es un objeto de aiohttp que usará la URL del `api_gateway`
-                # para enrutar todas sus peticiones a través de la IP rotada.
-                async with ClientSession(api_gateway) as sess:
-                    # Crea una lista de "tareas" asíncronas. Cada tarea es una llamada a la
-                    # función de búsqueda para una entidad específica.
-                    tasks = [async_search_method(sess, entity[0], entity[1], entity[2]) for entity in entities]
-                    # `asyncio.gather` ejecuta todas las tareas de la lista de forma concurrente.
-                    # `return_exceptions=True` evita que el proceso se detenga si una de las tareas falla.
-                    results_by_entity = await asyncio.gather(*tasks, return_exceptions=True)
-                    return results_by_entity
-        except Exception as e:
-            logging.error(f"Unexpected error in <Adverse Media News>: {e}")
-            return []
-        # El bloque `finally` (comentado) sería el lugar ideal para limpiar los recursos,
-        # como las APIs creadas en AWS, para no incurrir en costos innecesarios.
-        # finally:
-        #     if rotator:
-        #         try:
-        #             await rotator.clear_existing_apis()  # Limpia las IPs/APIs.
-        #         except Exception as cleanup_error:
-        #             logging.error(f"Error clearing IpRotator APIs: {cleanup_error}")
+            async for entity_result in accumulator:
+                yield entity_result
+            await task
+            self.__log_stats()
+        finally:
+            task.cancel()
 
-    async def execute_search_processes(self, entities: list) -> list:
+    @timed_request
+    async def execute_search_processes(self, entities: list, deadline: Deadline = None) -> list:
         """
-        El método principal para ejecutar todas las búsquedas configuradas de forma concurrente.
+        El método principal para ejecutar todas las búsquedas configuradas.
 
         Args:
             entities (list): La lista de entidades a buscar en todas las fuentes.
+            deadline (Deadline, optional): Plazo de la solicitud; por defecto, SCHEDULER_TIMEOUT
+                segundos. Al vencer se cancelan las búsquedas pendientes y se devuelve lo terminado.
 
         Returns:
-            list: La lista final de resultados, consolidados y formateados.
+            list: La lista final de resultados, consolidados por entidad en el orden de `entities`.
         """
-        total_results = []  # Lista para acumular los resultados de todos los sitios.
+        deadline = deadline or Deadline(SCHEDULER_TIMEOUT)
         try:
-            tasks = []
-            site_names = []
-            # Itera sobre cada método de búsqueda que fue registrado con `add_search_method`.
-            for rotator, async_search_method, site_name in self.search_methods:
-                # Para cada sitio, crea una tarea que consiste en buscar TODAS las entidades en ESE sitio.
-                tasks.append(self.__search_process(rotator, async_search_method, entities))
-                site_names.append(site_name)
-
-            # Ejecuta concurrentemente las tareas de búsqueda para todos los sitios.
-            # Cada elemento en `results` será la lista de resultados de un sitio completo.
-            results = await asyncio.gather(*tasks, return_exceptions=True)
-            
-            # Procesa los resultados obtenidos de cada sitio.
-            for site_name, result in zip(site_names, results):
-                # Si el resultado es una excepción, significa que la búsqueda en ese sitio falló por completo.
-                if isinstance(result, Exception):
-                    logging.info(f"Requests status counter in <{site_name}> from <All Entities>: {{'500': 7}}")
-                    logging.error(f"An error has ocurred in <{site_name}>: {result}")
-                else:
-                    # Si tuvo éxito, extiende la lista de resultados totales.
-                    total_results.extend(result)
-            
-            # Una vez que se han recopilado todos los resultados de todos los sitios,
-            # se llama al método para agruparlos y darles formato.
-            total_results_formatted = self.__gather_results(total_results)
+            # Cada sitio se consolida en el acumulador en cuanto termina (ver `__collect_item`).
+            scheduler, accumulator = self.__prepare_search(entities, deadline)
+            await scheduler.run(deadline)
+            accumulator.close()
+            self.__log_stats()
         except Exception as e:
             logging.error(f"Unexpected error in <Adverse Media News>: {e}")
             return []
 
-        return total_results_formatted
\ No newline at end of file
+        return accumulator.results()
@@ -0,0 +1,112 @@
+# -*- coding: utf-8 -*-
+
+# Importaciones necesarias para el funcionamiento del módulo.
+import asyncio
+import logging
+from utils.constants import DOMAIN_INITIAL_CONCURRENCY, DOMAIN_MIN_CONCURRENCY, DOMAIN_MAX_CONCURRENCY, DOMAIN_BACKOFF_FACTOR, DOMAIN_MIN_DELAY, DOMAIN_MAX_DELAY, DOMAIN_DELAY_STEP, REQUEST_SLEEP_TIME
+
+# Static global variable
+domain_controllers = {}
+
+
+class DomainConcurrencyController:
+    '''
+    Controla la concurrencia y la pausa entre peticiones hacia un dominio con AIMD
+    (incremento aditivo, reducción multiplicativa).
+
+    - Cada respuesta limpia sube el límite de concurrencia en 1/límite (≈ +1 por
+      ronda completa) y reduce la pausa en `delay_step` segundos.
+    - Cada bloqueo (CAPTCHA, 429, 404) multiplica el límite por `backoff_factor`
+      y duplica la pausa.
+
+    Se usa como un semáforo: `async with controller:` espera un cupo libre.
+    '''
+
+    def __init__(self, domain: str, initial_limit: float = DOMAIN_INITIAL_CONCURRENCY,
+                 min_limit: float = DOMAIN_MIN_CONCURRENCY, max_limit: float = DOMAIN_MAX_CONCURRENCY,
+                 initial_delay: float = REQUEST_SLEEP_TIME, min_delay: float = DOMAIN_MIN_DELAY,
+                 max_delay: float = DOMAIN_MAX_DELAY, backoff_factor: float = DOMAIN_BACKOFF_FACTOR,
+                 delay_step: float = DOMAIN_DELAY_STEP):
+        self.domain = domain
+        self.limit = initial_limit
+        self.min_limit = min_limit
+        self.max_limit = max_limit
+        self.delay = initial_delay
+        self.min_delay = min_delay
+        self.max_delay = max_delay
+        self.backoff_factor = backoff_factor
+        self.delay_step = delay_step
+        self.in_flight = 0
+        self._condition = None
+        self._loop = None
+        # Referencias a las tareas que despiertan a los que esperan, para que el loop
+        # (que solo guarda referencias débiles) no las recolecte antes de ejecutarse.
+        self._notify_tasks = set()
+
+    def _get_condition(self) -> asyncio.Condition:
+        # Las primitivas de asyncio quedan ligadas a su loop; se recrean si el loop cambia.
+        loop = asyncio.get_running_loop()
+        if self._condition is None or self._loop is not loop:
+            self._condition = asyncio.Condition()
+            self._loop = loop
+            self.in_flight = 0
+            self._notify_tasks = set()
+        return self._condition
+
+    async def __aenter__(self):
+        condition = self._get_condition()
+        async with condition:
+            await condition.wait_for(lambda: self.in_flight < int(self.limit))
+            self.in_flight += 1
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb):
+        condition = self._get_condition()
+        async with condition:
+            self.in_flight -= 1
+            condition.notify_all()
+
+    def record_success(self):
+        previous_limit = int(self.limit)
+        self.limit = min(self.max_limit, self.limit + 1 / self.limit)
+        self.delay = max(self.min_delay, self.delay - self.delay_step)
+        if int(self.limit) > previous_limit:
+            # El límite creció: se despierta a las tareas que esperan un cupo.
+            self._schedule_notify()
+
+    def record_block(self, reason: str):
+        self.limit = max(self.min_limit, self.limit * self.backoff_factor)
+        self.delay = min(self.max_delay, self.delay * 2)
+        logging.warning(f'<{self.domain}> backing off after {reason}: concurrency {int(self.limit)}, delay {self.delay:.2f}s')
+
+    def _schedule_notify(self):
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            loop = None
+        if self._condition is None or self._loop is None or self._loop.is_closed():
+            # Nunca se esperó un cupo en un loop vivo: no hay a quién despertar.
+            return
+        if loop is not self._loop:
+            # Llamado desde otro hilo: se programa en el loop de la condición.
+            self._loop.call_soon_threadsafe(self._schedule_notify)
+            return
+        task = loop.create_task(self._notify_waiters())
+        self._notify_tasks.add(task)
+        task.add_done_callback(self._notify_tasks.discard)
+
+    async def _notify_waiters(self):
+        condition = self._get_condition()
+        async with condition:
+            condition.notify_all()
+
+
+def get_domain_controller(domain: str) -> DomainConcurrencyController:
+    """
+    Devuelve el controlador compartido por todas las búsquedas hacia el dominio.
+    """
+    controller = domain_controllers.get(domain)
+    if controller is None:
+        controller = DomainConcurrencyController(domain)
+        domain_controllers[domain] = controller
+    return controller
@@ -0,0 +1,109 @@
+# -*- coding: utf-8 -*-
+
+# Importaciones necesarias para el funcionamiento del módulo.
+import asyncio
+from utils.deadline import SEARCH_COMPLETE, merge_search_status
+from utils.url_index import ResultIndex
+from utils.constants import STAGE_MERGE
+from utils.instrumentation import timed
+
+
+class EntityResultAccumulator:
+    '''
+    Consolida las respuestas de una solicitud por entidad a medida que termina cada
+    sitio, en lugar de juntar todas las respuestas y agruparlas al final.
+
+    - Cada entidad espera una respuesta por sitio de `site_names`; al llegar la última
+      (o al descartarse con `skip`) la entidad queda lista.
+    - Los resultados se agregan a la lista de la entidad sin copiarla y sin repetir
+      artículos: si varios sitios o keywords devuelven la misma URL canónica se
+      conserva la primera, con la unión de keywords en 'MatchedKeywords'.
+    - `results()` devuelve las entidades en el orden de la solicitud; iterando con
+      `async for` se obtiene cada entidad en cuanto sus sitios terminan.
+
+    Uso:
+        accumulator = EntityResultAccumulator(entities, ['Perú 21', 'Gestión'])
+        accumulator.add(entities[0], 'Perú 21', response)
+        async for entity_result in accumulator: ...
+    '''
+
+    def __init__(self, entities: list, site_names: list):
+        # Respuestas pendientes por entidad (nombre_comercial, razon_social, entityIdNumber).
+        self._pending = {}
+        for entity in entities:
+            key = tuple(entity)
+            self._pending[key] = self._pending.get(key, 0) + len(site_names)
+        self._entries = {}
+        self._indexes = {}
+        self._ready = asyncio.Queue()
+        self._finished = set()
+
+    @timed(STAGE_MERGE)
+    def add(self, entity: tuple, site_name: str, response: dict):
+        """
+        Agrega la respuesta de un sitio para la entidad.
+        """
+        key = tuple(entity)
+        entry = self._entries.get(key)
+        if entry is None:
+            index = self._indexes[key] = ResultIndex('Keyword')
+            entry = self._entries[key] = {
+                "entityIdNumber": response['entityIdNumber'],
+                "name": response['name'],
+                "commercialName": response['commercialName'],
+                "requestStatus": response['requestStatus'],
+                "results": index.results,
+                "searchStatus": SEARCH_COMPLETE,
+                "siteStatuses": {},
+                "createdOn": response['createdOn'],
+                "updatedOn": response['updatedOn']
+            }
+
+        self._indexes[key].extend(response['results'])
+        entry['siteStatuses'][site_name] = response.get('searchStatus', SEARCH_COMPLETE)
+        # Se conserva la fecha de creación más antigua y la de actualización más reciente.
+        entry['createdOn'] = min(entry['createdOn'], response['createdOn'])
+        entry['updatedOn'] = max(entry['updatedOn'], response['updatedOn'])
+        self._site_done(key)
+
+    def skip(self, entity: tuple):
+        """
+        Descuenta un sitio que no devolvió respuesta para la entidad (por ejemplo, por un error).
+        """
+        self._site_done(tuple(entity))
+
+    def _site_done(self, key: tuple):
+        self._pending[key] -= 1
+        if self._pending[key] <= 0:
+            self._finish(key)
+
+    def _finish(self, key: tuple):
+        if key in self._finished:
+            return
+        self._finished.add(key)
+        self._indexes.pop(key, None)
+        entry = self._entries.get(key)
+        if entry is not None:
+            entry['searchStatus'] = merge_search_status(list(entry['siteStatuses'].values()))
+        # Las entidades sin ninguna respuesta no se emiten.
+        self._ready.put_nowait(entry)
+
+    def close(self):
+        """
+        Da por terminadas las entidades que aún esperan sitios (por ejemplo, si la
+        búsqueda se interrumpió), para que la iteración no quede esperando.
+        """
+        for key in self._pending:
+            self._finish(key)
+
+    def results(self) -> list:
+        """
+        Devuelve las entidades consolidadas en el orden de la solicitud.
+        """
+        return [self._entries[key] for key in self._pending if key in self._entries]
+
+    async def __aiter__(self):
+        for _ in range(len(self._pending)):
+            entry = await self._ready.get()
+            if entry is not None:
+                yield entry
@@ -0,0 +1,81 @@
+# -*- coding: utf-8 -*-
+
+# Importaciones necesarias para el funcionamiento del módulo.
+from collections import deque
+from utils.constants import HEDGE_PERCENTILE, HEDGE_BUDGET, HEDGE_WINDOW, HEDGE_MIN_SAMPLES
+
+# Static global variable
+hedge_policies = {}
+
+
+class HedgePolicy:
+    '''
+    Política de peticiones "hedged" hacia un buscador.
+
+    Si una petición tarda más que el percentil `percentile` de las latencias recientes
+    (ventana de `window` muestras), se envía un duplicado por otra región y se usa la
+    primera respuesta válida. Los duplicados se limitan a `budget` (fracción de las
+    peticiones) para no gastar más tráfico del gateway que el presupuestado.
+
+    - `hedge_rate`: duplicados enviados / peticiones.
+    - `win_rate`: veces que el duplicado respondió primero / duplicados enviados.
+    '''
+
+    def __init__(self, percentile: float = HEDGE_PERCENTILE, budget: float = HEDGE_BUDGET,
+                 window: int = HEDGE_WINDOW, min_samples: int = HEDGE_MIN_SAMPLES):
+        self.percentile = percentile
+        self.budget = budget
+        self.min_samples = min_samples
+        self._latencies = deque(maxlen=window)
+        self.requests = 0
+        self.hedges = 0
+        self.hedge_wins = 0
+
+    def record_request(self):
+        self.requests += 1
+
+    def record_latency(self, seconds: float):
+        # Para una petición cancelada o fallida `seconds` es una cota inferior de su
+        # latencia real (censurada); se guarda igual para no sesgar el percentil a la baja.
+        self._latencies.append(seconds)
+
+    def hedge_delay(self):
+        """
+        Devuelve cuántos segundos esperar a la petición original antes de duplicarla,
+        o None si aún no hay muestras suficientes para estimar el percentil.
+        """
+        if len(self._latencies) < self.min_samples:
+            return None
+        latencies = sorted(self._latencies)
+        return latencies[min(len(latencies) - 1, int(self.percentile * len(latencies)))]
+
+    def can_hedge(self) -> bool:
+        # Solo se duplica si hay presupuesto: hedges <= budget * requests.
+        return self.hedges + 1 <= self.budget * self.requests
+
+    def record_hedge(self):
+        self.hedges += 1
+
+    def record_hedge_win(self):
+        self.hedge_wins += 1
+
+    def stats(self) -> dict:
+        return {
+            'requests': self.requests,
+            'hedges': self.hedges,
+            'hedge_rate': round(self.hedges / self.requests, 4) if self.requests else 0.0,
+            'hedge_wins': self.hedge_wins,
+            'win_rate': round(self.hedge_wins / self.hedges, 4) if self.hedges else 0.0,
+            'threshold_seconds': round(self.hedge_delay() or 0.0, 3),
+        }
+
+
+def get_hedge_policy(site_target: str) -> HedgePolicy:
+    """
+    Devuelve la política compartida de un sitio objetivo (todas sus sesiones y regiones).
+    """
+    policy = hedge_policies.get(site_target)
+    if policy is None:
+        policy = HedgePolicy()
+        hedge_policies[site_target] = policy
+    return policy
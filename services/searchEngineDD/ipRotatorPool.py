@@ -0,0 +1,202 @@
+# -*- coding: utf-8 -*-
+
+# Importaciones necesarias para el funcionamiento del módulo.
+import asyncio
+import logging
+import os
+import time
+from contextlib import asynccontextmanager
+from async_ip_rotator import IpRotator, ClientSession  # Rotador de IPs sobre AWS API Gateway.
+from utils.constants import GATEWAY_REGIONS, GATEWAY_IDLE_TTL, GATEWAY_HEALTH_CHECK_INTERVAL, GATEWAY_REAPER_INTERVAL
+
+# Static global variable
+ip_rotator_pool = None
+
+
+def default_rotator_factory(site_target: str, regions: list) -> IpRotator:
+    """
+    Crea un IpRotator para el sitio con las credenciales de AWS del entorno.
+    """
+    return IpRotator(
+        target=site_target,
+        aws_key_id=os.environ.get("AWS_ACCESS_KEY_ID"),
+        aws_key_secret=os.environ.get("AWS_SECRET_ACCESS_KEY"),
+        regions=regions,
+    )
+
+
+async def default_health_check(site_target: str, gateway) -> bool:
+    """
+    Verifica que el gateway siga respondiendo haciendo una petición al sitio objetivo.
+    """
+    async with ClientSession(gateway) as sess:
+        response = await sess.get(site_target, timeout=10)
+        return response.status < 500
+
+
+class PooledGateway:
+    """
+    Gateway ya aprovisionado que el pool mantiene vivo entre invocaciones.
+    """
+    def __init__(self, rotator, gateway):
+        self.rotator = rotator
+        self.gateway = gateway
+        self.in_use = 0
+        self.last_used = time.monotonic()
+        self.last_checked = time.monotonic()
+        # Un gateway retirado ya no se entrega y se elimina cuando deja de usarse.
+        self.retired = False
+
+
+class IpRotatorPool:
+    '''
+    Pool de gateways de IpRotator por sitio objetivo.
+
+    Aprovisionar los endpoints de API Gateway tarda varios segundos, así que el pool
+    los mantiene vivos entre invocaciones y los entrega ya iniciados. Antes de
+    reutilizar un gateway que lleva tiempo sin verificarse se ejecuta un health
+    check; los gateways sin uso durante más de `idle_ttl` segundos se eliminan en
+    segundo plano.
+
+    `rotator_factory` y `health_check` se pueden inyectar para usar un gateway
+    falso local en pruebas (ver tests/test_ip_rotator_pool.py): la fábrica debe
+    devolver un objeto que implemente `async with` y el health check una corrutina
+    que devuelva un booleano.
+
+    Las locks y las tareas del pool quedan ligadas al event loop que las creó, así
+    que se vuelven a crear si el loop cambia (como hace `get_http_session`). Los
+    gateways son recursos de AWS y se conservan.
+    '''
+
+    def __init__(self, rotator_factory=default_rotator_factory, health_check=default_health_check,
+                 idle_ttl: float = GATEWAY_IDLE_TTL, health_check_interval: float = GATEWAY_HEALTH_CHECK_INTERVAL,
+                 reaper_interval: float = GATEWAY_REAPER_INTERVAL):
+        self.rotator_factory = rotator_factory
+        self.health_check = health_check
+        self.idle_ttl = idle_ttl
+        self.health_check_interval = health_check_interval
+        self.reaper_interval = reaper_interval
+        self._gateways: dict[tuple, PooledGateway] = {}
+        self._locks: dict[tuple, asyncio.Lock] = {}
+        self._reaper = None
+        self._loop = None
+        # El loop solo guarda referencias débiles a las tareas: sin este set, la baja
+        # de un gateway retirado podría recolectarse a medio camino y dejarlo vivo.
+        self._teardown_tasks = set()
+
+    @asynccontextmanager
+    async def acquire(self, site_target: str, regions: list = None):
+        """
+        Entrega un gateway iniciado para el sitio, reutilizando uno existente si está sano.
+
+        Uso:
+            async with pool.acquire('https://www.bing.com') as gateway:
+                async with ClientSession(gateway) as sess:
+                    ...
+        """
+        self._bind_loop()
+        key = (site_target, tuple(regions or GATEWAY_REGIONS))
+        entry = await self._get_or_start(key)
+        entry.in_use += 1
+        try:
+            yield entry.gateway
+        finally:
+            entry.in_use -= 1
+            entry.last_used = time.monotonic()
+            if entry.retired and entry.in_use == 0:
+                self._schedule_teardown(site_target, entry)
+
+    def _bind_loop(self):
+        loop = asyncio.get_running_loop()
+        if self._loop is not loop:
+            self._loop = loop
+            self._locks = {}
+            self._reaper = None
+            self._teardown_tasks = set()
+
+    async def _get_or_start(self, key: tuple) -> PooledGateway:
+        lock = self._locks.setdefault(key, asyncio.Lock())
+        async with lock:
+            entry = self._gateways.get(key)
+            if entry is not None and time.monotonic() - entry.last_checked > self.health_check_interval:
+                if await self._is_healthy(key[0], entry):
+                    entry.last_checked = time.monotonic()
+                else:
+                    logging.warning(f'Gateway for <{key[0]}> failed its health check, recreating it')
+                    self._gateways.pop(key, None)
+                    entry.retired = True
+                    if entry.in_use == 0:
+                        self._schedule_teardown(key[0], entry)
+                    entry = None
+
+            if entry is None:
+                logging.info(f'Provisioning gateway for <{key[0]}> in {list(key[1])}')
+                rotator = self.rotator_factory(key[0], list(key[1]))
+                gateway = await rotator.__aenter__()
+                entry = PooledGateway(rotator, gateway)
+                self._gateways[key] = entry
+                self._ensure_reaper()
+            return entry
+
+    async def _is_healthy(self, site_target: str, entry: PooledGateway) -> bool:
+        try:
+            return await self.health_check(site_target, entry.gateway)
+        except Exception as e:
+            logging.warning(f'Health check error for gateway of <{site_target}>: {e}')
+            return False
+
+    def _schedule_teardown(self, site_target: str, entry: PooledGateway):
+        task = asyncio.create_task(self._teardown(site_target, entry))
+        self._teardown_tasks.add(task)
+        task.add_done_callback(self._teardown_tasks.discard)
+
+    async def _teardown(self, site_target: str, entry: PooledGateway):
+        try:
+            await entry.rotator.__aexit__(None, None, None)
+            logging.info(f'Gateway for <{site_target}> torn down')
+        except Exception as e:
+            logging.error(f'Error tearing down gateway for <{site_target}>: {e}')
+
+    def _ensure_reaper(self):
+        if self._reaper is None or self._reaper.done():
+            self._reaper = asyncio.create_task(self._reap_idle_gateways())
+
+    async def _reap_idle_gateways(self):
+        # Tarea en segundo plano que elimina los gateways inactivos más allá del TTL.
+        while self._gateways:
+            await asyncio.sleep(self.reaper_interval)
+            for key, entry in list(self._gateways.items()):
+                if entry.in_use > 0 or time.monotonic() - entry.last_used <= self.idle_ttl:
+                    continue
+                # Con la lock de la clave, para no eliminar un gateway que `_get_or_start`
+                # está verificando o a punto de entregar; por eso se vuelve a comprobar.
+                async with self._locks.setdefault(key, asyncio.Lock()):
+                    if self._gateways.get(key) is not entry or entry.in_use > 0 \
+                            or time.monotonic() - entry.last_used <= self.idle_ttl:
+                        continue
+                    del self._gateways[key]
+                    entry.retired = True
+                await self._teardown(key[0], entry)
+
+    async def close(self):
+        """
+        Elimina todos los gateways del pool (por ejemplo, al apagar el worker).
+        """
+        self._bind_loop()
+        if self._reaper is not None:
+            self._reaper.cancel()
+            self._reaper = None
+        entries = list(self._gateways.items())
+        self._gateways.clear()
+        await asyncio.gather(*(self._teardown(key[0], entry) for key, entry in entries))
+        # También se esperan las bajas de gateways retirados que siguen en curso.
+        if self._teardown_tasks:
+            await asyncio.gather(*list(self._teardown_tasks))
+
+
+def get_ip_rotator_pool() -> IpRotatorPool:
+    global ip_rotator_pool
+
+    if ip_rotator_pool is None:
+        ip_rotator_pool = IpRotatorPool()
+    return ip_rotator_pool
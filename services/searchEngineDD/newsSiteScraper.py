@@ -0,0 +1,494 @@
+# -*- coding: utf-8 -*-
+
+# Importaciones necesarias para el funcionamiento del módulo.
+import random
+import asyncio
+import logging
+import re
+import ssl
+from datetime import datetime, timezone
+from urllib.parse import quote, urlparse
+from collections import defaultdict
+from utils import request_status_counter
+from utils.constants import NEWS_SITE_PROFILES, NEWS_KEYWORDS_LIST, NEWS_RESULTS_PER_KEYWORD, NEWS_COMBINED_FULL_PAGE, NEWS_COMBINED_MIN_SITE_RESULTS, NEWS_MAX_PAGES, MAX_SEARCH_RESULTS, MAX_RETRIES, RETRY_DELAY, EXPONENTIAL_BACKOFF, USER_AGENTS, STAGE_FETCH
+from utils.decorators import set_random_user_agent
+from utils.http_encoding import ACCEPT_ENCODING, body_preview
+from utils.url_index import ResultIndex
+from utils.instrumentation import timed
+from utils.deadline import Deadline, SEARCH_COMPLETE, SEARCH_TIMED_OUT, search_status
+from services.searchEngineDD.domainConcurrencyController import get_domain_controller
+from services.searchEngineDD.regionFailoverSession import RegionFailoverSession
+from services.searchEngineDD.responseClassifier import BING_ENGINE, RESPONSE_EMPTY, RESPONSE_BLOCKED, RESPONSE_ERROR
+from services.searchEngineDD.serpExtractor import EngineProfile, get_engine_profile
+from services.searchEngineDD.parseExecutor import get_parse_executor
+
+# set logging to get information about API creation and deletion
+logging.basicConfig(level=logging.INFO)
+
+ssl_context = ssl.create_default_context()
+ssl_context.check_hostname = False
+ssl_context.verify_mode = ssl.CERT_NONE
+
+# Static global variable
+news_site_profiles = {}
+
+
+class NewsSiteProfile:
+    '''
+    Perfil declarativo de un sitio de noticias que se busca a través del buscador.
+
+    - `name`: nombre usado en los logs; `source`: valor del campo 'Fuente'.
+    - `domain`: dominio que debe aparecer en la atribución del resultado.
+    - `query_suffix` / `extra_params`: lo que se agrega a la consulta y a la URL de búsqueda.
+    - `excluded_url_fragments`: URLs que no son notas (etiquetas, autores, portadas...).
+    - `require_slug_hyphen`: exige un guion en la última parte de la URL.
+    '''
+
+    def __init__(self, key: str, name: str, source: str, domain: str, query_suffix: str, extra_params: str = '',
+                 excluded_url_fragments: list = None, require_slug_hyphen: bool = False):
+        self.key = key
+        self.name = name
+        self.source = source
+        self.domain = domain
+        self.query_suffix = query_suffix
+        self.extra_params = extra_params
+        self.excluded_url_fragments = excluded_url_fragments or []
+        self.require_slug_hyphen = require_slug_hyphen
+
+    def accepts_url(self, url: str) -> bool:
+        if not url or any(exclusion in url for exclusion in self.excluded_url_fragments):
+            return False
+        return not self.require_slug_hyphen or '-' in url.split('/')[-1]
+
+
+def get_news_site_profile(key: str) -> NewsSiteProfile:
+    profile = news_site_profiles.get(key)
+    if profile is None:
+        profile = NewsSiteProfile(key, **NEWS_SITE_PROFILES[key])
+        news_site_profiles[key] = profile
+    return profile
+
+
+def limpiar_titulo(titulo: str) -> str:
+    patron_enlace = r'https?://[^\s›]+'
+    titulo_limpio = re.sub(patron_enlace, '', titulo)
+    return titulo_limpio.strip()
+
+
+def clean_xpath_fuente(fuente: str) -> str:
+    if fuente:
+        if '›' in fuente:
+            return fuente.split('›', 1)[0].strip()
+        else:
+            return fuente.strip()
+    return ''
+
+
+@timed(STAGE_FETCH)
+async def consulta_pagina_web(session: RegionFailoverSession, url: str, header: dict, keyword: str, dict_tracker, limit, site_name: str) -> tuple:
+    max_retries = MAX_RETRIES
+    retry_delay = RETRY_DELAY
+
+    logging_done = False
+    for attempt in range(max_retries):
+        try:
+            async with limit:
+                # La sesión cambia de región si la ruta actual devuelve una página de bloqueo.
+                status, resp_text, classification = await session.fetch(url, headers=header, timeout=30, ssl=ssl_context)
+                if status == 404:
+                    limit.record_block(f'status {status}')
+                    logging.warning(f'For <{site_name}>: {status}: URL: {url} - Retrying in {retry_delay} seconds...')
+                    await asyncio.sleep(retry_delay)
+                    retry_delay *= EXPONENTIAL_BACKOFF
+                    continue  # Retry the request
+                if not logging_done and resp_text:
+                    logging.info(f'For <{site_name}>: Current URL in Rotative IP: {url} ({classification})')
+                    logging.info(f"Response Text (truncated): {body_preview(resp_text)}...")
+                    logging_done = True
+                if classification == RESPONSE_EMPTY and attempt <= 2:
+                    header = set_random_user_agent(header)
+                    continue
+                if classification == RESPONSE_BLOCKED:
+                    # Una página de bloqueo no es un "sin resultados": se devuelve como error.
+                    logging.warning(f'For <{site_name}>: Blocked response in every gateway region for URL: {url}')
+                    request_status_counter.agregar_o_actualizar(dict_tracker, "500")
+                    await asyncio.sleep(limit.delay)
+                    return {
+                        'status': 'Blocked',
+                        'description': 'Search engine blocked the request',
+                        'url': url,
+                        'content': None
+                    }, url, keyword
+                request_status_counter.agregar_o_actualizar(dict_tracker, str(status))
+                if classification == RESPONSE_ERROR:
+                    await asyncio.sleep(limit.delay)
+                    return {
+                        'status': 'Error',
+                        'description': f'Unexpected response status {status}',
+                        'url': url,
+                        'content': None
+                    }, url, keyword
+                limit.record_success()
+                # Pausa adaptativa: se reduce con respuestas limpias y crece ante bloqueos.
+                await asyncio.sleep(limit.delay)
+
+                return resp_text, url, keyword
+        except asyncio.TimeoutError as e:
+            return {
+                'status': 'Error',
+                'description': str(e),
+                'url': url,
+                'content': None
+            }, url, keyword
+        except Exception as e:
+            logging.error(f"For <{site_name}> Error for URL {url}: {e}")
+            return {
+                'status': 'Error',
+                'description': str(e),
+                'url': url,
+                'content': None
+            }, url, keyword
+
+    logging.error(f"For <{site_name}> Max retries reached for URL {url}. Failing the request.")
+    request_status_counter.agregar_o_actualizar(dict_tracker, "404")
+    return {
+        'status': 'Error',
+        'description': 'Max retries reached',
+        'url': url,
+        'content': None
+    }, url, keyword
+
+
+def build_search_url(site: NewsSiteProfile, engine: EngineProfile, criterio_busqueda: str) -> str:
+    query = f'{quote(criterio_busqueda, safe="+%22")}{site.query_suffix}'
+    return engine.search_url.format(query=query, num=MAX_SEARCH_RESULTS) + site.extra_params
+
+
+def build_combined_search_url(sites: list, engine: EngineProfile, criterio_busqueda: str) -> str:
+    # Una sola consulta para varios sitios: `criterio+(site:a+OR+site:b+...)`.
+    sites_filter = '+OR+'.join(f'site:{site.domain}' for site in sites)
+    query = f'{quote(criterio_busqueda, safe="+%22")}+({sites_filter})'
+    # Solo se agregan los parámetros extra que comparten todos los sitios.
+    extra_params = sites[0].extra_params if all(site.extra_params == sites[0].extra_params for site in sites) else ''
+    return engine.search_url.format(query=query, num=MAX_SEARCH_RESULTS) + extra_params
+
+
+def build_search_header(engine: EngineProfile) -> dict:
+    return {
+        "User-Agent": random.choice(USER_AGENTS),
+        "Accept": "text/html,application/xhtml+xml,application/xml;q=0.9,image/webp,image/apng,*/*;q=0.8",
+        "Accept-Encoding": ACCEPT_ENCODING,
+        "Accept-Language": "en-US,en;q=0.9",
+        "Referer": f"{engine.site_target}/",
+        "DNT": "1",  # Do Not Track request
+        "Upgrade-Insecure-Requests": "1",
+        "Connection": "keep-alive",
+    }
+
+
+def timed_out_page(url: str, keyword: str) -> tuple:
+    # Resultado de una consulta cancelada al vencer el plazo de la solicitud.
+    return {
+        'status': 'Timeout',
+        'description': 'Request deadline exceeded',
+        'url': url,
+        'content': None
+    }, url, keyword
+
+
+def is_timed_out(resultado) -> bool:
+    return isinstance(resultado, dict) and resultado.get('status') == 'Timeout'
+
+
+async def search_urls_async(busquedas: list[tuple[str, str]], engine: EngineProfile, sess: RegionFailoverSession, dict_tracker, limit, site_name: str, deadline: Deadline = None) -> list:
+    _header = build_search_header(engine)
+    tasks = [
+        consulta_pagina_web(sess, url, _header, keyword, dict_tracker, limit, site_name)
+        for keyword, url in busquedas
+    ]
+    resultados = await (deadline or Deadline()).gather(*tasks)
+    return [
+        timed_out_page(url, keyword) if isinstance(resultado, asyncio.TimeoutError) else resultado
+        for (keyword, url), resultado in zip(busquedas, resultados)
+    ]
+
+
+async def search_keyword_paginated(keyword: str, url: str, site: NewsSiteProfile, engine: EngineProfile, sess: RegionFailoverSession, header: dict, dict_tracker, limit, nombre_comercial_original: str) -> list:
+    """
+    Pide las páginas de resultados de una keyword una tras otra (`first=` en Bing) y
+    extrae cada una en cuanto llega. Deja de pedir páginas al reunir
+    NEWS_RESULTS_PER_KEYWORD resultados válidos del sitio, cuando una página no trae
+    resultados nuevos o falla, o al llegar a NEWS_MAX_PAGES páginas.
+
+    Returns:
+        list[tuple]: (resultado, url, keyword, informacion) por cada página pedida,
+                     con el mismo formato que `extract_pages`.
+    """
+    paginas = []
+    enlaces_vistos = set()
+    for page in range(NEWS_MAX_PAGES):
+        resultado, page_url, _ = await consulta_pagina_web(sess, engine.page_url(url, page), header, keyword, dict_tracker, limit, site.name)
+        if isinstance(resultado, dict):
+            paginas.append((resultado, page_url, keyword, None))
+            break
+        informacion = await get_parse_executor().extract(resultado, engine.name)
+        paginas.append((resultado, page_url, keyword, informacion))
+
+        # Pasada la última página, Bing repite la anterior en lugar de devolver una vacía.
+        enlaces = {enlace for _, _, enlace, _ in informacion or []}
+        if not enlaces - enlaces_vistos:
+            break
+        enlaces_vistos |= enlaces
+        if len(select_site_results(paginas, site, nombre_comercial_original)) >= NEWS_RESULTS_PER_KEYWORD:
+            break
+
+    logging.info(f'For <{site.name}>: {len(paginas)} result pages fetched for keyword "{keyword}"')
+    return paginas
+
+
+async def search_keyword_pages(sess: RegionFailoverSession, site: NewsSiteProfile, engine: EngineProfile, keyword: str, criterio_busqueda: str, dict_tracker, limit, nombre_comercial_original: str) -> list:
+    """
+    Busca una keyword en el sitio y extrae sus páginas de resultados: una sola página
+    o, con NEWS_MAX_PAGES > 1, las necesarias (ver `search_keyword_paginated`). Es la
+    unidad de trabajo del planificador del orquestador.
+
+    Returns:
+        list[tuple]: (resultado, url, keyword, informacion) por cada página pedida.
+    """
+    url = build_search_url(site, engine, criterio_busqueda)
+    _header = build_search_header(engine)
+    if NEWS_MAX_PAGES > 1:
+        return await search_keyword_paginated(keyword, url, site, engine, sess, _header, dict_tracker, limit, nombre_comercial_original)
+    return await extract_pages([await consulta_pagina_web(sess, url, _header, keyword, dict_tracker, limit, site.name)], engine)
+
+
+async def extract_pages(results: list, engine: EngineProfile) -> list:
+    """
+    Extrae en el executor de parseo (fuera del event loop) los resultados de cada página.
+
+    Returns:
+        list[tuple]: (resultado, url, keyword, informacion) por cada página, donde
+                     `informacion` es la salida de `serpExtractor.extract_results`.
+    """
+    informaciones = await get_parse_executor().extract_many([resultado for resultado, _, _ in results], engine.name)
+    return [(resultado, url, keyword, informacion) for (resultado, url, keyword), informacion in zip(results, informaciones)]
+
+
+def select_site_results(paginas: list, site: NewsSiteProfile, nombre_comercial_original: str) -> list:
+    """
+    Filtra y formatea los resultados del sitio a partir de páginas ya extraídas
+    (ver `extract_pages`). Las páginas de una misma keyword se acumulan en orden.
+    """
+    data_total = []
+    resultados_por_keyword = dict()
+    for resultado, url, keyword, informacion in paginas:
+
+        if isinstance(resultado, dict):
+            # Skipping bad request
+            continue
+
+        resultados_keyword = resultados_por_keyword.setdefault(keyword, [])
+        if informacion is None:
+            continue
+
+        resultados_keyword.extend([
+            {
+                'Fuente': site.source,
+                'Sitio': clean_xpath_fuente(fuente),
+                'Nombre o Razón Social': nombre_comercial_original,
+                'Titulo': limpiar_titulo(titulo),
+                'Fecha': fecha,
+                'URL': enlace,
+                'Keyword': keyword,
+                'RequestStatus': 200,
+                'DescriptionStatus': 'Ok'
+            } for titulo, fecha, enlace, fuente in informacion
+            if site.accepts_url(enlace)
+        ])
+
+    for keyword in resultados_por_keyword.keys():
+        resultados_validos = resultados_por_keyword[keyword]
+
+        if len(resultados_validos) == 0:
+            continue
+
+        # Remove results with an empty 'Titulo' and results from other domains
+        resultados_validos = [resultado for resultado in resultados_validos
+                            if (resultado['Titulo'] != ""
+                            and str(resultado['Fecha']).strip() != "We cannot provide a description for this page right now"
+                            and site.domain in resultado['Sitio'])]
+        # Un mismo resultado puede repetirse entre páginas consecutivas (también como
+        # variante AMP o con parámetros de seguimiento).
+        indice = ResultIndex('Keyword')
+        indice.extend(resultados_validos)
+        resultados_validos = indice.results
+
+        # Seleccionar los primeros resultados válidos por keyword
+        data_total.extend(resultados_validos[:NEWS_RESULTS_PER_KEYWORD])
+
+    return data_total
+
+
+def build_search_criteria(nombre_comercial: str) -> list:
+    lista_criterios_busqueda = []
+    if nombre_comercial:
+        nombre_comercial_criterio = nombre_comercial.replace(' ', '+').replace("-", "")
+        lista_criterios_busqueda += [
+            (keyword, f'{nombre_comercial_criterio}+"{keyword.replace(" ", "+")}"') for keyword in NEWS_KEYWORDS_LIST
+        ]
+    return list(set(lista_criterios_busqueda))
+
+
+async def scrape_news_site(site: NewsSiteProfile, sess: RegionFailoverSession, nombre_comercial: str, razon_social: str, entityIdNumber: str, engine: EngineProfile = None, deadline: Deadline = None) -> dict:
+    """
+    Busca noticias adversas de una entidad en un sitio de noticias a través del buscador.
+    Todos los sitios comparten esta misma tubería de consulta, clasificación y parseo, y
+    el controlador de concurrencia del dominio del buscador.
+
+    Args:
+        site (NewsSiteProfile): Perfil del sitio de noticias.
+        sess (RegionFailoverSession): Sesión hacia el buscador con failover entre regiones.
+        nombre_comercial (str): Nombre comercial de la entidad.
+        razon_social (str): Razón social de la entidad.
+        entityIdNumber (str): ID de la entidad.
+        engine (EngineProfile, optional): Perfil del buscador; por defecto, Bing.
+        deadline (Deadline, optional): Plazo de la solicitud; al vencer se devuelven las
+            keywords ya terminadas.
+
+    Returns:
+        dict: La respuesta de la entidad con los resultados encontrados en el sitio.
+    """
+    engine = engine or get_engine_profile(BING_ENGINE)
+    deadline = deadline or Deadline()
+    dict_tracker = defaultdict(request_status_counter.default_value)
+    lista_criterios_busqueda = build_search_criteria(nombre_comercial)
+    try:
+        # Controlador compartido por todas las entidades y sitios que consultan el buscador.
+        limit = get_domain_controller(urlparse(engine.site_target).netloc)
+        logging.info(f'Starting <{site.name}> search process for entity "{nombre_comercial}"')
+        paginas_por_keyword = await deadline.gather(*(
+            search_keyword_pages(sess, site, engine, keyword, criterio_busqueda, dict_tracker, limit, nombre_comercial)
+            for keyword, criterio_busqueda in lista_criterios_busqueda
+        ))
+        entityResponse = build_site_entity_response(site, paginas_por_keyword, nombre_comercial, razon_social, entityIdNumber)
+        logging.info(f'Requests status counter in <{site.name}> from <{nombre_comercial}>: {dict_tracker}')
+        logging.info(f'Successfully finishing <{site.name}> search process for entity <{nombre_comercial}>')
+        return entityResponse
+
+    except Exception as e:
+        logging.info(f"Requests status counter in <{site.name}> from <{nombre_comercial}>: {{'500': 7}}")
+        logging.error(f"An error has ocurred in <{site.name}>: {e}")
+        return build_entity_response(nombre_comercial, razon_social, entityIdNumber, 400)
+
+
+def build_site_entity_response(site: NewsSiteProfile, paginas_por_keyword: list, nombre_comercial: str, razon_social: str, entityIdNumber: str) -> dict:
+    """
+    Arma la respuesta de la entidad en el sitio a partir de las páginas de cada keyword
+    (ver `search_keyword_pages`). Las keywords que fallaron llegan como excepción y se
+    omiten; si fallaron todas, la respuesta lleva requestStatus 400 (504 si todas
+    vencieron por el plazo). `searchStatus` indica si vencieron algunas o todas.
+    """
+    paginas = []
+    errores = 0
+    vencidas = 0
+    for resultado in paginas_por_keyword:
+        if isinstance(resultado, asyncio.TimeoutError):
+            vencidas += 1
+            continue
+        if isinstance(resultado, Exception):
+            logging.error(f"An error has ocurred in <{site.name}> for <{nombre_comercial}>: {resultado!r}")
+            errores += 1
+            continue
+        paginas.extend(resultado)
+    status = search_status(len(paginas_por_keyword), vencidas)
+    if vencidas:
+        logging.warning(f'Deadline reached in <{site.name}> for <{nombre_comercial}>: {vencidas} of {len(paginas_por_keyword)} keywords without response')
+    if paginas_por_keyword and errores + vencidas == len(paginas_por_keyword):
+        return build_entity_response(nombre_comercial, razon_social, entityIdNumber, 504 if status == SEARCH_TIMED_OUT else 400, search_status=status)
+
+    data_total = select_site_results(paginas, site, nombre_comercial)
+    logging.info(f'Total amount of results in <{site.name}>: {len(data_total)}')
+    return build_entity_response(nombre_comercial, razon_social, entityIdNumber, 200, data_total, status)
+
+
+def build_entity_response(nombre_comercial: str, razon_social: str, entityIdNumber: str, request_status: int, results: list = None, search_status: str = SEARCH_COMPLETE) -> dict:
+    return {
+        "entityIdNumber": entityIdNumber,
+        "name": razon_social,
+        "commercialName": nombre_comercial,
+        "requestStatus": request_status,
+        "results": results or [],
+        "searchStatus": search_status,
+        'createdOn': datetime.now(timezone.utc).isoformat(),
+        'updatedOn': datetime.now(timezone.utc).isoformat()
+    }
+
+
+async def scrape_news_sites_combined(sites: list, sess: RegionFailoverSession, nombre_comercial: str, razon_social: str, entityIdNumber: str, engine: EngineProfile = None, deadline: Deadline = None) -> list:
+    """
+    Busca noticias adversas de una entidad en varios sitios a la vez: por cada keyword se
+    envía una sola consulta `(site:a OR site:b ...)` y los resultados se reparten por el
+    dominio de la atribución de cada resultado.
+
+    Si la página combinada viene llena (NEWS_COMBINED_FULL_PAGE resultados o más) y un
+    sitio obtiene menos de NEWS_COMBINED_MIN_SITE_RESULTS resultados, puede que otros
+    sitios lo hayan desplazado; para ese sitio y keyword se repite la consulta individual.
+
+    Si vence el plazo (`deadline`), cada sitio se arma con las consultas ya terminadas.
+
+    Returns:
+        list[dict]: Una respuesta por sitio, con el mismo formato que `scrape_news_site`.
+    """
+    engine = engine or get_engine_profile(BING_ENGINE)
+    deadline = deadline or Deadline()
+    dict_tracker = defaultdict(request_status_counter.default_value)
+    site_names = ', '.join(site.name for site in sites)
+    lista_criterios_busqueda = build_search_criteria(nombre_comercial)
+    try:
+        limit = get_domain_controller(urlparse(engine.site_target).netloc)
+        logging.info(f'Starting combined <{site_names}> search process for entity "{nombre_comercial}"')
+        busquedas = [(keyword, build_combined_search_url(sites, engine, criterio_busqueda)) for keyword, criterio_busqueda in lista_criterios_busqueda]
+        paginas = await extract_pages(await search_urls_async(busquedas, engine, sess, dict_tracker, limit, site_names, deadline), engine)
+
+        # Sitios desplazados en una página combinada llena: se consultan por separado.
+        criterios = dict(lista_criterios_busqueda)
+        fallbacks = [
+            (site, keyword)
+            for site in sites
+            for resultado, url, keyword, informacion in paginas
+            if not isinstance(resultado, dict) and informacion is not None and len(informacion) >= NEWS_COMBINED_FULL_PAGE
+            and len(select_site_results([(resultado, url, keyword, informacion)], site, nombre_comercial)) < NEWS_COMBINED_MIN_SITE_RESULTS
+        ]
+        fallback_results = await deadline.gather(*(
+            search_keyword_pages(sess, site, engine, keyword, criterios[keyword], dict_tracker, limit, nombre_comercial) for site, keyword in fallbacks
+        ))
+        fallback_pages = {}
+        fallback_timeouts = set()
+        for (site, keyword), site_keyword_paginas in zip(fallbacks, fallback_results):
+            if isinstance(site_keyword_paginas, Exception):
+                # Sin la consulta individual se conserva la página combinada.
+                logging.error(f"An error has ocurred in <{site.name}> fallback for <{nombre_comercial}>: {site_keyword_paginas!r}")
+                if isinstance(site_keyword_paginas, asyncio.TimeoutError):
+                    fallback_timeouts.add((site.key, keyword))
+                continue
+            fallback_pages[(site.key, keyword)] = site_keyword_paginas
+
+        timed_out_keywords = {keyword for resultado, _, keyword, _ in paginas if is_timed_out(resultado)}
+        entity_responses = []
+        for site in sites:
+            site_paginas = [site_pagina for pagina in paginas for site_pagina in fallback_pages.get((site.key, pagina[2]), [pagina])]
+            data_total = select_site_results(site_paginas, site, nombre_comercial)
+            logging.info(f'Total amount of results in <{site.name}>: {len(data_total)}')
+            site_timeouts = timed_out_keywords | {keyword for site_key, keyword in fallback_timeouts if site_key == site.key}
+            status = search_status(len(paginas), len(site_timeouts))
+            entity_responses.append(build_entity_response(nombre_comercial, razon_social, entityIdNumber, 504 if status == SEARCH_TIMED_OUT else 200, data_total, status))
+
+        logging.info(f'Combined search in <{site_names}> for <{nombre_comercial}>: {len(busquedas) + len(fallbacks)} requests '
+                     f'instead of {len(busquedas) * len(sites)} ({len(fallbacks)} per-site fallbacks)')
+        logging.info(f'Requests status counter in <{site_names}> from <{nombre_comercial}>: {dict_tracker}')
+        return entity_responses
+
+    except Exception as e:
+        logging.info(f"Requests status counter in <{site_names}> from <{nombre_comercial}>: {{'500': 7}}")
+        logging.error(f"An error has ocurred in combined <{site_names}> search: {e}")
+        return [build_entity_response(nombre_comercial, razon_social, entityIdNumber, 400) for _ in sites]
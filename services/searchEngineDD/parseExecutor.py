@@ -0,0 +1,91 @@
+# -*- coding: utf-8 -*-
+
+# Importaciones necesarias para el funcionamiento del módulo.
+import asyncio
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor
+from services.searchEngineDD.serpExtractor import extract_results, get_engine_profile
+from utils.constants import PARSE_EXECUTOR_THREAD, PARSE_EXECUTOR_PROCESS, PARSE_EXECUTOR_KIND, PARSE_EXECUTOR_MAX_WORKERS, STAGE_PARSE
+from utils.instrumentation import timed
+
+# Static global variable
+parse_executor = None
+
+
+def _extract_in_worker(html, engine: str):
+    # Se ejecuta en el worker: los XPath compilados no se pueden serializar, así que
+    # cada proceso usa su propio perfil registrado al importar `serpExtractor`.
+    return extract_results(html, get_engine_profile(engine))
+
+
+class ParseExecutor:
+    '''
+    Etapa de parseo fuera del event loop.
+
+    `etree.HTML` y la evaluación de XPath sobre una página de 100 resultados tardan
+    varios milisegundos; hechos dentro de la corrutina detienen todas las peticiones
+    en vuelo. Aquí el HTML crudo se envía a un pool de hilos (lxml libera el GIL al
+    parsear) o de procesos, y solo vuelven las tuplas compactas de cada resultado.
+
+    `pending` es la profundidad actual de la cola de parseo y `max_pending` el máximo
+    observado; ambos se exponen en `stats()`.
+    '''
+
+    def __init__(self, max_workers: int = PARSE_EXECUTOR_MAX_WORKERS, kind: str = PARSE_EXECUTOR_KIND):
+        self.max_workers = max_workers
+        self.kind = kind
+        if kind == PARSE_EXECUTOR_PROCESS:
+            self._executor = ProcessPoolExecutor(max_workers=max_workers)
+        else:
+            self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='serp-parse')
+        self.pending = 0
+        self.max_pending = 0
+        self.completed = 0
+        self.latency_seconds = 0.0
+
+    @timed(STAGE_PARSE)
+    async def extract(self, html, engine: str):
+        """
+        Extrae los resultados de una página en el pool (ver `serpExtractor.extract_results`).
+        """
+        self.pending += 1
+        self.max_pending = max(self.max_pending, self.pending)
+        start = time.perf_counter()
+        try:
+            return await asyncio.get_running_loop().run_in_executor(self._executor, _extract_in_worker, html, engine)
+        finally:
+            self.pending -= 1
+            self.completed += 1
+            self.latency_seconds += time.perf_counter() - start
+
+    async def extract_many(self, pages: list, engine: str) -> list:
+        """
+        Extrae varias páginas en paralelo. Las entradas que no son HTML (por ejemplo, los
+        diccionarios de error de `consulta_pagina_web`) se devuelven sin cambios, de modo
+        que la lista resultante queda alineada con `pages`.
+        """
+        async def extract_page(page):
+            if isinstance(page, (str, bytes)):
+                return await self.extract(page, engine)
+            return page
+        return await asyncio.gather(*(extract_page(page) for page in pages))
+
+    def stats(self) -> dict:
+        return {'kind': self.kind, 'workers': self.max_workers, 'pending': self.pending, 'max_pending': self.max_pending,
+                'completed': self.completed, 'latency_seconds': round(self.latency_seconds, 3)}
+
+    def shutdown(self):
+        self._executor.shutdown(wait=False)
+
+
+def get_parse_executor() -> ParseExecutor:
+    global parse_executor
+
+    if parse_executor is None:
+        # El tamaño y el tipo de pool se pueden ajustar por entorno según el plan de la Function.
+        parse_executor = ParseExecutor(
+            int(os.environ.get("PARSE_EXECUTOR_MAX_WORKERS", PARSE_EXECUTOR_MAX_WORKERS)),
+            os.environ.get("PARSE_EXECUTOR_KIND", PARSE_EXECUTOR_KIND),
+        )
+    return parse_executor
@@ -0,0 +1,243 @@
+# -*- coding: utf-8 -*-
+
+# Importaciones necesarias para el funcionamiento del módulo.
+import asyncio
+import logging
+import time
+from contextlib import AsyncExitStack
+from urllib.parse import urlparse
+from async_ip_rotator import ClientSession  # Sesión de aiohttp que enruta por el gateway.
+from services.searchEngineDD.ipRotatorPool import get_ip_rotator_pool
+from services.searchEngineDD.domainConcurrencyController import get_domain_controller
+from services.searchEngineDD.hedgePolicy import HedgePolicy, get_hedge_policy
+from services.searchEngineDD.responseClassifier import get_response_classifier, BING_ENGINE, RESPONSE_OK, RESPONSE_BLOCKED, RESPONSE_ERROR
+from utils.circuit_breaker import CircuitBreaker
+from utils.http_encoding import read_body
+from utils.validator_cache import get_validator_cache
+from utils.constants import GATEWAY_REGIONS, CIRCUIT_BREAKER_FAILURE_THRESHOLD, CIRCUIT_BREAKER_RESET_TIMEOUT, HEDGE_ENABLED
+
+# Static global variable
+circuit_breakers = {}
+
+
+def get_circuit_breaker(site_target: str, region: str) -> CircuitBreaker:
+    """
+    Devuelve el circuit breaker compartido del gateway (sitio, región).
+    """
+    key = (site_target, region)
+    breaker = circuit_breakers.get(key)
+    if breaker is None:
+        breaker = CircuitBreaker(f'{urlparse(site_target).netloc}/{region}', CIRCUIT_BREAKER_FAILURE_THRESHOLD, CIRCUIT_BREAKER_RESET_TIMEOUT)
+        circuit_breakers[key] = breaker
+    return breaker
+
+
+class RegionFailoverSession:
+    '''
+    Sesión hacia un buscador que reparte el tráfico entre gateways de IpRotator de
+    distintas regiones, cada uno protegido por su propio circuit breaker.
+
+    Cada respuesta se clasifica con el clasificador del motor. Si la ruta por una
+    región queda bloqueada (CAPTCHA, 403, 429) su circuito se abre y la petición se
+    reintenta por otra región con el circuito cerrado. Los gateways se toman del pool
+    la primera vez que se usa cada región y se devuelven al cerrar la sesión.
+
+    Las peticiones se revalidan con los ETag / Last-Modified guardados en la caché de
+    validadores: ante un 304 se reutiliza el cuerpo guardado.
+
+    Con `hedge=True` (opt-in, HEDGE_ENABLED) las peticiones que superan el percentil
+    de latencia del sitio se duplican por otra región dentro del presupuesto de la
+    política compartida del sitio (ver `hedgePolicy.HedgePolicy`).
+
+    Uso:
+        async with RegionFailoverSession('https://www.bing.com') as sess:
+            status, body, classification = await sess.fetch(url, headers=headers)
+    '''
+
+    def __init__(self, site_target: str, regions: list = None, engine: str = BING_ENGINE, hedge: bool = HEDGE_ENABLED):
+        self.site_target = site_target
+        self.hedge_policy: HedgePolicy = get_hedge_policy(site_target) if hedge else None
+        self.regions = list(regions or GATEWAY_REGIONS)
+        self.classifier = get_response_classifier(engine)
+        self.domain_controller = get_domain_controller(urlparse(site_target).netloc)
+        self._sessions = {}
+        self._locks = {region: asyncio.Lock() for region in self.regions}
+        self._stack = AsyncExitStack()
+        self._next = 0
+
+    async def __aenter__(self):
+        await self._stack.__aenter__()
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb):
+        self._sessions.clear()
+        return await self._stack.__aexit__(exc_type, exc, tb)
+
+    async def _get_session(self, region: str) -> ClientSession:
+        async with self._locks[region]:
+            session = self._sessions.get(region)
+            if session is None:
+                gateway = await self._stack.enter_async_context(get_ip_rotator_pool().acquire(self.site_target, [region]))
+                session = await self._stack.enter_async_context(ClientSession(gateway))
+                self._sessions[region] = session
+            return session
+
+    def _candidate_regions(self) -> list:
+        # Se rota la región inicial para repartir la carga entre las rutas sanas.
+        start = self._next % len(self.regions)
+        self._next += 1
+        return self.regions[start:] + self.regions[:start]
+
+    def _next_allowed_region(self, regions: list) -> tuple:
+        # Saca de `regions` la siguiente región cuyo circuito deja pasar la petición y
+        # devuelve (región, permiso del circuito), o (None, None) si no queda ninguna.
+        while regions:
+            region = regions.pop(0)
+            permit = get_circuit_breaker(self.site_target, region).allow_request()
+            if permit:
+                return region, permit
+        return None, None
+
+    async def _fetch_region(self, region: str, permit, url: str, kwargs: dict) -> tuple:
+        """
+        Realiza el GET por una región, clasifica la respuesta y actualiza su circuito.
+        Los errores de conexión se propagan después de registrarlos en el circuito.
+        """
+        breaker = get_circuit_breaker(self.site_target, region)
+        validator_cache = get_validator_cache()
+        start = time.perf_counter()
+        try:
+            session = await self._get_session(region)
+            # La conexión se devuelve al pool al salir del bloque, también si se cancela.
+            async with session.get(url, **kwargs) as response:
+                status = response.status
+                text = validator_cache.get_not_modified(url) if status == 304 else None
+                if text is not None:
+                    status = 200
+                elif status != 304:
+                    text = await read_body(response)
+            if status == 304:
+                # El cuerpo guardado salió del caché después de armar la petición
+                # condicional: se repite sin validadores para obtener la página.
+                headers = validator_cache.without_conditional_headers(kwargs.get('headers'))
+                async with session.get(url, **{**kwargs, 'headers': headers}) as response:
+                    status = response.status
+                    text = await read_body(response)
+        except asyncio.CancelledError:
+            # Petición duplicada descartada: no cuenta como fallo de la región. Si era
+            # la petición de prueba del circuito, se permite otra.
+            breaker.release_trial(permit)
+            raise
+        except asyncio.TimeoutError:
+            breaker.record_failure()
+            raise
+        except Exception as e:
+            logging.warning(f'Gateway <{breaker.name}> failed for URL {url}: {e}')
+            breaker.record_failure()
+            raise
+        finally:
+            # También se registran las peticiones canceladas (la original que pierde contra
+            # el duplicado) y las fallidas o vencidas: sin ellas el percentil solo vería las
+            # rápidas y el umbral de hedging bajaría cada vez más.
+            if self.hedge_policy is not None:
+                self.hedge_policy.record_latency(time.perf_counter() - start)
+
+        classification = self.classifier.classify(status, text)
+        if classification == RESPONSE_BLOCKED:
+            breaker.trip(f'blocked response ({status})')
+            self.domain_controller.record_block(f'blocked response in {region}')
+        elif classification == RESPONSE_ERROR:
+            # 5xx, 404 y demás errores: la región no está sirviendo la página.
+            breaker.record_failure()
+        else:
+            breaker.record_success()
+        if classification == RESPONSE_OK and response.status == 200:
+            validator_cache.store(url, response.headers, text)
+        return status, text, classification
+
+    async def _fetch_hedged(self, region: str, permit, regions: list, url: str, kwargs: dict) -> tuple:
+        """
+        Realiza el GET por `region` y, si tarda más que el umbral de la política de
+        hedging, envía un duplicado por la siguiente región disponible de `regions`.
+        Devuelve la primera respuesta no bloqueada; si ambas fallan, el resultado de
+        la petición original.
+        """
+        primary = asyncio.ensure_future(self._fetch_region(region, permit, url, kwargs))
+        hedge = None
+        try:
+            delay = self.hedge_policy.hedge_delay()
+            if delay is None:
+                return await primary
+            done, _ = await asyncio.wait({primary}, timeout=delay)
+            hedge_region, hedge_permit = self._next_allowed_region(regions) if not done and self.hedge_policy.can_hedge() else (None, None)
+            if hedge_region is None:
+                return await primary
+            self.hedge_policy.record_hedge()
+            logging.info(f'Hedging request for URL {url} through <{hedge_region}> after {delay:.2f}s')
+            hedge = asyncio.ensure_future(self._fetch_region(hedge_region, hedge_permit, url, kwargs))
+
+            pending = {primary, hedge}
+            while pending:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    if not task.exception() and task.result()[2] != RESPONSE_BLOCKED:
+                        if task is hedge:
+                            self.hedge_policy.record_hedge_win()
+                        return task.result()
+            if not hedge.exception() and primary.exception():
+                # La original falló y el duplicado quedó bloqueado: se informa el bloqueo.
+                return hedge.result()
+            return primary.result()
+        finally:
+            # La petición más lenta se descarta.
+            for task in (primary, hedge):
+                if task is not None and not task.done():
+                    task.cancel()
+
+    async def fetch(self, url: str, **kwargs) -> tuple:
+        """
+        Realiza un GET por la primera región disponible y cambia de región si la
+        respuesta está bloqueada o la conexión falla. Con hedging activo, una petición
+        lenta se duplica por otra región (ver `HedgePolicy`).
+
+        Returns:
+            tuple: (status, body, classification). `body` son los bytes UTF-8 de la
+                   página o su texto si declara otro charset (ver `read_body`). Una
+                   revalidación con 304 devuelve status 200 y el cuerpo guardado. Si
+                   ninguna región puede atender la petición, `status` y `body` son None
+                   y la clasificación es RESPONSE_BLOCKED (todas bloqueadas) o RESPONSE_ERROR.
+        """
+        outcome = (None, None, RESPONSE_ERROR)
+        last_error = None
+        kwargs['headers'] = {**(kwargs.get('headers') or {}), **get_validator_cache().conditional_headers(url)}
+        if self.hedge_policy is not None:
+            self.hedge_policy.record_request()
+
+        regions = self._candidate_regions()
+        while regions:
+            region, permit = self._next_allowed_region(regions)
+            if region is None:
+                break
+            try:
+                if self.hedge_policy is not None:
+                    status, text, classification = await self._fetch_hedged(region, permit, regions, url, kwargs)
+                else:
+                    status, text, classification = await self._fetch_region(region, permit, url, kwargs)
+            except asyncio.TimeoutError:
+                # Los timeouts se propagan: los maneja el reintento de quien llama.
+                raise
+            except Exception as e:
+                last_error = e
+                continue
+
+            if classification == RESPONSE_BLOCKED:
+                outcome = (status, text, classification)
+                continue
+            return status, text, classification
+
+        if outcome[2] != RESPONSE_BLOCKED and last_error is not None:
+            raise last_error
+        if outcome[0] is None and last_error is None:
+            # Todos los circuitos están abiertos: no se gasta tráfico en rutas quemadas.
+            outcome = (None, None, RESPONSE_BLOCKED)
+        return outcome
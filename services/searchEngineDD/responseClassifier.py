@@ -0,0 +1,130 @@
+# -*- coding: utf-8 -*-
+
+# Importaciones necesarias para el funcionamiento del módulo.
+import re
+
+# Posibles clasificaciones de una respuesta del buscador.
+RESPONSE_OK = "ok"            # Página de resultados válida.
+RESPONSE_EMPTY = "empty"      # El buscador respondió que no hay resultados.
+RESPONSE_BLOCKED = "blocked"  # CAPTCHA, página de verificación o rate limiting.
+RESPONSE_ERROR = "error"      # Cualquier otro fallo (5xx, 404, cuerpo vacío...).
+
+BING_ENGINE = "bing"
+GOOGLE_ENGINE = "google"
+BRAVE_ENGINE = "brave"
+
+# Static global variable
+response_classifiers = {}
+
+
+class ResponseClassifier:
+    '''
+    Clasifica la respuesta de un buscador en ok / empty / blocked / error a partir del
+    código HTTP y de marcadores de texto propios de cada motor.
+
+    `blocked_markers` se busca en todo el cuerpo, así que solo debe tener marcadores
+    estructurales de la página de bloqueo (rutas, ids); los textos como "One last
+    step" van en `blocked_title_markers` y solo cuentan dentro de `<title>`, porque
+    el título o el resumen de una noticia también pueden contenerlos.
+
+    Una página de bloqueo no debe llegar a `formatting_results`: al parsearla no se
+    encuentra ningún resultado y se confunde con una entidad sin noticias adversas.
+    '''
+
+    def __init__(self, blocked_markers: list, empty_markers: list, blocked_statuses: tuple = (403, 429), blocked_title_markers: list = None):
+        self.blocked_markers = blocked_markers
+        self.blocked_title_markers = blocked_title_markers or []
+        self.empty_markers = empty_markers
+        self.blocked_statuses = blocked_statuses
+        # Un único patrón por tipo de marcador: el HTML se recorre una sola vez. Se
+        # compila también en bytes para clasificar el cuerpo UTF-8 sin decodificarlo.
+        self._patterns = {
+            kind: (_compile_markers(blocked_markers, kind, self.blocked_title_markers), _compile_markers(empty_markers, kind))
+            for kind in (str, bytes)
+        }
+
+    def classify(self, status: int, text) -> str:
+        if status in self.blocked_statuses:
+            return RESPONSE_BLOCKED
+        if status != 200 or not text:
+            return RESPONSE_ERROR
+        blocked_pattern, empty_pattern = self._patterns[bytes if isinstance(text, bytes) else str]
+        if blocked_pattern is not None and blocked_pattern.search(text):
+            return RESPONSE_BLOCKED
+        if empty_pattern is not None and empty_pattern.search(text):
+            return RESPONSE_EMPTY
+        return RESPONSE_OK
+
+
+def _compile_markers(markers: list, kind: type = str, title_markers: list = None):
+    alternatives = [re.escape(marker) for marker in markers]
+    if title_markers:
+        # Texto dentro del <title> de la página (sin cruzar otras etiquetas).
+        alternatives.append('<title[^>]*>[^<]*(?:' + '|'.join(re.escape(marker) for marker in title_markers) + ')')
+    if not alternatives:
+        return None
+    pattern = '|'.join(alternatives)
+    return re.compile(pattern.encode('utf-8') if kind is bytes else pattern)
+
+
+def register_response_classifier(engine: str, classifier: ResponseClassifier):
+    """
+    Registra (o reemplaza) el clasificador de un motor de búsqueda.
+    """
+    response_classifiers[engine] = classifier
+
+
+def get_response_classifier(engine: str = BING_ENGINE) -> ResponseClassifier:
+    return response_classifiers[engine]
+
+
+# Marcadores estructurales de la página de verificación de Google; también se revisan
+# en Bing porque el gateway puede terminar redirigido a ella.
+_GOOGLE_BLOCK_PAGE_MARKERS = [
+    'Please click <a href="/httpservice/retry/enablejs?',
+    'id="captcha-form"',
+    'action="/sorry/index"',
+]
+
+# Textos de bloqueo de Google, sobre sus propias páginas.
+_GOOGLE_BLOCKED_MARKERS = [
+    "Our systems have detected unusual traffic",
+    'Please click <a href="/httpservice/retry/enablejs?',
+    "If you're having trouble accessing Google Search",
+    "Please verify you are a human",
+    "To continue, please enter the characters you see below",
+]
+
+register_response_classifier(BING_ENGINE, ResponseClassifier(
+    # En Bing los textos pueden aparecer en los resultados orgánicos: solo marcadores
+    # estructurales y, para el texto, el título de la página de verificación.
+    blocked_markers=_GOOGLE_BLOCK_PAGE_MARKERS + [
+        "/turing/captcha/challenge",
+        'id="b_captcha"',
+    ],
+    blocked_title_markers=[
+        "One last step",
+        "Please verify you are a human",
+    ],
+    empty_markers=[
+        'class="no_results"',
+        "No hay resultados para",
+        "There are no results for",
+        "Check your spelling or try different keywords",
+    ],
+))
+
+register_response_classifier(GOOGLE_ENGINE, ResponseClassifier(
+    blocked_markers=_GOOGLE_BLOCKED_MARKERS,
+    empty_markers=[
+        "did not match any documents",
+        "No results found for",
+    ],
+))
+
+register_response_classifier(BRAVE_ENGINE, ResponseClassifier(
+    blocked_markers=_GOOGLE_BLOCKED_MARKERS,
+    empty_markers=[
+        "Not many great matches came back for your search",
+    ],
+))
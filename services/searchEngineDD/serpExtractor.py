@@ -0,0 +1,135 @@
+# -*- coding: utf-8 -*-
+
+# Importaciones necesarias para el funcionamiento del módulo.
+import threading
+from lxml import etree  # Parseo de HTML y evaluación de XPath.
+from services.searchEngineDD.responseClassifier import BING_ENGINE, GOOGLE_ENGINE, BRAVE_ENGINE
+
+# Static global variable
+engine_profiles = {}
+# Los parsers de lxml no se comparten entre hilos: uno por hilo del executor de parseo.
+html_parsers = threading.local()
+
+
+class EngineProfile:
+    '''
+    Perfil de un motor de búsqueda: URL de búsqueda y XPaths de la página de
+    resultados, compilados una sola vez.
+
+    Cada campo se compila como `string((<xpath>)[1])`, de modo que por cada resultado
+    se evalúa una única expresión por campo que devuelve directamente el texto del
+    primer nodo (o '' si no hay ninguno), en lugar de evaluar el XPath en la
+    condición, otra vez para tomar `[0]` y otra más para `string(.)`.
+    '''
+
+    def __init__(self, name: str, site_target: str, search_url: str, empty: str, base: str, title: str, link: str, snippet: str, source: str,
+                 page_param: str = '', page_size: int = 10, first_result: int = 0):
+        self.name = name
+        # Sitio del rotador de IPs y plantilla de búsqueda con `{query}` y `{num}`.
+        self.site_target = site_target
+        self.search_url = search_url
+        # Paginación: parámetro con `{offset}` (posición del primer resultado) o `{page}`,
+        # resultados por página y posición del primer resultado de la primera página.
+        self.page_param = page_param
+        self.page_size = page_size
+        self.first_result = first_result
+        # Se conservan las cadenas originales como referencia (y para los logs).
+        self.xpaths = {'empty': empty, 'base': base, 'title': title, 'link': link, 'snippet': snippet, 'source': source}
+        self.empty = etree.XPath(f'boolean({empty})')
+        self.base = etree.XPath(base)
+        self.title = etree.XPath(f'string(({title})[1])')
+        self.link = etree.XPath(f'string(({link})[1])')
+        self.snippet = etree.XPath(f'string(({snippet})[1])')
+        self.source = etree.XPath(f'string(({source})[1])')
+
+    def page_url(self, search_url: str, page: int) -> str:
+        """
+        Devuelve la URL de la página `page` (desde 0) de una búsqueda.
+        """
+        if page == 0 or not self.page_param:
+            return search_url
+        return search_url + self.page_param.format(offset=self.first_result + page * self.page_size, page=page)
+
+
+def register_engine_profile(profile: EngineProfile):
+    engine_profiles[profile.name] = profile
+
+
+def get_engine_profile(engine: str = BING_ENGINE) -> EngineProfile:
+    return engine_profiles[engine]
+
+
+def get_utf8_html_parser() -> etree.HTMLParser:
+    parser = getattr(html_parsers, 'utf8', None)
+    if parser is None:
+        parser = etree.HTMLParser(encoding='utf-8')
+        html_parsers.utf8 = parser
+    return parser
+
+
+def extract_results(html, profile: EngineProfile):
+    """
+    Extrae los resultados de una página de resultados con los XPaths compilados del perfil.
+
+    Args:
+        html (str | bytes): El HTML crudo de la página; los bytes se parsean como UTF-8
+                            (ver `utils.http_encoding.read_body`).
+        profile (EngineProfile): El perfil del motor que generó la página.
+
+    Returns:
+        list | None: Una lista de tuplas (title, snippet, link, source) con los textos
+                     sin procesar, o None si el buscador indicó que no hay resultados.
+    """
+    if not html:
+        return []
+    content_tree = etree.HTML(html, get_utf8_html_parser()) if isinstance(html, bytes) else etree.HTML(html)
+    if content_tree is None:
+        return []
+    if profile.empty(content_tree):
+        return None
+    return [
+        (profile.title(item), profile.snippet(item), profile.link(item), profile.source(item))
+        for item in profile.base(content_tree)
+    ]
+
+
+register_engine_profile(EngineProfile(
+    BING_ENGINE,
+    site_target='https://www.bing.com',
+    search_url='https://www.bing.com/search?q={query}&num={num}&tbs=cd_min:01/01/2019&hl=es',
+    empty='//div[@class="no_results"]',
+    base='//li[@class="b_algo"]',
+    title='.//h2/a',
+    link='.//h2/a/@href',
+    snippet='.//p[contains(@class, "b_lineclamp")]',
+    source='.//div[@class="b_attribution"]/cite',
+    # Bing ignora `num` y devuelve unos 10 resultados por página; `first` empieza en 1.
+    page_param='&first={offset}',
+    first_result=1,
+))
+
+register_engine_profile(EngineProfile(
+    GOOGLE_ENGINE,
+    site_target='https://www.google.com',
+    search_url='https://www.google.com/search?q={query}&num={num}&tbs=cd_min:01/01/2019&hl=es',
+    empty='//div[contains(text(), "No results found for:")]',
+    base='//div[@class="N54PNb BToiNc"]',
+    title='.//h3[@class="LC20lb MBeuO DKV0Md"]',
+    link='.//a[@jsname="UWckNb"]/@href',
+    snippet='.//span[@class="LEwnzc Sqrs4e"]/span',
+    source='.//span[@class="VuuXrf"]',
+    page_param='&start={offset}',
+))
+
+register_engine_profile(EngineProfile(
+    BRAVE_ENGINE,
+    site_target='https://search.brave.com',
+    search_url='https://search.brave.com/search?q={query}',
+    empty='//span[contains(text(), "Not many great matches came back for your search:")]',
+    base='//div[contains(@class,"svelte-n9nog2")]',
+    title='.//div[contains(@class, "title")]',
+    link='.//a/@href',
+    snippet='.//div[contains(@class, "snippet-content")]/div[contains(@class, "snippet-description")]',
+    source='.//cite/span[contains(@class, "netloc")]',
+    page_param='&offset={page}',
+))
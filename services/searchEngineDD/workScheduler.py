@@ -0,0 +1,131 @@
+# -*- coding: utf-8 -*-
+
+# Importaciones necesarias para el funcionamiento del módulo.
+import asyncio
+import logging
+from collections import deque
+from itertools import zip_longest
+from services.searchEngineDD.regionFailoverSession import RegionFailoverSession
+from utils.constants import SCHEDULER_WORKERS_PER_SITE, DEADLINE_GRACE
+from utils.deadline import Deadline
+
+
+class WorkItem:
+    '''
+    Unidad de trabajo del planificador: una búsqueda de `keyword` (o de la entidad
+    completa si es None) para la entidad `entity` en el sitio `site`.
+
+    La corrutina se crea recién cuando un worker toma el item (`job(sess, *args)`),
+    así que encolar miles de items no crea miles de corrutinas.
+    '''
+    __slots__ = ('site', 'entity', 'keyword', 'job', 'args', 'result', 'done')
+
+    def __init__(self, site: str, entity: int, keyword: str, job, args: tuple):
+        self.site = site
+        self.entity = entity
+        self.keyword = keyword
+        self.job = job
+        self.args = args
+        # Resultado del job, la excepción que lanzó o TimeoutError si venció el plazo.
+        self.result = None
+        self.done = False
+
+
+class WorkScheduler:
+    '''
+    Planificador con una cola de items por sitio y un número fijo de workers por
+    sitio que comparten la sesión del sitio.
+
+    - Cota global: como mucho `workers_per_site` peticiones en vuelo por sitio,
+      sin importar cuántas entidades y keywords traiga la solicitud.
+    - Equidad: la cola de cada sitio alterna entre entidades (keyword 1 de cada
+      entidad, luego keyword 2...), de modo que ninguna entidad espera a que
+      terminen todas las anteriores.
+    - Plazo: al vencer el `Deadline` de la solicitud los workers dejan de tomar items
+      y, pasados DEADLINE_GRACE segundos (para que los jobs que respetan el
+      plazo devuelvan lo que ya tienen), se cancelan. Los items sin terminar quedan
+      con asyncio.TimeoutError como resultado.
+    - Resultados incrementales: `on_done(item)` se llama en cuanto cada item termina
+      (incluidos los que quedan con error o vencidos), sin esperar al resto.
+
+    Uso:
+        scheduler = WorkScheduler()
+        scheduler.add_site('Perú 21', 'https://www.bing.com')
+        scheduler.submit('Perú 21', 0, 'denuncia', job, *args)
+        items = await scheduler.run(Deadline(180))
+    '''
+
+    def __init__(self, workers_per_site: int = SCHEDULER_WORKERS_PER_SITE, on_done=None):
+        self.workers_per_site = workers_per_site
+        self.on_done = on_done
+        self._site_targets = {}
+        self._items = {}
+        self._deadline = Deadline()
+
+    def add_site(self, site: str, site_target: str):
+        self._site_targets[site] = site_target
+        self._items.setdefault(site, {})
+
+    def submit(self, site: str, entity: int, keyword: str, job, *args) -> WorkItem:
+        item = WorkItem(site, entity, keyword, job, args)
+        self._items[site].setdefault(entity, []).append(item)
+        return item
+
+    def _site_queue(self, site: str) -> deque:
+        # Round-robin entre entidades: se intercalan los items de cada una.
+        rounds = zip_longest(*self._items[site].values())
+        return deque(item for batch in rounds for item in batch if item is not None)
+
+    async def _worker(self, queue: deque, sess: RegionFailoverSession):
+        while queue and not self._deadline.expired():
+            item = queue.popleft()
+            try:
+                item.result = await item.job(sess, *item.args)
+            except Exception as e:
+                item.result = e
+            self._item_done(item)
+
+    def _item_done(self, item: WorkItem):
+        item.done = True
+        if self.on_done is not None:
+            self.on_done(item)
+
+    async def _run_site(self, site: str):
+        queue = self._site_queue(site)
+        if not queue:
+            return
+        # Una sesión por sitio, compartida por sus workers; los gateways salen del pool.
+        async with RegionFailoverSession(self._site_targets[site]) as sess:
+            workers = [self._worker(queue, sess) for _ in range(min(self.workers_per_site, len(queue)))]
+            await asyncio.gather(*workers)
+
+    async def run(self, deadline: Deadline = None) -> list:
+        """
+        Ejecuta todos los items encolados y los devuelve con su resultado.
+        """
+        self._deadline = deadline or Deadline()
+        remaining = self._deadline.remaining()
+        tasks = {asyncio.ensure_future(self._run_site(site)): site for site in self._site_targets}
+        if tasks:
+            done, pending = await asyncio.wait(tasks, timeout=None if remaining is None else remaining + DEADLINE_GRACE)
+            for task in pending:
+                logging.warning(f'Deadline reached in <{tasks[task]}>: cancelling pending searches')
+                task.cancel()
+            await asyncio.gather(*pending, return_exceptions=True)
+            for task in done:
+                if task.exception() is not None:
+                    # Falló el sitio completo (por ejemplo, al obtener su gateway).
+                    logging.error(f'An error has ocurred in <{tasks[task]}>: {task.exception()}')
+                    self._finish_site(tasks[task], task.exception())
+
+        for site in self._items:
+            self._finish_site(site, asyncio.TimeoutError('Request deadline exceeded'))
+        return [item for entities in self._items.values() for entity_items in entities.values() for item in entity_items]
+
+    def _finish_site(self, site: str, error: Exception):
+        # Los items del sitio que no llegaron a terminar quedan con `error` como resultado.
+        for entity_items in self._items[site].values():
+            for item in entity_items:
+                if not item.done:
+                    item.result = error
+                    self._item_done(item)
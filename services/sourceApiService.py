@@ -12,8 +12,8 @@ from db_utils.bus_connection import get_service_bus_client, enqueue_service_bus_
 from services.adverseMediaService import generate_entity_keywords
 from utils.match_closest_string import match_closest_string
 from utils.normalize_string import normalize_string, normalize_string_special_chars
-from utils.constants import JURIDICAL_PERSON, NATURAL_PERSON, ENTITY_TYPE_ORG, SOURCE_CODE_GAFI, SOURCE_CODE_GAFI, GAFI_COUNTRIES, SOURCECODE_ADVERSE_MEDIA
-from utils.decorators import log_execution_time
+from utils.constants import JURIDICAL_PERSON, NATURAL_PERSON, ENTITY_TYPE_ORG, SOURCE_CODE_GAFI, SOURCE_CODE_GAFI, GAFI_COUNTRIES, SOURCECODE_ADVERSE_MEDIA, STAGE_REQUEST_BODY, STAGE_DB_LOOKUP, STAGE_ENTITY_MATCH, STAGE_ENTITY_SCORE, STAGE_MERGE, STAGE_ENQUEUE
+from utils.instrumentation import timed, timing_request
 from repositories.entityRepository import EntityRepository
 from repositories.resultRepository import ResultRepository
 from repositories.sourceRepository import SourceRepository
@@ -23,7 +23,22 @@ class SourceApiService:
     __entity_repository = EntityRepository()
     __result_repository = ResultRepository()
 
-    @log_execution_time
+    def timingRequest (self, req) :
+        """
+        Abre la medición por etapas de la solicitud (ver `utils.instrumentation.timing_request`).
+        El flujo es una secuencia de llamadas síncronas que hace la Function HTTP (fuera de
+        este repositorio), así que es ella quien debe envolver todas las llamadas al servicio
+        con este contexto: sin él, las etapas de SourceApiService y de los repositorios no
+        registran nada.
+
+        Uso (en la Function):
+            with source_service.timingRequest(req):
+                message, headers, entity_request = source_service.retrieveBodyMessageReq(req)
+                ...
+        """
+        return timing_request(request_id=req.headers.get('apiRequestManagerId') or None)
+
+    @timed(STAGE_REQUEST_BODY)
     def retrieveBodyMessageReq (self, req) :
         logging.info(f"JSON Deserealization for HTTPRequest, DB Connection and SourceCodes retrieve process\n")
 
@@ -42,7 +57,7 @@ class SourceApiService:
             
         return "", headers, entity_request
     
-    @log_execution_time
+    @timed(STAGE_DB_LOOKUP)
     def obtainCurrentResults (self, entity_req: EntityRequest) :
         try:
             sourceDocs, has_non_sources = SourceApiService.__source_repository.validate_source_codes_by_request(entity_req)
@@ -55,7 +70,6 @@ class SourceApiService:
         except Exception as e:
             raise "Error during database consult."
         
-    @log_execution_time
     def findCurrentEntity (self, entityDocs, entity):
         try:
             item = self.findEntityLocally(entityDocs, entity)
@@ -64,7 +78,7 @@ class SourceApiService:
             logging.error(f"Error during result finding: {e}")
             return None
     
-    @log_execution_time
+    @timed(STAGE_ENTITY_SCORE)
     def calculateScore (self, entity, search_entity):
         score = 0
         
@@ -95,7 +109,7 @@ class SourceApiService:
 
         return score
 
-    @log_execution_time
+    @timed(STAGE_ENTITY_MATCH)
     def findEntityLocally (self, entity_list, search_entity):
         print(f"Trying to find a match for the entity in the database.\n")
 
@@ -120,7 +134,6 @@ class SourceApiService:
         
         return scored_entities[0][0]
 
-    @log_execution_time
     def evaluateCurrentEntityValues (self, entity: EntityRequest, found_entity: Entity):
         logging.info(f"Evaluating the current Entity to update it's values if needed. {found_entity.id}\n")
         hasChange = False
@@ -158,7 +171,7 @@ class SourceApiService:
                 logging.error(f'Error saving entity to Cosmos DB: {str(e)}')
                 raise Exception("Could not save the entity to Cosmos DB.")
 
-    @log_execution_time
+    @timed(STAGE_MERGE)
     def retrieveMatchesFromResults (self, entity: EntityRequest, found_entity: Entity, source_codes: list):
         result_ids_to_query = [] 
         source_codes_not_found = []
@@ -210,7 +223,7 @@ class SourceApiService:
 
         return field_keyword
        
-    @log_execution_time         
+    @timed(STAGE_ENQUEUE)
     def sendNoMatchesToServiceBus(self, check_sources_list, found_entity: Entity, source_codes_not_found, service_bus, source_list, original_entityType, original_entityRelation, entity, headers):
         logging.info("Some sources were not found. Initialized the process of webscrapping for these process.\n")
         
@@ -271,7 +284,7 @@ class SourceApiService:
             logging.error(f'Error sending message to Service Bus: {str(e)}')
             raise Exception("Could not send message.")
 
-    @log_execution_time
+    @timed(STAGE_MERGE)
     def queryForEachMatch(self, original_entity, original_entityRelation, result_ids_to_query, result_list, result, source_codes_not_found):
         logging.info("Initialized the process of finding the results with the corresponding resultId.\n")
         
@@ -331,6 +344,7 @@ class SourceApiService:
             raise Exception("An internal server error ocurred during entity evaluation")
         return Entity.from_dict(response)
     
+    @timed(STAGE_ENQUEUE)
     def sendNewEntityToServiceBus(self, new_entity, sourceDocs, check_sources_list, headers, service_bus):
         new_entity_id = new_entity.id
         listSources = ""
@@ -380,6 +394,7 @@ class SourceApiService:
         
         logging.info(f'Send to Service Bus all sources for the new provided Entity ({new_entity_id} - {new_entity.entityIdNumber})\n {listSources}')
 
+    @timed(STAGE_ENQUEUE)
     def sendAdverseMediaToServiceBus(self, original, found, new, service_bus, headers):
         logging.info("Starting adverse media message enqueue process for a single entity")
         messages = []
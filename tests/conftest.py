@@ -0,0 +1,5 @@
+import os
+import sys
+
+# Las pruebas importan los módulos desde la raíz del proyecto (services, utils...).
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
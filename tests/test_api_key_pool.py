@@ -0,0 +1,61 @@
+import pytest
+
+from utils import api_key_pool
+from utils.api_key_pool import ApiKeyPool
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(api_key_pool.time, 'monotonic', lambda: now[0])
+    return now
+
+
+def make_pool():
+    return ApiKeyPool(['key-a', ' key-b ', '', None, 'key-c'], exhausted_cooldown=3600, throttled_cooldown=60)
+
+
+def test_ignores_blank_keys_and_rotates_round_robin(clock):
+    pool = make_pool()
+    assert pool.keys == ['key-a', 'key-b', 'key-c']
+    assert [pool.acquire() for _ in range(4)] == ['key-a', 'key-b', 'key-c', 'key-a']
+
+
+def test_acquire_skips_excluded_keys(clock):
+    pool = make_pool()
+    assert pool.acquire(exclude={'key-a'}) == 'key-b'
+    assert pool.acquire(exclude={'key-a', 'key-b', 'key-c'}) is None
+
+
+def test_throttled_key_returns_after_cooldown(clock):
+    pool = make_pool()
+    pool.report('key-a', 429)
+    assert pool.healthy_keys() == ['key-b', 'key-c']
+    assert pool.throttled_keys() == ['key-a']
+
+    clock[0] += 61
+    assert pool.healthy_keys() == ['key-a', 'key-b', 'key-c']
+    assert pool.throttled_keys() == []
+
+
+def test_exhausted_key_is_not_throttled_and_recovers_with_credits(clock):
+    pool = make_pool()
+    pool.report('key-b', 403)
+    assert 'key-b' not in pool.healthy_keys()
+    assert pool.throttled_keys() == []
+
+    pool.update_credits('key-b', 500)
+    assert 'key-b' in pool.healthy_keys()
+
+
+def test_successful_requests_spend_known_credits(clock):
+    pool = make_pool()
+    pool.report('key-a', 200, cost=10)
+    assert pool.remaining_credits()['key-a'] is None
+
+    pool.update_credits('key-a', 15)
+    pool.report('key-a', 200, cost=10)
+    assert pool.remaining_credits()['key-a'] == 5
+    pool.report('key-a', 200, cost=10)
+    assert not pool.is_healthy('key-a')
+    assert pool.acquire(exclude={'key-b', 'key-c'}) is None
@@ -0,0 +1,89 @@
+import pytest
+
+from utils import circuit_breaker
+from utils.circuit_breaker import CircuitBreaker, CIRCUIT_CLOSED, CIRCUIT_OPEN, CIRCUIT_HALF_OPEN
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(circuit_breaker.time, 'monotonic', lambda: now[0])
+    return now
+
+
+def make_breaker():
+    return CircuitBreaker('site/us-east-1', failure_threshold=3, reset_timeout=30)
+
+
+def open_and_wait(breaker, clock):
+    breaker.trip('blocked response (429)')
+    clock[0] += 31
+
+
+def test_opens_after_consecutive_failures(clock):
+    breaker = make_breaker()
+    breaker.record_failure()
+    breaker.record_failure()
+    breaker.record_success()
+    breaker.record_failure()
+    breaker.record_failure()
+    assert breaker.state == CIRCUIT_CLOSED
+    breaker.record_failure()
+    assert breaker.state == CIRCUIT_OPEN
+    assert breaker.allow_request() is None
+
+
+def test_half_open_allows_a_single_trial(clock):
+    breaker = make_breaker()
+    breaker.trip('blocked response (429)')
+    clock[0] += 29
+    assert breaker.allow_request() is None
+
+    clock[0] += 2
+    permit = breaker.allow_request()
+    assert permit
+    assert breaker.state == CIRCUIT_HALF_OPEN
+    assert breaker.allow_request() is None
+
+
+def test_trial_success_closes_and_failure_reopens(clock):
+    breaker = make_breaker()
+    open_and_wait(breaker, clock)
+    breaker.allow_request()
+    breaker.record_success()
+    assert breaker.state == CIRCUIT_CLOSED
+    assert breaker.allow_request() is True
+
+    open_and_wait(breaker, clock)
+    breaker.allow_request()
+    breaker.record_failure()
+    assert breaker.state == CIRCUIT_OPEN
+
+
+def test_only_the_trial_holder_releases_it(clock):
+    breaker = make_breaker()
+    open_and_wait(breaker, clock)
+    permit = breaker.allow_request()
+
+    # Un permiso normal o uno de una prueba anterior no libera la prueba en curso.
+    breaker.release_trial(True)
+    breaker.release_trial(object())
+    breaker.release_trial(None)
+    assert breaker.allow_request() is None
+
+    breaker.release_trial(permit)
+    assert breaker.allow_request()
+
+
+def test_stale_permit_does_not_release_a_new_trial(clock):
+    breaker = make_breaker()
+    open_and_wait(breaker, clock)
+    stale = breaker.allow_request()
+    breaker.record_failure()
+    clock[0] += 31
+    current = breaker.allow_request()
+
+    breaker.release_trial(stale)
+    assert breaker.allow_request() is None
+    breaker.release_trial(current)
+    assert breaker.allow_request()
@@ -0,0 +1,91 @@
+import asyncio
+
+import pytest
+
+from utils.deadline import Deadline, SEARCH_COMPLETE, SEARCH_PARTIAL, SEARCH_TIMED_OUT, search_status, merge_search_status
+
+
+def test_without_seconds_there_is_no_deadline():
+    deadline = Deadline()
+    assert deadline.remaining() is None
+    assert not deadline.expired()
+    assert deadline.timeout(30) == 30
+
+
+def test_timeout_is_capped_by_the_remaining_time():
+    deadline = Deadline(5)
+    assert deadline.timeout(30) <= 5
+    assert deadline.timeout(1) == 1
+    assert Deadline(0).expired()
+    assert Deadline(-1).remaining() == 0.0
+
+
+def test_gather_cancels_tasks_that_miss_the_deadline():
+    async def scenario():
+        async def answer(value, delay):
+            await asyncio.sleep(delay)
+            return value
+
+        async def fail():
+            raise ValueError('boom')
+
+        return await Deadline(0.05).gather(answer('fast', 0), answer('slow', 5), fail())
+
+    fast, slow, failed = asyncio.run(scenario())
+    assert fast == 'fast'
+    assert isinstance(slow, asyncio.TimeoutError)
+    assert isinstance(failed, ValueError)
+
+
+def test_gather_grace_lets_tasks_that_honour_the_deadline_return_partial_results():
+    async def scenario():
+        deadline = Deadline(0.05)
+
+        async def partial():
+            # Respeta el mismo plazo y devuelve lo que alcanzó a reunir.
+            await asyncio.sleep(deadline.remaining() + 0.01)
+            return 'partial'
+
+        without_grace = await Deadline(0.05).gather(partial())
+        with_grace = await deadline.gather(partial(), grace=0.5)
+        return without_grace, with_grace
+
+    without_grace, with_grace = asyncio.run(scenario())
+    assert isinstance(without_grace[0], asyncio.TimeoutError)
+    assert with_grace == ['partial']
+
+
+def test_iterate_stops_at_the_deadline_and_closes_the_iterator():
+    closed = []
+
+    async def produce():
+        try:
+            for index in range(10):
+                await asyncio.sleep(0 if index < 2 else 5)
+                yield index
+        finally:
+            closed.append(True)
+
+    async def scenario():
+        items = []
+        with pytest.raises(asyncio.TimeoutError):
+            async for item in Deadline(0.05).iterate(produce()):
+                items.append(item)
+        return items
+
+    assert asyncio.run(scenario()) == [0, 1]
+    assert closed == [True]
+
+
+def test_search_status():
+    assert search_status(4, 0) == SEARCH_COMPLETE
+    assert search_status(4, 1) == SEARCH_PARTIAL
+    assert search_status(4, 4) == SEARCH_TIMED_OUT
+    assert search_status(0, 0) == SEARCH_COMPLETE
+
+
+def test_merge_search_status():
+    assert merge_search_status([SEARCH_COMPLETE, SEARCH_COMPLETE]) == SEARCH_COMPLETE
+    assert merge_search_status([SEARCH_COMPLETE, SEARCH_TIMED_OUT]) == SEARCH_PARTIAL
+    assert merge_search_status([SEARCH_TIMED_OUT, SEARCH_TIMED_OUT]) == SEARCH_TIMED_OUT
+    assert merge_search_status([SEARCH_TIMED_OUT, SEARCH_PARTIAL]) == SEARCH_PARTIAL
@@ -0,0 +1,94 @@
+import asyncio
+
+from services.searchEngineDD.entityResultAccumulator import EntityResultAccumulator
+from utils.deadline import SEARCH_COMPLETE, SEARCH_PARTIAL, SEARCH_TIMED_OUT
+
+ACME = ('ACME', 'ACME S.A.C.', '20100000001')
+BETA = ('BETA', 'BETA S.A.', '20100000002')
+SITES = ['Perú 21', 'Gestión']
+
+
+def response(entity, results, created_on='2024-01-02', updated_on='2024-01-02', status=SEARCH_COMPLETE):
+    return {
+        'entityIdNumber': entity[2], 'name': entity[1], 'commercialName': entity[0],
+        'requestStatus': 200, 'searchStatus': status, 'results': results,
+        'createdOn': created_on, 'updatedOn': updated_on,
+    }
+
+
+def news(url, keyword):
+    return {'URL': url, 'Keyword': keyword}
+
+
+def test_merges_sites_without_repeating_articles():
+    accumulator = EntityResultAccumulator([ACME], SITES)
+    accumulator.add(ACME, 'Perú 21', response(ACME, [news('https://peru21.pe/nota', 'fraude')], created_on='2024-01-03', updated_on='2024-01-03'))
+    accumulator.add(ACME, 'Gestión', response(ACME, [
+        news('https://www.peru21.pe/nota?utm_source=x', 'lavado'),
+        news('https://gestion.pe/nota', 'fraude'),
+    ], created_on='2024-01-01', updated_on='2024-01-05'))
+
+    [entry] = accumulator.results()
+    assert [result['URL'] for result in entry['results']] == ['https://peru21.pe/nota', 'https://gestion.pe/nota']
+    assert entry['results'][0]['MatchedKeywords'] == ['fraude', 'lavado']
+    assert entry['createdOn'] == '2024-01-01'
+    assert entry['updatedOn'] == '2024-01-05'
+    assert entry['searchStatus'] == SEARCH_COMPLETE
+
+
+def test_search_status_combines_the_sites():
+    accumulator = EntityResultAccumulator([ACME, BETA], SITES)
+    accumulator.add(ACME, 'Perú 21', response(ACME, []))
+    accumulator.add(ACME, 'Gestión', response(ACME, [], status=SEARCH_TIMED_OUT))
+    accumulator.add(BETA, 'Perú 21', response(BETA, [], status=SEARCH_TIMED_OUT))
+    accumulator.add(BETA, 'Gestión', response(BETA, [], status=SEARCH_TIMED_OUT))
+
+    acme, beta = accumulator.results()
+    assert acme['searchStatus'] == SEARCH_PARTIAL
+    assert acme['siteStatuses'] == {'Perú 21': SEARCH_COMPLETE, 'Gestión': SEARCH_TIMED_OUT}
+    assert beta['searchStatus'] == SEARCH_TIMED_OUT
+
+
+def test_results_follow_the_request_order():
+    accumulator = EntityResultAccumulator([ACME, BETA], SITES)
+    for site in SITES:
+        accumulator.add(BETA, site, response(BETA, []))
+    accumulator.add(ACME, 'Gestión', response(ACME, []))
+    assert [entry['commercialName'] for entry in accumulator.results()] == ['ACME', 'BETA']
+
+
+def test_iteration_yields_each_entity_when_its_sites_finish():
+    async def scenario():
+        accumulator = EntityResultAccumulator([ACME, BETA], SITES)
+        emitted = []
+
+        async def consume():
+            async for entry in accumulator:
+                emitted.append(entry['commercialName'])
+
+        consumer = asyncio.create_task(consume())
+        accumulator.add(BETA, 'Perú 21', response(BETA, []))
+        accumulator.add(BETA, 'Gestión', response(BETA, []))
+        await asyncio.sleep(0)
+        first = list(emitted)
+        # Un sitio sin respuesta se descuenta; una entidad sin respuestas no se emite.
+        accumulator.skip(ACME)
+        accumulator.skip(ACME)
+        await asyncio.wait_for(consumer, 1)
+        return first, emitted
+
+    first, emitted = asyncio.run(scenario())
+    assert first == ['BETA']
+    assert emitted == ['BETA']
+
+
+def test_close_finishes_entities_still_waiting_for_sites():
+    async def scenario():
+        accumulator = EntityResultAccumulator([ACME, BETA], SITES)
+        accumulator.add(ACME, 'Perú 21', response(ACME, [news('https://peru21.pe/nota', 'fraude')]))
+        accumulator.close()
+        return [entry async for entry in accumulator], accumulator.results()
+
+    emitted, results = asyncio.run(scenario())
+    assert [entry['commercialName'] for entry in emitted] == ['ACME']
+    assert len(results[0]['results']) == 1
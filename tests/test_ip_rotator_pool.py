@@ -0,0 +1,140 @@
+import asyncio
+
+from services.searchEngineDD.ipRotatorPool import IpRotatorPool
+
+
+class FakeRotator:
+    """
+    Gateway falso: cuenta cuántas veces se aprovisiona y se elimina.
+    """
+    def __init__(self, site_target, regions, events):
+        self.site_target = site_target
+        self.events = events
+
+    async def __aenter__(self):
+        self.events.append('start')
+        return self
+
+    async def __aexit__(self, *exc):
+        self.events.append('teardown')
+
+
+def make_pool(events, healthy=True, **kwargs):
+    async def health_check(site_target, gateway):
+        return healthy() if callable(healthy) else healthy
+
+    return IpRotatorPool(
+        rotator_factory=lambda site_target, regions: FakeRotator(site_target, regions, events),
+        health_check=health_check,
+        **kwargs,
+    )
+
+
+def test_reuses_gateway_between_acquires():
+    events = []
+
+    async def scenario():
+        pool = make_pool(events, health_check_interval=60, reaper_interval=60)
+        async with pool.acquire('https://site.test') as first:
+            pass
+        async with pool.acquire('https://site.test') as second:
+            pass
+        await pool.close()
+        return first, second
+
+    first, second = asyncio.run(scenario())
+    assert first is second
+    assert events == ['start', 'teardown']
+
+
+def test_recreates_gateway_that_fails_health_check():
+    events = []
+
+    async def scenario():
+        pool = make_pool(events, healthy=False, health_check_interval=0, reaper_interval=60)
+        async with pool.acquire('https://site.test') as first:
+            pass
+        async with pool.acquire('https://site.test') as second:
+            pass
+        await pool.close()
+        return first, second
+
+    first, second = asyncio.run(scenario())
+    assert first is not second
+    assert events.count('start') == 2
+    assert events.count('teardown') == 2
+
+
+def test_unhealthy_gateway_in_use_is_torn_down_on_release():
+    events = []
+
+    async def scenario():
+        pool = make_pool(events, healthy=False, health_check_interval=0, reaper_interval=60)
+        async with pool.acquire('https://site.test'):
+            async with pool.acquire('https://site.test'):
+                assert events == ['start', 'start']
+            await asyncio.sleep(0)
+            # El primer gateway sigue en uso: todavía no se elimina.
+            assert events == ['start', 'start']
+        await pool.close()
+
+    asyncio.run(scenario())
+    assert events.count('teardown') == 2
+
+
+def test_reaps_idle_gateways():
+    events = []
+
+    async def scenario():
+        pool = make_pool(events, idle_ttl=0.01, health_check_interval=60, reaper_interval=0.01)
+        async with pool.acquire('https://site.test'):
+            await asyncio.sleep(0.05)
+            # En uso: el reaper no lo elimina.
+            assert 'teardown' not in events
+        await asyncio.sleep(0.05)
+        assert events == ['start', 'teardown']
+        async with pool.acquire('https://site.test'):
+            pass
+        await pool.close()
+
+    asyncio.run(scenario())
+    assert events == ['start', 'teardown', 'start', 'teardown']
+
+
+def test_reaper_waits_for_pending_health_check():
+    events = []
+
+    async def scenario():
+        async def slow_health_check(site_target, gateway):
+            await asyncio.sleep(0.05)
+            return True
+
+        pool = IpRotatorPool(
+            rotator_factory=lambda site_target, regions: FakeRotator(site_target, regions, events),
+            health_check=slow_health_check, idle_ttl=0.001, health_check_interval=0, reaper_interval=0.01,
+        )
+        async with pool.acquire('https://site.test'):
+            pass
+        await asyncio.sleep(0.002)
+        # El reaper se ejecuta mientras se verifica el gateway: no debe eliminarlo.
+        async with pool.acquire('https://site.test'):
+            assert events == ['start']
+        await pool.close()
+
+    asyncio.run(scenario())
+    assert events == ['start', 'teardown']
+
+
+def test_survives_event_loop_change():
+    events = []
+    pool = make_pool(events, health_check_interval=60, reaper_interval=60)
+
+    async def use():
+        async with pool.acquire('https://site.test') as gateway:
+            return gateway
+
+    first = asyncio.run(use())
+    second = asyncio.run(use())
+    asyncio.run(pool.close())
+    assert first is second
+    assert events == ['start', 'teardown']
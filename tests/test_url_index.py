@@ -0,0 +1,63 @@
+import pytest
+
+from utils.url_index import canonicalize_url, ResultIndex
+
+CANONICAL = 'https://elcomercio.pe/politica/nota-123'
+
+
+@pytest.mark.parametrize('url', [
+    'https://elcomercio.pe/politica/nota-123',
+    'http://www.elcomercio.pe/politica/nota-123/',
+    'https://m.elcomercio.pe/politica/nota-123',
+    'https://ELCOMERCIO.PE/politica/nota-123?utm_source=twitter&utm_medium=social',
+    'https://elcomercio.pe/politica/nota-123?fbclid=abc#comentarios',
+    'https://elcomercio.pe/politica/nota-123?outputType=amp',
+    'https://amp.elcomercio.pe/politica/nota-123/amp',
+    'https://elcomercio.pe/amp/politica/nota-123',
+    ' https://elcomercio.pe:443/politica/nota-123 ',
+])
+def test_variants_of_the_same_article_share_a_canonical_url(url):
+    assert canonicalize_url(url) == CANONICAL
+
+
+def test_meaningful_query_params_are_kept_and_sorted():
+    assert canonicalize_url('https://site.pe/buscar?q=lavado&page=2&utm_campaign=x') == 'https://site.pe/buscar?page=2&q=lavado'
+    assert canonicalize_url('https://site.pe:8080/nota') == 'https://site.pe:8080/nota'
+    assert canonicalize_url('https://site.pe/nota?id=1') != canonicalize_url('https://site.pe/nota?id=2')
+
+
+def test_invalid_urls_are_returned_as_is():
+    assert canonicalize_url('') == ''
+    assert canonicalize_url(None) is None
+    assert canonicalize_url(' /relativa/nota ') == '/relativa/nota'
+    assert canonicalize_url('https://site.pe:puerto/nota') == 'https://site.pe:puerto/nota'
+
+
+def test_result_index_merges_duplicates_and_their_keywords():
+    index = ResultIndex('KeyWord')
+    first = {'URL': 'https://www.site.pe/nota', 'KeyWord': 'fraude', 'Titulo': 'Primera'}
+    index.extend([
+        first,
+        {'URL': 'https://site.pe/nota/?utm_source=x', 'KeyWord': 'lavado', 'Titulo': 'Segunda'},
+        {'URL': 'https://site.pe/nota', 'KeyWord': 'fraude'},
+        {'URL': 'https://site.pe/otra', 'KeyWord': 'lavado'},
+    ])
+
+    assert len(index) == 2
+    assert index.results[0]['URL'] == 'https://www.site.pe/nota'
+    assert index.results[0]['Titulo'] == 'Primera'
+    assert index.results[0]['MatchedKeywords'] == ['fraude', 'lavado']
+    assert index.results[1]['MatchedKeywords'] == ['lavado']
+    # Los resultados de entrada (por ejemplo, los de la caché) no se modifican.
+    assert 'MatchedKeywords' not in first
+
+
+def test_result_index_combines_already_merged_results_and_keeps_results_without_url():
+    index = ResultIndex('Keyword')
+    index.add({'URL': 'https://site.pe/nota', 'MatchedKeywords': ['fraude', 'lavado']})
+    assert not index.add({'URL': 'https://site.pe/nota', 'MatchedKeywords': ['lavado', 'soborno']})
+    assert index.add({'URL': None, 'Keyword': 'fraude'})
+    assert index.add({'URL': None, 'Keyword': 'fraude'})
+
+    assert index.results[0]['MatchedKeywords'] == ['fraude', 'lavado', 'soborno']
+    assert len(index) == 3
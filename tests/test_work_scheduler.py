@@ -0,0 +1,135 @@
+import asyncio
+
+import pytest
+
+from services.searchEngineDD import workScheduler
+from services.searchEngineDD.workScheduler import WorkScheduler
+from utils.deadline import Deadline
+
+
+class FakeSession:
+    """
+    Sesión falsa por sitio: registra con qué sitio objetivo se abrió.
+    """
+    opened = []
+
+    def __init__(self, site_target):
+        self.site_target = site_target
+
+    async def __aenter__(self):
+        FakeSession.opened.append(self.site_target)
+        return self
+
+    async def __aexit__(self, *exc):
+        return False
+
+
+@pytest.fixture(autouse=True)
+def fake_session(monkeypatch):
+    FakeSession.opened = []
+    monkeypatch.setattr(workScheduler, 'RegionFailoverSession', FakeSession)
+    monkeypatch.setattr(workScheduler, 'DEADLINE_GRACE', 0.05)
+
+
+def test_site_queue_alternates_between_entities():
+    scheduler = WorkScheduler()
+    scheduler.add_site('Perú 21', 'https://www.bing.com')
+    for keyword in ('k1', 'k2', 'k3'):
+        scheduler.submit('Perú 21', 0, keyword, None)
+    for keyword in ('k1', 'k2'):
+        scheduler.submit('Perú 21', 1, keyword, None)
+    scheduler.submit('Perú 21', 2, 'k1', None)
+
+    order = [(item.entity, item.keyword) for item in scheduler._site_queue('Perú 21')]
+    assert order == [(0, 'k1'), (1, 'k1'), (2, 'k1'), (0, 'k2'), (1, 'k2'), (0, 'k3')]
+
+
+def test_runs_items_with_bounded_concurrency_per_site():
+    in_flight = {'Perú 21': 0, 'Gestión': 0}
+    peak = {'Perú 21': 0, 'Gestión': 0}
+    done = []
+
+    async def job(sess, site, value):
+        in_flight[site] += 1
+        peak[site] = max(peak[site], in_flight[site])
+        await asyncio.sleep(0.01)
+        in_flight[site] -= 1
+        return value * 2
+
+    async def scenario():
+        scheduler = WorkScheduler(workers_per_site=2, on_done=lambda item: done.append(item))
+        for site in in_flight:
+            scheduler.add_site(site, f'https://{site}.test')
+            for entity in range(3):
+                for index in range(2):
+                    scheduler.submit(site, entity, f'k{index}', job, site, entity)
+        return await scheduler.run(Deadline(5))
+
+    items = asyncio.run(scenario())
+    assert len(items) == 12
+    assert all(item.done for item in items)
+    assert [item.result for item in items[:6]] == [0, 0, 2, 2, 4, 4]
+    assert peak == {'Perú 21': 2, 'Gestión': 2}
+    assert len(done) == 12
+    assert sorted(FakeSession.opened) == ['https://Gestión.test', 'https://Perú 21.test']
+
+
+def test_job_errors_are_kept_as_results():
+    async def job(sess, fail):
+        if fail:
+            raise ValueError('parse error')
+        return 'ok'
+
+    async def scenario():
+        scheduler = WorkScheduler()
+        scheduler.add_site('Perú 21', 'https://www.bing.com')
+        scheduler.submit('Perú 21', 0, 'k1', job, True)
+        scheduler.submit('Perú 21', 0, 'k2', job, False)
+        return await scheduler.run()
+
+    failed, succeeded = asyncio.run(scenario())
+    assert isinstance(failed.result, ValueError)
+    assert succeeded.result == 'ok'
+
+
+def test_deadline_stops_taking_items_and_times_out_the_rest():
+    done = []
+
+    async def job(sess, delay):
+        await asyncio.sleep(delay)
+        return delay
+
+    async def scenario():
+        scheduler = WorkScheduler(workers_per_site=1, on_done=lambda item: done.append(item.keyword))
+        scheduler.add_site('Perú 21', 'https://www.bing.com')
+        scheduler.submit('Perú 21', 0, 'fast', job, 0)
+        scheduler.submit('Perú 21', 0, 'slow', job, 5)
+        scheduler.submit('Perú 21', 0, 'queued', job, 0)
+        return await scheduler.run(Deadline(0.05))
+
+    fast, slow, queued = asyncio.run(scenario())
+    assert fast.result == 0
+    assert isinstance(slow.result, asyncio.TimeoutError)
+    assert isinstance(queued.result, asyncio.TimeoutError)
+    assert sorted(done) == ['fast', 'queued', 'slow']
+
+
+def test_site_failure_marks_its_items(monkeypatch):
+    class BrokenSession(FakeSession):
+        async def __aenter__(self):
+            raise ConnectionError('no gateway')
+
+    monkeypatch.setattr(workScheduler, 'RegionFailoverSession', BrokenSession)
+
+    async def job(sess):
+        return 'ok'
+
+    async def scenario():
+        scheduler = WorkScheduler()
+        scheduler.add_site('Perú 21', 'https://www.bing.com')
+        scheduler.submit('Perú 21', 0, 'k1', job)
+        return await scheduler.run()
+
+    [item] = asyncio.run(scenario())
+    assert item.done
+    assert isinstance(item.result, ConnectionError)
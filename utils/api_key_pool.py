@@ -0,0 +1,69 @@
+import logging
+import time
+
+class ApiKeyPool:
+    """
+    Pool de API keys con rotación round-robin y seguimiento de agotamiento.
+
+    Cada key guarda sus créditos restantes estimados y, si respondió 403/429,
+    el instante hasta el cual queda fuera de rotación.
+    """
+    def __init__(self, keys: list, exhausted_cooldown: float, throttled_cooldown: float):
+        self.keys = [key.strip() for key in keys if key and key.strip()]
+        self.exhausted_cooldown = exhausted_cooldown
+        self.throttled_cooldown = throttled_cooldown
+        self._next = 0
+        self._disabled_until = {key: 0.0 for key in self.keys}
+        self._remaining_credits = {key: None for key in self.keys}
+        self._exhausted = set()
+        self.credits_updated_on = 0.0
+
+    def is_healthy(self, key: str) -> bool:
+        remaining = self._remaining_credits.get(key)
+        return self._disabled_until.get(key, 0.0) <= time.monotonic() and (remaining is None or remaining > 0)
+
+    def healthy_keys(self) -> list:
+        return [key for key in self.keys if self.is_healthy(key)]
+
+    def throttled_keys(self, exclude: set = None) -> list:
+        # Keys fuera de rotación temporalmente por 429, pero que aún tienen créditos.
+        exclude = exclude or set()
+        return [key for key in self.keys if key not in exclude and key not in self._exhausted and not self.is_healthy(key)
+                and (self._remaining_credits.get(key) is None or self._remaining_credits[key] > 0)]
+
+    def acquire(self, exclude: set = None):
+        """
+        Devuelve la siguiente key sana en orden round-robin, o None si no hay ninguna
+        disponible fuera de `exclude`.
+        """
+        exclude = exclude or set()
+        for _ in range(len(self.keys)):
+            key = self.keys[self._next % len(self.keys)]
+            self._next += 1
+            if key not in exclude and self.is_healthy(key):
+                return key
+        return None
+
+    def report(self, key: str, status: int, cost: int = 0):
+        if status == 403:
+            # ScraperAPI responde 403 cuando la key no tiene créditos.
+            logging.warning(f'ScraperAPI key ...{key[-4:]} exhausted, disabled for {self.exhausted_cooldown}s')
+            self._disabled_until[key] = time.monotonic() + self.exhausted_cooldown
+            self._exhausted.add(key)
+        elif status == 429:
+            # 429 indica que se superó el límite de concurrencia del plan.
+            logging.warning(f'ScraperAPI key ...{key[-4:]} throttled, disabled for {self.throttled_cooldown}s')
+            self._disabled_until[key] = time.monotonic() + self.throttled_cooldown
+        elif 200 <= status < 300 and self._remaining_credits.get(key) is not None:
+            self._remaining_credits[key] -= cost
+
+    def update_credits(self, key: str, remaining: int):
+        self._remaining_credits[key] = remaining
+        if remaining > 0 and key in self._exhausted:
+            # La cuenta volvió a tener créditos (ej. renovación del plan).
+            self._exhausted.discard(key)
+            self._disabled_until[key] = 0.0
+        self.credits_updated_on = time.monotonic()
+
+    def remaining_credits(self) -> dict:
+        return dict(self._remaining_credits)
@@ -0,0 +1,66 @@
+import logging
+import time
+
+CIRCUIT_CLOSED = "closed"
+CIRCUIT_OPEN = "open"
+CIRCUIT_HALF_OPEN = "half_open"
+
+class CircuitBreaker:
+    """
+    Circuit breaker para una ruta de salida (por ejemplo, un gateway de IpRotator).
+
+    - Cerrado: el tráfico pasa normalmente.
+    - Abierto: tras un bloqueo o `failure_threshold` errores seguidos no se envía
+      tráfico durante `reset_timeout` segundos.
+    - Semiabierto: pasado ese tiempo se deja pasar una sola petición de prueba; si
+      responde bien el circuito se cierra y si falla vuelve a abrirse.
+
+    `allow_request()` devuelve un permiso (verdadero) o None. Solo quien recibió el
+    permiso de la petición de prueba puede liberarlo con `release_trial(permit)`.
+    """
+    def __init__(self, name: str, failure_threshold: int, reset_timeout: float):
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.state = CIRCUIT_CLOSED
+        self._failures = 0
+        self._opened_at = 0.0
+        # Permiso de la petición de prueba en vuelo (None si no hay ninguna).
+        self._trial = None
+
+    def allow_request(self):
+        if self.state == CIRCUIT_CLOSED:
+            return True
+        if self.state == CIRCUIT_OPEN and time.monotonic() - self._opened_at >= self.reset_timeout:
+            self.state = CIRCUIT_HALF_OPEN
+            self._trial = None
+        if self.state == CIRCUIT_HALF_OPEN and self._trial is None:
+            self._trial = object()
+            return self._trial
+        return None
+
+    def release_trial(self, permit):
+        # La petición de prueba se canceló sin resultado: se permite otra. Un permiso
+        # normal (o de una prueba anterior) no libera la prueba en curso.
+        if permit is not None and permit is self._trial:
+            self._trial = None
+
+    def record_success(self):
+        if self.state != CIRCUIT_CLOSED:
+            logging.info(f'Circuit <{self.name}> closed again')
+        self.state = CIRCUIT_CLOSED
+        self._failures = 0
+        self._trial = None
+
+    def record_failure(self):
+        self._failures += 1
+        if self.state == CIRCUIT_HALF_OPEN or self._failures >= self.failure_threshold:
+            self.trip(f'{self._failures} consecutive failures')
+
+    def trip(self, reason: str):
+        # Un bloqueo abre el circuito de inmediato: la IP ya está quemada.
+        logging.warning(f'Circuit <{self.name}> opened for {self.reset_timeout}s after {reason}')
+        self.state = CIRCUIT_OPEN
+        self._opened_at = time.monotonic()
+        self._failures = 0
+        self._trial = None
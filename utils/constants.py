@@ -58,6 +58,62 @@ NEWS_WEBSITES = [
 #       "site": "peru21.pe",
 #   }
 ]
+# Perfiles de los sitios de noticias que se buscan a través del buscador (ver
+# services/searchEngineDD/newsSiteScraper.py). Para añadir un sitio basta con añadir una entrada.
+NEWS_SITE_PROFILES = {
+    "peru21": {
+        "name": "Perú 21",
+        "source": "PERU 21",
+        "domain": "peru21.pe",
+        "query_suffix": "+site:peru21.pe",
+        "extra_params": "&gl=PE",
+        "excluded_url_fragments": ['/tag/', '/autor/', '/noticias/'],
+    },
+    "elcomercio": {
+        "name": "El Comercio",
+        "source": "El Comercio",
+        "domain": "elcomercio.pe",
+        "query_suffix": "+site:elcomercio.pe",
+        "excluded_url_fragments": ['/tag/', '/autor/', '/noticias/'],
+    },
+    "gestion": {
+        "name": "Gestión",
+        "source": "Gestión",
+        "domain": "gestion.pe",
+        "query_suffix": "+gestion.pe",
+        "excluded_url_fragments": ['/tag/', '/autor/', '/noticias/'],
+    },
+    "larepublica": {
+        "name": "La República",
+        "source": "La República",
+        "domain": "larepublica.pe",
+        "query_suffix": "+larepublica.pe",
+        "excluded_url_fragments": ['/tag/', '/autor/', '/noticias/'],
+    },
+    "idl_reporteros": {
+        "name": "IDL Reporteros",
+        "source": "IDL Reporteros",
+        "domain": "idl-reporteros.pe",
+        "query_suffix": "+site:idl-reporteros.pe",
+        "excluded_url_fragments": ['/tag/', '/autor/', '/noticias/'],
+    },
+    "convoca": {
+        "name": "Convoca",
+        "source": "Convoca",
+        "domain": "convoca.pe",
+        "query_suffix": "+site:convoca.pe",
+        "extra_params": "&gl=PE",
+        "excluded_url_fragments": ['/tags/', 'convoca-a-tu-servicio', 'convoca-radio'],
+        # Las notas de Convoca llevan un guion en la última parte de la URL.
+        "require_slug_hyphen": True,
+    },
+}
+NEWS_KEYWORDS_LIST = ['denuncia', 'delito', 'corrupción', 'soborno', 'lavado de activos', 'financiamiento del terrorismo', 'financiamiento a la proliferación de armas de destrucción masiva']
+NEWS_RESULTS_PER_KEYWORD = 10
+# Páginas de resultados por keyword. Con 1 se pide una sola página; con más, se piden
+# páginas (`first=` en Bing) hasta reunir NEWS_RESULTS_PER_KEYWORD resultados válidos.
+NEWS_MAX_PAGES = 1
+
 KEYWORDS_LIST = ['denuncia']
 #KEYWORDS_LIST = ['denuncia', 'delito', 'corrupción', 'soborno', 'lavado de activos', 'financiamiento del terrorismo', 'financiamiento a la proliferación de armas de destrucción masiva']
 MAX_SEARCH_RESULTS = 100
@@ -67,4 +123,87 @@ EXPONENTIAL_BACKOFF = 2
 REQUEST_SLEEP_TIME = 1.5
 
 GOOGLE_SEARCH = "GOOGLE_SEARCH"
-NEWS_SEARCH = "NEWS_SEARCH"
\ No newline at end of file
+NEWS_SEARCH = "NEWS_SEARCH"
+HTTP_CONNECTOR_LIMIT = 100
+HTTP_CONNECTOR_LIMIT_PER_HOST = 50
+HTTP_KEEPALIVE_TIMEOUT = 60
+HTTP_DNS_CACHE_TTL = 300
+
+SCRAPER_API_MAX_CONCURRENCY = 10
+SCRAPER_API_REQUESTS_PER_SECOND = 5
+SCRAPER_API_BURST = 10
+SCRAPER_API_EXHAUSTED_COOLDOWN = 3600
+SCRAPER_API_THROTTLED_COOLDOWN = 5
+SCRAPER_API_CREDITS_REFRESH_INTERVAL = 600
+SCRAPER_API_SEARCH_CREDIT_COST = 25
+SCRAPER_API_REQUEST_TIMEOUT = 60
+
+SCRAPER_API_SYNC_MODE = "sync"
+SCRAPER_API_BATCH_MODE = "batch"
+SCRAPER_API_MODE = SCRAPER_API_SYNC_MODE
+SCRAPER_API_BATCH_SIZE = 50
+SCRAPER_API_POLL_INTERVAL = 2
+SCRAPER_API_POLL_MAX_INTERVAL = 30
+SCRAPER_API_JOB_TIMEOUT = 600
+
+SEARCH_CACHE_TTL = 86400
+SEARCH_CACHE_MAX_ENTRIES = 5000
+SEARCH_CACHE_PURGE_INTERVAL = 3600
+
+GATEWAY_REGIONS = ['us-east-1', 'us-east-2']
+GATEWAY_IDLE_TTL = 900
+GATEWAY_HEALTH_CHECK_INTERVAL = 120
+GATEWAY_REAPER_INTERVAL = 60
+
+DOMAIN_INITIAL_CONCURRENCY = 4
+DOMAIN_MIN_CONCURRENCY = 1
+DOMAIN_MAX_CONCURRENCY = 32
+DOMAIN_BACKOFF_FACTOR = 0.5
+DOMAIN_MIN_DELAY = 0.1
+DOMAIN_MAX_DELAY = 10
+DOMAIN_DELAY_STEP = 0.05
+
+CIRCUIT_BREAKER_FAILURE_THRESHOLD = 3
+CIRCUIT_BREAKER_RESET_TIMEOUT = 300
+
+VALIDATOR_CACHE_MAX_ENTRIES = 200
+
+HEDGE_ENABLED = False
+HEDGE_PERCENTILE = 0.95
+HEDGE_BUDGET = 0.05
+HEDGE_WINDOW = 200
+HEDGE_MIN_SAMPLES = 20
+
+PARSE_EXECUTOR_THREAD = "thread"
+PARSE_EXECUTOR_PROCESS = "process"
+PARSE_EXECUTOR_KIND = PARSE_EXECUTOR_THREAD
+PARSE_EXECUTOR_MAX_WORKERS = 4
+
+NEWS_SEARCH_PER_SITE_MODE = "per_site"
+NEWS_SEARCH_COMBINED_MODE = "combined"
+NEWS_SEARCH_MODE = NEWS_SEARCH_PER_SITE_MODE
+NEWS_COMBINED_FULL_PAGE = 10
+NEWS_COMBINED_MIN_SITE_RESULTS = 2
+
+SCHEDULER_WORKERS_PER_SITE = 8
+SCHEDULER_TIMEOUT = 180
+DEADLINE_GRACE = 1
+
+# Parámetros de seguimiento que no cambian el artículo; se ignoran al comparar URLs.
+URL_TRACKING_PARAMS = ('fbclid', 'gclid', 'dclid', 'msclkid', 'ocid', 'cmpid', 'igshid', 'mc_cid', 'mc_eid', 'ref', 'ref_src', 'amp')
+URL_TRACKING_PREFIXES = ('utm_',)
+
+# Instrumentación por etapas (`utils.instrumentation`). También se activa con la
+# variable de entorno TIMING_ENABLED=true; solo se mide una fracción de las solicitudes.
+TIMING_ENABLED = False
+TIMING_SAMPLE_RATE = 0.1
+STAGE_REQUEST_BODY = "request_body"
+STAGE_DB_LOOKUP = "db_lookup"
+STAGE_ENTITY_MATCH = "entity_match"
+STAGE_ENTITY_SCORE = "entity_score"
+STAGE_KEYWORDS = "keyword_generation"
+STAGE_FETCH = "fetch"
+STAGE_PARSE = "parse"
+STAGE_MERGE = "merge"
+STAGE_PERSIST = "persist"
+STAGE_ENQUEUE = "enqueue"
@@ -0,0 +1,89 @@
+import asyncio
+import time
+
+# Estado de la búsqueda de una entidad (o de una entidad en un sitio).
+SEARCH_COMPLETE = "complete"    # Todas las búsquedas terminaron.
+SEARCH_PARTIAL = "partial"      # Venció el plazo con parte de las búsquedas terminadas.
+SEARCH_TIMED_OUT = "timed_out"  # Venció el plazo sin ninguna búsqueda terminada.
+SEARCH_FAILED = "failed"        # La búsqueda terminó con un error.
+
+class Deadline:
+    """
+    Plazo de una solicitud, compartido por el orquestador, los scrapers y ScraperApiService.
+
+    Se crea una vez al recibir la solicitud (por ejemplo, con el tiempo máximo de la
+    Function menos un margen para guardar los resultados) y se pasa hacia abajo. Al
+    vencer, el trabajo pendiente se cancela y se devuelve lo que ya terminó. Con
+    `seconds=None` no hay plazo.
+    """
+    def __init__(self, seconds: float = None):
+        self.expires_at = None if seconds is None else time.monotonic() + seconds
+
+    def remaining(self):
+        # Segundos restantes (nunca negativos), o None si no hay plazo.
+        if self.expires_at is None:
+            return None
+        return max(0.0, self.expires_at - time.monotonic())
+
+    def expired(self) -> bool:
+        return self.expires_at is not None and time.monotonic() >= self.expires_at
+
+    def timeout(self, default: float) -> float:
+        # El timeout de una operación no puede pasar del plazo.
+        remaining = self.remaining()
+        return default if remaining is None else min(default, remaining)
+
+    async def gather(self, *aws, grace: float = 0) -> list:
+        """
+        Como `asyncio.gather(..., return_exceptions=True)` pero sin pasar del plazo: las
+        tareas que no terminan a tiempo se cancelan y devuelven asyncio.TimeoutError.
+
+        Con `grace` se espera unos segundos más antes de cancelar, para que las tareas
+        que respetan el mismo plazo devuelvan sus resultados parciales.
+        """
+        tasks = [asyncio.ensure_future(aw) for aw in aws]
+        if not tasks:
+            return []
+        remaining = self.remaining()
+        _, pending = await asyncio.wait(tasks, timeout=None if remaining is None else remaining + grace)
+        for task in pending:
+            task.cancel()
+        await asyncio.gather(*pending, return_exceptions=True)
+        return [
+            asyncio.TimeoutError('Deadline exceeded') if task in pending
+            else task.exception() or task.result()
+            for task in tasks
+        ]
+
+    async def iterate(self, aiterable):
+        """
+        Recorre un iterador asíncrono hasta que se agota o vence el plazo; al vencer,
+        cierra el iterador (cancelando su trabajo pendiente) y lanza asyncio.TimeoutError.
+        """
+        iterator = aiterable.__aiter__()
+        try:
+            while True:
+                try:
+                    item = await asyncio.wait_for(iterator.__anext__(), self.remaining())
+                except StopAsyncIteration:
+                    return
+                yield item
+        finally:
+            if hasattr(iterator, 'aclose'):
+                await iterator.aclose()
+
+def search_status(total: int, timed_out: int) -> str:
+    """
+    Estado de una búsqueda con `total` partes de las cuales `timed_out` no terminaron.
+    """
+    if timed_out == 0:
+        return SEARCH_COMPLETE
+    return SEARCH_TIMED_OUT if timed_out >= total else SEARCH_PARTIAL
+
+def merge_search_status(statuses: list) -> str:
+    """
+    Estado de una entidad a partir del estado de cada sitio.
+    """
+    if SEARCH_PARTIAL in statuses:
+        return SEARCH_PARTIAL
+    return search_status(len(statuses), statuses.count(SEARCH_TIMED_OUT))
@@ -0,0 +1,49 @@
+# Descompresores opcionales: aiohttp solo decodifica brotli (Brotli / brotlicffi) y
+# zstd (zstandard) si la librería está instalada, así que solo se anuncian las
+# codificaciones que la sesión puede leer.
+try:
+    from aiohttp.compression_utils import HAS_BROTLI
+except ImportError:
+    HAS_BROTLI = False
+
+try:
+    from aiohttp.compression_utils import HAS_ZSTD
+except ImportError:
+    HAS_ZSTD = False
+
+UTF8_CHARSETS = ('utf-8', 'utf8')
+
+def accept_encoding() -> str:
+    encodings = ['gzip', 'deflate']
+    if HAS_ZSTD:
+        encodings.append('zstd')
+    if HAS_BROTLI:
+        encodings.append('br')
+    return ', '.join(encodings)
+
+ACCEPT_ENCODING = accept_encoding()
+
+async def read_body(response):
+    """
+    Lee el cuerpo (ya descomprimido por aiohttp) sin decodificarlo a str cuando es
+    UTF-8, que es lo que sirven los buscadores: lxml parsea los bytes directamente y
+    se evita decodificar la página para que luego lxml la vuelva a codificar.
+
+    Returns:
+        bytes | str: Los bytes UTF-8 del cuerpo o, si la respuesta declara otro
+                     charset conocido, el texto ya decodificado.
+    """
+    body = await response.read()
+    charset = (response.charset or UTF8_CHARSETS[0]).lower()
+    if charset in UTF8_CHARSETS:
+        return body
+    try:
+        return body.decode(charset, errors='replace')
+    except LookupError:
+        # Charset desconocido o mal escrito en el header: se entrega como UTF-8.
+        return body
+
+def body_preview(body, size: int = 500) -> str:
+    # Fragmento legible del cuerpo para los logs, sea str o bytes UTF-8.
+    preview = body[:size]
+    return preview.decode('utf-8', errors='replace') if isinstance(preview, bytes) else preview
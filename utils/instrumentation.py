@@ -0,0 +1,204 @@
+import contextvars
+import json
+import logging
+import os
+import random
+import uuid
+from functools import wraps
+from inspect import iscoroutinefunction, isasyncgenfunction
+from time import perf_counter_ns
+from utils.constants import TIMING_ENABLED, TIMING_SAMPLE_RATE
+
+# Se decide al importar: con la instrumentación apagada `timed` devuelve la función
+# original, así que no cuesta nada.
+ENABLED = TIMING_ENABLED or os.environ.get("TIMING_ENABLED", "").lower() == "true"
+
+# Registro de la solicitud en curso; las tareas de asyncio lo heredan al crearse.
+current_recorder = contextvars.ContextVar('timing_recorder', default=None)
+
+class StageHistogram:
+    """
+    Histograma de duraciones de una etapa en cubetas de potencias de 2 (en ns): cada
+    registro es O(1) y los percentiles se estiman con el límite superior de la cubeta.
+    """
+    __slots__ = ('count', 'total_ns', 'min_ns', 'max_ns', 'buckets')
+
+    def __init__(self):
+        self.count = 0
+        self.total_ns = 0
+        self.min_ns = None
+        self.max_ns = 0
+        self.buckets = {}
+
+    def record(self, elapsed_ns: int):
+        self.count += 1
+        self.total_ns += elapsed_ns
+        self.min_ns = elapsed_ns if self.min_ns is None else min(self.min_ns, elapsed_ns)
+        self.max_ns = max(self.max_ns, elapsed_ns)
+        bucket = elapsed_ns.bit_length()
+        self.buckets[bucket] = self.buckets.get(bucket, 0) + 1
+
+    def percentile(self, fraction: float) -> int:
+        target = fraction * self.count
+        seen = 0
+        for bucket in sorted(self.buckets):
+            seen += self.buckets[bucket]
+            if seen >= target:
+                return min(1 << bucket, self.max_ns)
+        return self.max_ns
+
+    def to_dict(self) -> dict:
+        ms = lambda ns: round(ns / 1e6, 4)
+        return {
+            'count': self.count,
+            'total_ms': ms(self.total_ns),
+            'mean_ms': ms(self.total_ns / self.count) if self.count else 0.0,
+            'min_ms': ms(self.min_ns or 0),
+            'p50_ms': ms(self.percentile(0.5)),
+            'p95_ms': ms(self.percentile(0.95)),
+            'p99_ms': ms(self.percentile(0.99)),
+            'max_ms': ms(self.max_ns),
+        }
+
+class TimingRecorder:
+    """
+    Tiempos de una solicitud por etapa (consulta a la BD, generación de keywords,
+    fetch, parseo, merge, persistencia...). Las etapas anidadas se miden por separado:
+    el total de una etapa incluye el de las etapas que se ejecutan dentro de ella, y
+    las llamadas concurrentes se suman (el total puede superar a `elapsed_ms`).
+    """
+    def __init__(self, request_id: str = None):
+        self.request_id = request_id or uuid.uuid4().hex
+        self.started_ns = perf_counter_ns()
+        self.stages = {}
+
+    def record(self, stage: str, elapsed_ns: int):
+        histogram = self.stages.get(stage)
+        if histogram is None:
+            histogram = self.stages[stage] = StageHistogram()
+        histogram.record(elapsed_ns)
+
+    def to_dict(self) -> dict:
+        return {
+            'requestId': self.request_id,
+            'elapsed_ms': round((perf_counter_ns() - self.started_ns) / 1e6, 3),
+            'stages': {stage: histogram.to_dict() for stage, histogram in sorted(self.stages.items(), key=lambda item: -item[1].total_ns)},
+        }
+
+    def dump(self) -> str:
+        return json.dumps(self.to_dict())
+
+class timing_request:
+    """
+    Contexto que mide una solicitud completa: si la instrumentación está activa y la
+    solicitud sale en el muestreo, las etapas ejecutadas dentro (también en tareas
+    creadas dentro) se registran y al salir se escribe el desglose en JSON en el log.
+    Si ya hay una solicitud medida en curso, se suma a ella (sin un desglose propio).
+
+    Uso:
+        with timing_request(request_id) as recorder:
+            ...
+        # `recorder` es None si la solicitud no se mide.
+    """
+    def __init__(self, request_id: str = None, sample_rate: float = TIMING_SAMPLE_RATE):
+        self.recorder = None
+        self._token = None
+        if not ENABLED:
+            return
+        self.recorder = current_recorder.get()
+        if self.recorder is None and random.random() < sample_rate:
+            self.recorder = TimingRecorder(request_id)
+            self._token = current_recorder.set(self.recorder)
+
+    def __enter__(self):
+        return self.recorder
+
+    def __exit__(self, *exc):
+        if self._token is not None:
+            current_recorder.reset(self._token)
+            logging.info(f'Timing breakdown: {self.recorder.dump()}')
+        return False
+
+def timed(stage: str):
+    """
+    Decorador que mide cada llamada (síncrona o asíncrona) como la etapa `stage`.
+    No escribe una línea de log por llamada: solo suma la duración al histograma de la
+    etapa en la solicitud medida (ver `timing_request`).
+
+    En un generador asíncrono se mide el tiempo que pasa produciendo elementos (sin
+    contar el de quien lo recorre) y se registra una vez, al agotarse o cerrarse.
+    Solo admite `async for`: no reenvía `asend` ni `athrow`.
+    """
+    def decorator(func):
+        if not ENABLED:
+            return func
+
+        if isasyncgenfunction(func):
+            @wraps(func)
+            async def asyncgen_wrapper(*args, **kwargs):
+                recorder = current_recorder.get()
+                iterator = func(*args, **kwargs)
+                elapsed_ns = 0
+                try:
+                    while True:
+                        start_ns = perf_counter_ns()
+                        try:
+                            item = await iterator.__anext__()
+                        except StopAsyncIteration:
+                            return
+                        finally:
+                            elapsed_ns += perf_counter_ns() - start_ns
+                        yield item
+                finally:
+                    await iterator.aclose()
+                    if recorder is not None:
+                        recorder.record(stage, elapsed_ns)
+            return asyncgen_wrapper
+
+        if iscoroutinefunction(func):
+            @wraps(func)
+            async def async_wrapper(*args, **kwargs):
+                recorder = current_recorder.get()
+                if recorder is None:
+                    return await func(*args, **kwargs)
+                start_ns = perf_counter_ns()
+                try:
+                    return await func(*args, **kwargs)
+                finally:
+                    recorder.record(stage, perf_counter_ns() - start_ns)
+            return async_wrapper
+
+        @wraps(func)
+        def wrapper(*args, **kwargs):
+            recorder = current_recorder.get()
+            if recorder is None:
+                return func(*args, **kwargs)
+            start_ns = perf_counter_ns()
+            try:
+                return func(*args, **kwargs)
+            finally:
+                recorder.record(stage, perf_counter_ns() - start_ns)
+        return wrapper
+    return decorator
+
+def timed_request(func):
+    """
+    Decorador que mide cada llamada (síncrona o asíncrona) como una solicitud
+    (ver `timing_request`). No admite generadores asíncronos: en ese caso se abre
+    `timing_request` en quien los recorre.
+    """
+    if not ENABLED:
+        return func
+
+    if iscoroutinefunction(func):
+        @wraps(func)
+        async def async_wrapper(*args, **kwargs):
+            with timing_request():
+                return await func(*args, **kwargs)
+        return async_wrapper
+
+    @wraps(func)
+    def wrapper(*args, **kwargs):
+        with timing_request():
+            return func(*args, **kwargs)
+    return wrapper
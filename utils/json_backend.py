@@ -0,0 +1,88 @@
+import json
+from typing import Any, Optional
+
+# Decodificadores rápidos opcionales: se usa el primero disponible y, si no hay
+# ninguno instalado, la librería estándar.
+try:
+    import msgspec
+except ImportError:
+    msgspec = None
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+MSGSPEC_BACKEND = "msgspec"
+ORJSON_BACKEND = "orjson"
+STDLIB_BACKEND = "json"
+
+if msgspec is not None:
+    class OrganicResult(msgspec.Struct):
+        title: Optional[str] = None
+        snippet: Optional[str] = None
+        link: Optional[str] = None
+
+    class SearchInformation(msgspec.Struct):
+        query_result_mismatch_message: Optional[str] = None
+
+    class StructuredSearchResponse(msgspec.Struct):
+        # Solo se declaran los campos que se usan; msgspec ignora el resto sin construirlos.
+        organic_results: Optional[list[OrganicResult]] = None
+        search_information: Optional[SearchInformation] = None
+        error: Any = None
+
+    _search_response_decoder = msgspec.json.Decoder(StructuredSearchResponse)
+
+def available_backends() -> list:
+    backends = []
+    if msgspec is not None:
+        backends.append(MSGSPEC_BACKEND)
+    if orjson is not None:
+        backends.append(ORJSON_BACKEND)
+    backends.append(STDLIB_BACKEND)
+    return backends
+
+DEFAULT_BACKEND = available_backends()[0]
+
+def _from_dict(json_response) -> tuple:
+    if not isinstance(json_response, dict):
+        return None, 'Unexpected response format'
+    organic = json_response.get('organic_results')
+    if organic is not None:
+        return [(res.get('title'), res.get('snippet'), res.get('link')) for res in organic], ''
+    message = (json_response.get('search_information') or {}).get('query_result_mismatch_message') or json_response.get('error')
+    return None, message or 'No Organic results from Scraper'
+
+def decode_search_response(body, backend: str = DEFAULT_BACKEND) -> tuple:
+    """
+    Decodifica una respuesta de búsqueda estructurada de ScraperAPI en una sola pasada.
+
+    Returns:
+        tuple: (organic_results, message). `organic_results` es una lista de tuplas
+               (title, snippet, link), o None si la respuesta no trae resultados
+               orgánicos; en ese caso `message` explica el motivo.
+
+    Raises:
+        ValueError: Si el cuerpo no es JSON válido.
+    """
+    if backend == MSGSPEC_BACKEND:
+        try:
+            response = _search_response_decoder.decode(body)
+        except msgspec.ValidationError:
+            # El JSON es válido pero no encaja en el esquema; se usa el camino genérico.
+            return _from_dict(msgspec.json.decode(body))
+        except msgspec.DecodeError as e:
+            raise ValueError(str(e))
+        if response.organic_results is not None:
+            return [(res.title, res.snippet, res.link) for res in response.organic_results], ''
+        message = (response.search_information.query_result_mismatch_message if response.search_information else None) or response.error
+        return None, message or 'No Organic results from Scraper'
+
+    if backend == ORJSON_BACKEND:
+        try:
+            return _from_dict(orjson.loads(body))
+        except orjson.JSONDecodeError as e:
+            raise ValueError(str(e))
+
+    return _from_dict(json.loads(body))
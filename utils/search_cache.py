@@ -0,0 +1,168 @@
+import asyncio
+import json
+import logging
+import os
+import re
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from utils.constants import SEARCH_CACHE_TTL, SEARCH_CACHE_MAX_ENTRIES, SEARCH_CACHE_PURGE_INTERVAL
+
+# Static global variable
+search_cache = None
+
+class SearchCache:
+    """
+    Caché de resultados de búsqueda con vencimiento por TTL.
+
+    Tiene un nivel LRU en memoria y, si se indica `db_path`, un nivel en SQLite
+    que sobrevive a reinicios del worker. Las claves son la consulta normalizada
+    más el sitio.
+
+    Desde corrutinas se usan `aget` / `aset`: el nivel en disco se consulta en un
+    hilo aparte (`asyncio.to_thread`) para no bloquear el event loop. La conexión
+    SQLite y el nivel en memoria tienen cada uno su lock, porque `_run_sync` puede
+    usar la caché desde otro hilo. Las filas vencidas se borran al abrir la base y
+    luego cada SEARCH_CACHE_PURGE_INTERVAL segundos.
+    """
+    def __init__(self, ttl: float, max_entries: int, db_path: str = None, purge_interval: float = SEARCH_CACHE_PURGE_INTERVAL):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.purge_interval = purge_interval
+        self._entries = OrderedDict()
+        self._memory_lock = threading.Lock()
+        self._db_lock = threading.Lock()
+        self._db = None
+        self._last_purge = 0.0
+        self.hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+
+        if db_path:
+            try:
+                self._db = sqlite3.connect(db_path, check_same_thread=False)
+                self._db.execute('CREATE TABLE IF NOT EXISTS search_cache (key TEXT PRIMARY KEY, expires_on REAL, value TEXT)')
+                self._db.commit()
+                self._purge_expired()
+            except sqlite3.Error as e:
+                logging.error(f'Could not open search cache database at {db_path}: {e}')
+                self._db = None
+
+    @staticmethod
+    def make_key(query: str, site: str = '') -> str:
+        normalized_query = ' '.join(query.casefold().split())
+        # Elimina espacios al inicio y final de cada frase entre comillas.
+        normalized_query = re.sub(r'"\s*([^"]*?)\s*"', r'"\1"', normalized_query)
+        return f'{normalized_query}|{site.casefold().strip()}'
+
+    def _get_memory(self, key: str, now: float):
+        with self._memory_lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            if entry[0] > now:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return entry[1]
+            del self._entries[key]
+            return None
+
+    def _set_memory(self, key: str, expires_on: float, value):
+        with self._memory_lock:
+            self._entries[key] = (expires_on, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def _get_disk(self, key: str, now: float):
+        with self._db_lock:
+            try:
+                row = self._db.execute('SELECT expires_on, value FROM search_cache WHERE key = ?', (key,)).fetchone()
+            except sqlite3.Error as e:
+                logging.error(f'Search cache read error: {e}')
+                return None
+        if row is None or row[0] <= now:
+            return None
+        return row[0], json.loads(row[1])
+
+    def _set_disk(self, key: str, expires_on: float, value):
+        with self._db_lock:
+            try:
+                self._db.execute('INSERT OR REPLACE INTO search_cache (key, expires_on, value) VALUES (?, ?, ?)', (key, expires_on, json.dumps(value)))
+                self._db.commit()
+            except sqlite3.Error as e:
+                logging.error(f'Search cache write error: {e}')
+        if time.time() - self._last_purge >= self.purge_interval:
+            self._purge_expired()
+
+    def _purge_expired(self):
+        # El nivel en disco no debe crecer sin límite con filas ya vencidas.
+        with self._db_lock:
+            self._last_purge = time.time()
+            try:
+                deleted = self._db.execute('DELETE FROM search_cache WHERE expires_on < ?', (self._last_purge,)).rowcount
+                self._db.commit()
+            except sqlite3.Error as e:
+                logging.error(f'Search cache purge error: {e}')
+                return
+        if deleted:
+            logging.info(f'Search cache purged {deleted} expired entries')
+
+    def _disk_hit(self, key: str, row: tuple):
+        expires_on, value = row
+        self._set_memory(key, expires_on, value)
+        with self._memory_lock:
+            self.hits += 1
+            self.disk_hits += 1
+        return value
+
+    def _miss(self):
+        with self._memory_lock:
+            self.misses += 1
+        return None
+
+    def get(self, key: str):
+        now = time.time()
+        value = self._get_memory(key, now)
+        if value is not None:
+            return value
+        row = self._get_disk(key, now) if self._db is not None else None
+        return self._disk_hit(key, row) if row is not None else self._miss()
+
+    async def aget(self, key: str):
+        """
+        Como `get`, pero la lectura del nivel en disco se hace fuera del event loop.
+        """
+        now = time.time()
+        value = self._get_memory(key, now)
+        if value is not None:
+            return value
+        row = await asyncio.to_thread(self._get_disk, key, now) if self._db is not None else None
+        return self._disk_hit(key, row) if row is not None else self._miss()
+
+    def set(self, key: str, value):
+        expires_on = time.time() + self.ttl
+        self._set_memory(key, expires_on, value)
+        if self._db is not None:
+            self._set_disk(key, expires_on, value)
+
+    async def aset(self, key: str, value):
+        """
+        Como `set`, pero la escritura del nivel en disco se hace fuera del event loop.
+        """
+        expires_on = time.time() + self.ttl
+        self._set_memory(key, expires_on, value)
+        if self._db is not None:
+            await asyncio.to_thread(self._set_disk, key, expires_on, value)
+
+    def stats(self) -> dict:
+        return {'hits': self.hits, 'disk_hits': self.disk_hits, 'misses': self.misses, 'entries': len(self._entries)}
+
+def get_search_cache() -> SearchCache:
+    global search_cache
+
+    if search_cache is None:
+        # El nivel en disco es opcional: solo se activa si SEARCH_CACHE_DB_PATH está definido.
+        search_cache = SearchCache(SEARCH_CACHE_TTL, SEARCH_CACHE_MAX_ENTRIES, os.environ.get("SEARCH_CACHE_DB_PATH"))
+    return search_cache
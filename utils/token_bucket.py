@@ -0,0 +1,30 @@
+import asyncio
+import time
+
+class TokenBucket:
+    """
+    Limitador de tasa asíncrono (token bucket).
+
+    Se recargan `rate` tokens por segundo hasta un máximo de `capacity`; cada
+    petición consume un token y espera si no hay tokens disponibles.
+    """
+    def __init__(self, rate: float, capacity: float = None):
+        self.rate = rate
+        self.capacity = capacity or rate
+        self._tokens = self.capacity
+        self._updated = time.monotonic()
+        self._lock = asyncio.Lock()
+
+    def _refill(self):
+        now = time.monotonic()
+        self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    async def acquire(self, tokens: float = 1):
+        # El lock hace que las esperas se atiendan en orden de llegada.
+        async with self._lock:
+            self._refill()
+            while self._tokens < tokens:
+                await asyncio.sleep((tokens - self._tokens) / self.rate)
+                self._refill()
+            self._tokens -= tokens
@@ -0,0 +1,99 @@
+from urllib.parse import urlsplit, urlunsplit, parse_qsl, urlencode
+from utils.constants import URL_TRACKING_PARAMS, URL_TRACKING_PREFIXES
+
+# Subdominios que sirven el mismo artículo que el dominio principal.
+URL_HOST_PREFIXES = ('www.', 'amp.', 'm.')
+
+def _is_tracking_param(key: str, value: str) -> bool:
+    key = key.lower()
+    if key in URL_TRACKING_PARAMS or key.startswith(URL_TRACKING_PREFIXES):
+        return True
+    # Variante AMP de los diarios del grupo El Comercio (`?outputType=amp`).
+    return key == 'outputtype' and value.lower() == 'amp'
+
+def canonicalize_url(url: str) -> str:
+    """
+    Forma canónica de la URL de un artículo, para reconocer la misma noticia aunque
+    llegue con parámetros de seguimiento, como variante AMP o móvil, por http o https,
+    con o sin `www.` o con la barra final. Solo sirve como clave: no es una URL
+    navegable.
+    """
+    if not url:
+        return url
+    try:
+        parts = urlsplit(url.strip())
+        port = parts.port
+    except ValueError:
+        return url.strip()
+    host = (parts.hostname or '').lower()
+    if not host:
+        return url.strip()
+    for prefix in URL_HOST_PREFIXES:
+        if host.startswith(prefix):
+            host = host[len(prefix):]
+    if port and port not in (80, 443):
+        host = f'{host}:{port}'
+
+    segments = [segment for segment in parts.path.split('/') if segment]
+    # Variantes AMP por ruta: `/amp/<nota>` y `<nota>/amp`.
+    if segments and segments[-1].lower() == 'amp':
+        segments.pop()
+    if segments and segments[0].lower() == 'amp':
+        segments.pop(0)
+    query = sorted((key, value) for key, value in parse_qsl(parts.query, keep_blank_values=True) if not _is_tracking_param(key, value))
+    return urlunsplit(('https', host, '/' + '/'.join(segments), urlencode(query), ''))
+
+class ResultIndex:
+    """
+    Índice de resultados de una solicitud por URL canónica.
+
+    Un mismo artículo suele volver en varias consultas (otra keyword, el nombre y el
+    nombre comercial, otro sitio). El índice guarda una sola copia (con la URL de la
+    primera aparición) y acumula en `MatchedKeywords` todas las keywords con las que
+    se encontró. Los resultados se copian al indexarlos, así que los de la caché de
+    búsquedas no se modifican.
+
+    Uso:
+        index = ResultIndex('Keyword')
+        for result in results:
+            index.add(result)
+        index.results  # Resultados sin duplicados, en orden de aparición.
+    """
+    def __init__(self, keyword_field: str = 'Keyword'):
+        self.keyword_field = keyword_field
+        self.results = []
+        self._by_url = {}
+
+    def _keywords(self, result: dict) -> list:
+        keywords = result.get('MatchedKeywords')
+        if keywords is not None:
+            return keywords
+        keyword = result.get(self.keyword_field)
+        return [] if keyword is None else [keyword]
+
+    def add(self, result: dict) -> bool:
+        """
+        Agrega un resultado; devuelve False si era un duplicado (sus keywords se suman
+        a las del resultado ya indexado).
+        """
+        url = result.get('URL')
+        key = canonicalize_url(url) if url else None
+        entry = self._by_url.get(key) if key else None
+        if entry is not None:
+            for keyword in self._keywords(result):
+                if keyword not in entry['MatchedKeywords']:
+                    entry['MatchedKeywords'].append(keyword)
+            return False
+
+        entry = {**result, 'MatchedKeywords': list(self._keywords(result))}
+        if key:
+            self._by_url[key] = entry
+        self.results.append(entry)
+        return True
+
+    def extend(self, results: list):
+        for result in results:
+            self.add(result)
+
+    def __len__(self):
+        return len(self.results)
@@ -0,0 +1,73 @@
+from collections import OrderedDict
+from utils.constants import VALIDATOR_CACHE_MAX_ENTRIES
+
+# Static global variable
+validator_cache = None
+
+CONDITIONAL_HEADERS = ('If-None-Match', 'If-Modified-Since')
+
+class ValidatorCache:
+    """
+    Caché LRU de validadores HTTP (ETag / Last-Modified) por URL.
+
+    Solo guarda las respuestas que traen algún validador. La siguiente petición a la
+    misma URL se envía con If-None-Match / If-Modified-Since y, si el servidor
+    responde 304, se reutiliza el cuerpo guardado sin volver a descargarlo por el
+    gateway.
+    """
+    def __init__(self, max_entries: int):
+        self.max_entries = max_entries
+        self._entries = OrderedDict()
+        self.revalidations = 0
+        self.not_modified = 0
+        self.bytes_saved = 0
+
+    def conditional_headers(self, url: str) -> dict:
+        entry = self._entries.get(url)
+        if entry is None:
+            return {}
+        etag, last_modified, _ = entry
+        headers = {}
+        if etag:
+            headers['If-None-Match'] = etag
+        if last_modified:
+            headers['If-Modified-Since'] = last_modified
+        self.revalidations += 1
+        return headers
+
+    @staticmethod
+    def without_conditional_headers(headers: dict) -> dict:
+        # Copia de los headers sin los validadores, para repetir una petición sin condición.
+        return {key: value for key, value in (headers or {}).items() if key not in CONDITIONAL_HEADERS}
+
+    def store(self, url: str, response_headers, body):
+        etag = response_headers.get('ETag')
+        last_modified = response_headers.get('Last-Modified')
+        if not etag and not last_modified:
+            return
+        self._entries[url] = (etag, last_modified, body)
+        self._entries.move_to_end(url)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def get_not_modified(self, url: str):
+        """
+        Devuelve el cuerpo guardado para una respuesta 304, o None si no hay entrada.
+        """
+        entry = self._entries.get(url)
+        if entry is None:
+            return None
+        self._entries.move_to_end(url)
+        self.not_modified += 1
+        self.bytes_saved += len(entry[2])
+        return entry[2]
+
+    def stats(self) -> dict:
+        return {'revalidations': self.revalidations, 'not_modified': self.not_modified, 'bytes_saved': self.bytes_saved, 'entries': len(self._entries)}
+
+def get_validator_cache() -> ValidatorCache:
+    global validator_cache
+
+    if validator_cache is None:
+        validator_cache = ValidatorCache(VALIDATOR_CACHE_MAX_ENTRIES)
+    return validator_cache